@@ -0,0 +1,143 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+# Log de acceso en JSONL (lo escribe app.middleware.MetricsMiddleware): una
+# línea JSON por request con la ruta, el código de respuesta, la duración, el
+# tiempo en la base y en las plantillas y los métodos de los modelos que
+# hicieron consultas. Cada proceso escribe su archivo access.<pid>.jsonl en
+# ACCESS_LOG_DIR desde un thread aparte: el request sólo deja el registro en
+# una cola, y el thread los escribe de a tandas. La cola tiene hasta
+# ACCESS_LOG_QUEUE_SIZE registros: si el disco se atrasa, los que no entran
+# se descartan y se cuentan (MetricsMiddleware los suma en
+# vetsoft_access_log_dropped) en vez de hacer esperar al request o llenar la
+# memoria. Este módulo no importa prometheus_client: "manage.py serve" lo
+# carga antes de definir el directorio de las métricas de los workers.
+# "python manage.py logstats" calcula los percentiles por ruta.
+
+# registros que se escriben juntos como máximo
+BATCH = 256
+
+# escritor de cada proceso (un proceso hijo de un fork arranca el suyo)
+_writers = {}
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+class Writer:
+    """
+    Thread que escribe en un archivo los registros que dejan los requests en
+    su cola, de hasta ``size`` registros.
+    """
+
+    def __init__(self, path, size):
+        self.path = Path(path)
+        self.records = queue.Queue(maxsize=size)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="access-log", daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        """queues the record to be written, or drops it (returning False) if the queue is full"""
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                first = self.dropped == 1
+            if first:
+                logger.warning("La cola del log de acceso %s está llena: se descartan registros", self.path)
+            return False
+        return True
+
+    def close(self):
+        """writes the queued records and stops the thread"""
+        # con la cola llena el put espera a que el thread la vacíe (si no
+        # terminó por un error al escribir)
+        if self.thread.is_alive():
+            self.records.put(None)
+            self.thread.join()
+
+    def _run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                batch = [self.records.get()]
+                while len(batch) < BATCH:
+                    try:
+                        batch.append(self.records.get_nowait())
+                    except queue.Empty:
+                        break
+                file.write("".join(json.dumps(record) + "\n" for record in batch if record is not None))
+                file.flush()
+                if None in batch:
+                    return
+
+
+def record(view, request, response, seconds, current):
+    """
+    returns the log record of a request that took ``seconds``, with the
+    queries and templates of ``current`` (app.metrics.RequestMetrics)
+    """
+    return {
+        "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "view": view,
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "duration_ms": round(seconds * 1000, 3),
+        "db_ms": round(current.db_seconds * 1000, 3),
+        "queries": current.queries,
+        "template_ms": round(current.template_seconds * 1000, 3),
+        "model_methods": current.model_methods,
+    }
+
+
+def write(record):
+    """queues the record in the log of the process; returns False if it was dropped"""
+    pid = os.getpid()
+    writer = _writers.get(pid)
+    if writer is None:
+        with _lock:
+            writer = _writers.get(pid)
+            if writer is None:
+                writer = _writers[pid] = Writer(
+                    Path(settings.ACCESS_LOG_DIR) / f"access.{pid}.jsonl", settings.ACCESS_LOG_QUEUE_SIZE,
+                )
+    return writer.write(record)
+
+
+def close():
+    """writes what is left of the log of the process and stops its thread"""
+    with _lock:
+        writer = _writers.pop(os.getpid(), None)
+    if writer is not None:
+        writer.close()
+
+
+atexit.register(close)
+
+
+def load(directory):
+    """
+    returns the records of every log of the directory (a line cut in half,
+    the one being written, is skipped)
+    """
+    records = []
+    for path in sorted(Path(directory).glob("*.jsonl")):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
@@ -0,0 +1,195 @@
+from typing import NamedTuple
+
+from django.db import connection, transaction
+
+from . import reference, search, validation, versions
+from .models import Breed, City, Client, Medicine, Pet, Product, Provider, Vet
+
+# Máximo de ítems (altas, modificaciones y bajas sumadas) de un request
+MAX_ITEMS = 1000
+
+# Cantidad de ids por DELETE (SQLite limita los parámetros de una consulta)
+DELETE_BATCH = 500
+
+# Error de un ítem que no es un objeto JSON
+ITEM_ERROR = "Cada ítem tiene que ser un objeto"
+
+
+class Entity(NamedTuple):
+    """
+    Entidad de la API por lotes: su modelo, su validador y los campos que se
+    pueden escribir.
+    """
+
+    model: type
+    validator: validation.Validator
+    fields: tuple
+    # campo -> modelo de sus opciones (claves foráneas)
+    choices: dict = {}
+
+
+ENTITIES = {
+    "clients": Entity(Client, validation.CLIENT, ("name", "phone", "email", "city"), {"city": City}),
+    "pets": Entity(Pet, validation.PET, ("name", "breed", "birthday", "weight"), {"breed": Breed}),
+    "products": Entity(Product, validation.PRODUCT, ("name", "type", "price")),
+    "medicines": Entity(Medicine, validation.MEDICINE, ("name", "description", "dose")),
+    "vets": Entity(Vet, validation.VET, ("name", "phone", "email")),
+    "providers": Entity(Provider, validation.PROVIDER, ("name", "phone", "email", "address", "floor_apartament")),
+}
+
+
+class BatchError(Exception):
+    """
+    El cuerpo del request no es un lote válido (no los errores de sus ítems,
+    que se informan uno por uno).
+    """
+
+
+def apply(entity_name, payload):
+    """
+    applies a batch of changes to the entity and returns the result of every
+    item, in the same order.
+
+    ``payload`` is {"create": [fields, ...], "update": [{"id": ..., fields}, ...],
+    "delete": [id, ...]}, any of them optional. Every item is validated with
+    the rules of the model (the updates, merged with the current row); the
+    valid ones are applied with bulk operations in a single transaction and
+    the invalid ones are returned with their errors.
+    """
+    entity = ENTITIES[entity_name]
+    if not isinstance(payload, dict) or set(payload) - {"create", "update", "delete"}:
+        raise BatchError('El cuerpo tiene que ser un objeto con las listas "create", "update" y/o "delete"')
+    batch = {operation: payload.get(operation, []) for operation in ("create", "update", "delete")}
+    if not all(isinstance(items, list) for items in batch.values()):
+        raise BatchError('"create", "update" y "delete" tienen que ser listas')
+    if sum(map(len, batch.values())) > MAX_ITEMS:
+        raise BatchError(f"Un lote puede tener hasta {MAX_ITEMS} ítems")
+
+    with transaction.atomic():
+        # las ciudades y razas válidas salen de la caché de app.reference
+        choices = {
+            field: reference.names(model)
+            for field, model in entity.choices.items()
+            if batch["create"] or batch["update"]
+        }
+        results = {
+            "create": _create(entity, batch["create"], choices),
+            "update": _update(entity, batch["update"], choices),
+            "delete": _delete(entity, batch["delete"]),
+        }
+        if any(result["ok"] for items in results.values() for result in items):
+            # las operaciones por lote no disparan las señales de los modelos
+            versions.touch(entity.model)
+    return results
+
+
+def _create(entity, items, choices):
+    if not items:
+        return []
+
+    results = _validate(entity, items, choices)
+    instances = [
+        entity.model(**_attributes(entity, item))
+        for item, result in zip(items, results)
+        if result["ok"]
+    ]
+    if instances:
+        with search.bulk_insert(entity.model):
+            instances = entity.model.objects.bulk_create(instances)
+
+    created = iter(instances)
+    for result in results:
+        if result["ok"]:
+            result["id"] = next(created).pk
+    return results
+
+
+def _update(entity, items, choices):
+    if not items:
+        return []
+
+    ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+    existing = entity.model.objects.in_bulk([id for id in ids if _is_id(id)])
+
+    merged = []
+    for item, id in zip(items, ids):
+        instance = existing.get(id) if _is_id(id) else None
+        if instance is None:
+            merged.append(None)
+            continue
+        current = {field: entity.model._meta.get_field(field).value_to_string(instance) for field in entity.fields}
+        merged.append({**current, **{field: item[field] for field in entity.fields if field in item}})
+
+    results = _validate(entity, [fields or {} for fields in merged], choices)
+    changed = []
+    for item, id, fields, result in zip(items, ids, merged, results):
+        if not isinstance(item, dict):
+            result.update(ok=False, errors={"item": ITEM_ERROR})
+            continue
+        if fields is None:
+            result.update(ok=False, errors={"id": "Ese registro no existe"})
+            continue
+        result["id"] = id
+        if result["ok"]:
+            instance = existing[id]
+            for attname, value in _attributes(entity, fields).items():
+                setattr(instance, attname, value)
+            changed.append(instance)
+
+    if changed:
+        entity.model.objects.bulk_update(changed, [_attname(entity, field) for field in entity.fields])
+    return results
+
+
+def delete_rows(model, ids):
+    """
+    deletes the rows of the model with the given ids, a single DELETE ... IN
+    per DELETE_BATCH ids, and returns the ids that existed. It sends no
+    signals: the caller has to touch the versions of the model.
+    """
+    existing = set(model.objects.filter(pk__in=ids).values_list("id", flat=True))
+
+    # DELETE directo: QuerySet.delete() trae cada fila para mandar las
+    # señales de borrado una por una. Ninguna de estas entidades tiene filas
+    # que dependan de ella (los borrados en cascada son de ciudades y razas);
+    # DeleteRowsTest falla si alguna gana una relación
+    table = connection.ops.quote_name(model._meta.db_table)
+    rows = sorted(existing)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), DELETE_BATCH):
+            chunk = rows[start:start + DELETE_BATCH]
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+    return existing
+
+
+def _delete(entity, ids):
+    if not ids:
+        return []
+
+    existing = delete_rows(entity.model, [id for id in ids if _is_id(id)])
+    return [
+        {"ok": True, "id": id} if _is_id(id) and id in existing else {"ok": False, "errors": {"id": "Ese registro no existe"}}
+        for id in ids
+    ]
+
+
+def _validate(entity, items, choices):
+    rows = [item if isinstance(item, dict) else {} for item in items]
+    results = []
+    for item, errors in zip(items, entity.validator.validate_many(rows, choices)):
+        if not isinstance(item, dict):
+            errors = {"item": ITEM_ERROR}
+        results.append({"ok": True} if not errors else {"ok": False, "errors": errors})
+    return results
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _attname(entity, field):
+    return entity.model._meta.get_field(field).attname
+
+
+def _attributes(entity, item):
+    return {_attname(entity, field): item[field] for field in entity.fields}
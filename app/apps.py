@@ -8,3 +8,9 @@ class AppConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "app"
+
+    def ready(self):
+        """connects the signals of the app"""
+        from . import signals
+
+        signals.connect()
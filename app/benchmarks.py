@@ -0,0 +1,219 @@
+import gc
+import json
+import math
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+# Datos válidos de cada formulario, para los POST de alta y edición
+FORMS = {
+    "clients": lambda i: {"name": "Juan Perez", "phone": "54221555232", "email": f"bench{i}@vetsoft.com", "city": "1"},
+    "products": lambda i: {"name": "Alimento Premium", "type": "Alimento", "price": "1500.5"},
+    "medicines": lambda i: {"name": "Ibuprofeno", "description": "Ibuprofeno en comprimidos", "dose": "5"},
+    "vets": lambda i: {"name": "Veterinaria Perez", "phone": "54221555232", "email": f"bench{i}@vetsoft.com"},
+    "providers": lambda i: {
+        "name": "Distribuidora Perez", "phone": "54221555232", "email": f"bench{i}@vetsoft.com",
+        "address": "Calle 7 nro 1200", "floor_apartament": "Casa",
+    },
+    "pets": lambda i: {"name": "Firulais", "breed": "1", "birthday": "2020-05-20", "weight": "10"},
+}
+
+# Altas por request del benchmark de la API por lotes
+API_BATCH = 10
+
+# Campo del formulario de borrado de cada entidad
+DELETE_FIELDS = {
+    "clients": "client_id",
+    "products": "product_id",
+    "medicines": "medicine_id",
+    "vets": "vet_id",
+    "providers": "provider_id",
+    "pets": "pet_id",
+}
+
+
+@contextmanager
+def scratch_database():
+    """
+    creates a throwaway database (the test one) for the benchmarks, so the
+    real data is never touched, and destroys it at the end
+    """
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def file_database(path):
+    """
+    points the default database to a SQLite file (the scratch database of the
+    tests lives in memory, and WAL or several processes need a file)
+    """
+    old_name = connection.settings_dict["NAME"]
+    connection.close()
+    settings.DATABASES[connection.alias]["NAME"] = connection.settings_dict["NAME"] = str(path)
+    try:
+        yield connection
+    finally:
+        connection.close()
+        settings.DATABASES[connection.alias]["NAME"] = connection.settings_dict["NAME"] = old_name
+
+
+def measure_time(fn, repeat=3):
+    """returns the best wall time (in seconds) of running fn ``repeat`` times"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_memory(fn):
+    """returns the peak of memory (in bytes) allocated while running fn"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def route_requests(size):
+    """
+    returns the requests of the HTTP benchmark as (label, method, build),
+    where build(i) returns the path and the data of the i-th request; every
+    named route is covered, reads first and deletes last (the i-th delete
+    removes the row with id i + 1, so the data needs at least as many rows
+    as requests)
+    """
+    reads = [
+        ("GET home", "get", lambda i: (reverse("home"), None)),
+        ("GET search", "get", lambda i: (reverse("search"), {"q": "juan"})),
+        ("GET metrics", "get", lambda i: (reverse("metrics"), None)),
+    ]
+    writes = []
+    deletes = []
+    for entity, form in FORMS.items():
+        def edit(i, entity=entity):
+            return reverse(f"{entity}_edit", kwargs={"id": i % size + 1})
+
+        reads += [
+            (f"GET {entity}_repo", "get", lambda i, entity=entity: (reverse(f"{entity}_repo"), None)),
+            (f"GET {entity}_form", "get", lambda i, entity=entity: (reverse(f"{entity}_form"), None)),
+            (f"GET {entity}_edit", "get", lambda i, edit=edit: (edit(i), None)),
+            (f"GET {entity}_export", "get", lambda i, entity=entity: (
+                reverse(f"{entity}_export", kwargs={"fmt": "csv"}), None,
+            )),
+        ]
+        writes += [
+            (f"POST {entity}_form", "post", lambda i, entity=entity, form=form: (
+                reverse(f"{entity}_form"), form(i),
+            )),
+            (f"POST {entity}_edit", "post", lambda i, edit=edit, form=form: (
+                edit(i), {**form(i), "id": i % size + 1},
+            )),
+        ]
+        writes.append(
+            # un lote de 10 altas y una modificación por request
+            (f"POST {entity}_api", "post", lambda i, entity=entity, form=form: (
+                reverse(f"{entity}_api"),
+                json.dumps({
+                    "create": [form(i * API_BATCH + k) for k in range(API_BATCH)],
+                    "update": [{**form(i), "id": i % size + 1}],
+                }),
+            )),
+        )
+        deletes.append(
+            (f"POST {entity}_delete", "post", lambda i, entity=entity: (
+                reverse(f"{entity}_delete"), {DELETE_FIELDS[entity]: i + 1},
+            )),
+        )
+    reads.append(("GET products_prices", "get", lambda i: (reverse("products_prices"), None)))
+    writes.append(("POST products_prices", "post", lambda i: (
+        reverse("products_prices"), {"type": "Alimento", "percent": "1"},
+    )))
+    return reads + writes + deletes
+
+
+def send(client, method, path, data):
+    """makes the request with the test client; a str body is sent as JSON"""
+    if isinstance(data, str):
+        return getattr(client, method)(path, data, content_type="application/json")
+    return getattr(client, method)(path, data)
+
+
+def percentile(values, p):
+    """returns the p-th percentile (nearest rank) of the sorted values"""
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def run_requests(client, requests, count):
+    """
+    runs every request ``count`` times with the test client and returns, by
+    label, the latency percentiles (ms), the most queries of a request (the
+    first one may miss the cache) and the mean bytes of the response;
+    responses other than 200 or 302 are counted as errors
+    """
+    executed = []
+
+    def count_queries(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+
+    results = {}
+    for label, method, build in requests:
+        latencies = []
+        queries = size = errors = 0
+        for i in range(count):
+            path, data = build(i)
+            executed.clear()
+            with connection.execute_wrapper(count_queries):
+                start = time.perf_counter()
+                response = send(client, method, path, data)
+                body = b"".join(response.streaming_content) if response.streaming else response.content
+                latencies.append(time.perf_counter() - start)
+            queries = max(queries, len(executed))
+            size += len(body)
+            errors += response.status_code not in (200, 302)
+
+        latencies.sort()
+        results[label] = {
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "queries": queries,
+            "bytes": size // count,
+            "errors": errors,
+        }
+    return results
+
+
+def regressions(results, baseline, threshold):
+    """
+    compares the results with a baseline and returns the regressions as
+    (label, reason): a p50 latency more than ``threshold`` (a fraction)
+    above the baseline, or more queries than in the baseline
+    """
+    found = []
+    for label, result in results.items():
+        before = baseline.get(label)
+        if before is None:
+            continue
+        if result["p50_ms"] > before["p50_ms"] * (1 + threshold):
+            found.append((label, f"p50 {before['p50_ms']:.2f}ms -> {result['p50_ms']:.2f}ms"))
+        if result["queries"] > before["queries"]:
+            found.append((label, f"consultas {before['queries']} -> {result['queries']}"))
+    return found
+
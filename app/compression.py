@@ -0,0 +1,139 @@
+import gzip
+import secrets
+import struct
+import zlib
+
+import brotli
+
+# Codificaciones de contenido (Content-Encoding) que manda la app, en orden de
+# preferencia, con la extensión de sus archivos precomprimidos
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+# Archivos de texto, que son los que vale la pena comprimir (las fuentes woff2
+# y las imágenes ya vienen comprimidas)
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".txt", ".html", ".xml")
+
+# Niveles de compresión: los archivos estáticos se comprimen una sola vez (en
+# collectstatic) con el mejor, y las respuestas de las vistas en cada request
+# con uno rápido, que para HTML comprime casi lo mismo
+BEST = {"br": 11, "gzip": 9}
+FAST = {"br": 4, "gzip": 6}
+
+# Content-Type de las respuestas que se comprimen
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+# Bytes sin comprimir de un stream entre vaciado y vaciado del compresor: cada
+# vaciado cierra un bloque y comprime peor, pero el navegador no recibe nada
+# hasta el próximo
+STREAM_FLUSH_SIZE = 64 * 1024
+
+# Máximo de bytes al azar que se agregan a las respuestas gzip con el token
+# CSRF (como django.middleware.gzip.GZipMiddleware)
+BREACH_PADDING = 100
+
+
+def compress(data, encoding, levels=BEST, padding=0):
+    """
+    returns the data compressed with the encoding, at the level of ``levels``.
+    With ``padding`` (only gzip) the header gets up to that many random bytes
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=levels["br"])
+    compressed = gzip.compress(data, compresslevel=levels["gzip"], mtime=0)
+    if not padding:
+        return compressed
+    return _gzip_header(padding) + compressed[10:]
+
+
+def _gzip_header(padding):
+    # lo mismo que django.utils.text.compress_string con max_random_bytes: un
+    # nombre de archivo de largo al azar en el encabezado (FNAME) cambia el
+    # largo de cada respuesta, contra BREACH
+    name = b"a" * secrets.randbelow(padding) + b"\x00"
+    return b"\x1f\x8b\x08" + bytes([gzip.FNAME]) + b"\x00\x00\x00\x00\x00\xff" + name
+
+
+class _StreamCompressor:
+    """
+    Compresor de un stream que vacía lo pendiente cada STREAM_FLUSH_SIZE
+    bytes sin comprimir, no en cada bloque.
+    """
+
+    def __init__(self, encoding, levels, padding):
+        """starts the compressor of the encoding"""
+        self.pending = 0
+        self.header = b""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=levels["br"])
+            self.process, self.flush, self.end = compressor.process, compressor.flush, compressor.finish
+            return
+        # deflate sin encabezado, para armar el de gzip con el relleno
+        compressor = zlib.compressobj(levels["gzip"], zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.header = _gzip_header(padding) if padding else b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+        self.crc = self.size = 0
+
+        def process(chunk):
+            self.crc = zlib.crc32(chunk, self.crc)
+            self.size += len(chunk)
+            return compressor.compress(chunk)
+
+        self.process = process
+        self.flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.end = lambda: compressor.flush() + struct.pack("<II", self.crc, self.size & 0xFFFFFFFF)
+
+    def feed(self, chunk):
+        """returns the compressed data of the chunk that is ready to send"""
+        data, self.header = self.header + self.process(chunk), b""
+        self.pending += len(chunk)
+        if self.pending >= STREAM_FLUSH_SIZE:
+            data += self.flush()
+            self.pending = 0
+        return data
+
+    def finish(self):
+        """returns the rest of the compressed stream"""
+        return self.header + self.end()
+
+
+def compress_stream(chunks, encoding, levels=FAST, padding=0):
+    """
+    compresses a stream as it is generated, sending what is ready every
+    STREAM_FLUSH_SIZE bytes (``padding`` as in compress)
+    """
+    compressor = _StreamCompressor(encoding, levels, padding)
+    for chunk in chunks:
+        data = compressor.feed(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding, levels=FAST, padding=0):
+    """compress_stream for an async stream"""
+    compressor = _StreamCompressor(encoding, levels, padding)
+    async for chunk in chunks:
+        data = compressor.feed(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def accepted(header):
+    """
+    returns the encodings of ENCODINGS that an Accept-Encoding header allows,
+    in the order of preference of the app (a q=0 rejects an encoding)
+    """
+    allowed = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        quality = params.strip().removeprefix("q=")
+        try:
+            rejected = params and float(quality) == 0
+        except ValueError:
+            rejected = True
+        if not rejected:
+            allowed.add(coding)
+    if "*" in allowed:
+        return list(ENCODINGS)
+    return [encoding for encoding in ENCODINGS if encoding in allowed]
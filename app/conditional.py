@@ -0,0 +1,41 @@
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import versions
+
+
+def conditional(*models):
+    """
+    decorator for views whose page only changes with the tables of ``models``:
+    answers If-None-Match/If-Modified-Since with a 304 Not Modified, checking
+    a single row per table instead of running the view.
+
+    The ETag is left in ``request.table_versions`` (with the models) for the
+    cached fragments of the page, which are valid for the same versions.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            etag, last_modified = versions.validators(*models, extra=settings.REPOSITORY_PAGE_SIZE)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            request.table_versions = (frozenset(models), etag)
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.headers.setdefault("ETag", etag)
+                if timestamp is not None:
+                    response.headers.setdefault("Last-Modified", http_date(timestamp))
+                # el navegador guarda la página pero la revalida en cada visita
+                patch_cache_control(response, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
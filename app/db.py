@@ -0,0 +1,27 @@
+from django.conf import settings
+
+
+def apply_profile(sender, connection, **kwargs):
+    """
+    applies the pragmas of the production profile (settings.SQLITE_PRAGMAS)
+    to every new SQLite connection; they are per connection, except WAL that
+    stays in the database file
+    """
+    if connection.vendor != "sqlite" or settings.DB_PROFILE != "production":
+        return
+
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def pragmas(connection):
+    """
+    returns the current value of the pragmas of the profile on the connection
+    (None for the ones that do not apply, like mmap_size in a memory database)
+    """
+    values = {}
+    with connection.cursor() as cursor:
+        for name in settings.SQLITE_PRAGMAS:
+            row = cursor.execute(f"PRAGMA {name}").fetchone()
+            values[name] = row[0] if row else None
+    return values
@@ -0,0 +1,53 @@
+import re
+from typing import NamedTuple
+
+from django.db import connection
+
+_SCAN = re.compile(r"^SCAN (\w+)")
+_USES_INDEX = re.compile(r"USING (COVERING )?INDEX|USING INTEGER PRIMARY KEY|VIRTUAL TABLE")
+_FILTERS = re.compile(r"\bWHERE\b", re.IGNORECASE)
+_LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+
+class Plan(NamedTuple):
+    """
+    Plan de ejecución de una consulta (EXPLAIN QUERY PLAN de SQLite) y las
+    tablas que recorre enteras sin necesidad.
+    """
+
+    sql: str
+    steps: list
+    full_scans: list
+    temp_sorts: int
+
+    @property
+    def ok(self):
+        """whether the query neither scans a whole table to filter it nor sorts without an index"""
+        return not self.full_scans and not self.temp_sorts
+
+
+def explain(sql, params=()):
+    """
+    returns the plan of the query. A SCAN of a table is flagged only when the
+    query filters it (WHERE) or sorts it (a temporary b-tree): reading every
+    row of a query without WHERE (an export, the options of a form) or just
+    the first rows of one with LIMIT (the first page of a listing) is the
+    expected plan.
+    """
+    if connection.vendor != "sqlite":
+        raise NotImplementedError("EXPLAIN QUERY PLAN sólo está disponible en SQLite")
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        steps = [row[3] for row in cursor.fetchall()]
+
+    temp_sorts = sum("USE TEMP B-TREE" in step for step in steps)
+    filters = bool(_FILTERS.search(sql))
+    full_scans = []
+    for step in steps:
+        scan = _SCAN.match(step)
+        if scan is None or _USES_INDEX.search(step):
+            continue
+        if filters or (temp_sorts and _LIMIT.search(sql)):
+            full_scans.append(scan.group(1))
+    return Plan(sql, steps, full_scans, temp_sorts)
@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from . import listing
+
+# entidad -> (proyección de solo lectura, nombre del archivo)
+EXPORTS = {
+    "clients": (listing.CLIENTS, "clientes"),
+    "pets": (listing.PETS, "mascotas"),
+    "products": (listing.PRODUCTS, "productos"),
+    "medicines": (listing.MEDICINES, "medicamentos"),
+    "vets": (listing.VETS, "veterinarias"),
+    "providers": (listing.PROVIDERS, "proveedores"),
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+CHUNK_SIZE = 2000
+
+
+def stream(entity, fmt, chunk_size=CHUNK_SIZE):
+    """
+    yields the export of the entity encoded as utf-8, a chunk of rows at a time.
+
+    The rows come from ``QuerySet.iterator`` over a ``values_list``, so the
+    memory does not grow with the table and the header is sent before the
+    query even runs.
+    """
+    projection, _ = EXPORTS[entity]
+    columns = projection.row._fields
+    rows = projection.queryset().order_by("id").iterator(chunk_size=chunk_size)
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+
+        while chunk := list(islice(rows, chunk_size)):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(chunk)
+            yield buffer.getvalue().encode()
+    elif fmt == "jsonl":
+        while chunk := list(islice(rows, chunk_size)):
+            yield "".join(
+                json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n"
+                for row in chunk
+            ).encode()
+    else:
+        raise ValueError(f"Formato de exportación desconocido: {fmt}")
+
+
+def filename(entity, fmt):
+    """returns the name of the exported file"""
+    return f"{EXPORTS[entity][1]}.{fmt}"
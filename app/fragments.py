@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import templating, versions
+from .pagination import parse_cursor
+
+# El HTML cacheado es el mismo para todos, así que se guarda con este valor en
+# lugar del token CSRF y se reemplaza por el de cada request al servirlo
+CSRF_PLACEHOLDER = "csrf-token-placeholder"
+
+
+def _fragment_key(request, template_name):
+    after = parse_cursor(request.GET.get("after"))
+    before = parse_cursor(request.GET.get("before"))
+    size = settings.REPOSITORY_PAGE_SIZE
+    return after, before, size, f"fragment:{template_name}:{after}:{before}:{size}"
+
+
+def _render(template_name, context_name, page):
+    return render_to_string(
+        template_name,
+        {context_name: page, "page": page, "csrf_token": CSRF_PLACEHOLDER},
+        using=templating.engine("tables"),
+    )
+
+
+def _known_versions(request, models):
+    # la versión que ya leyó app.conditional para el ETag, si es de los mismos modelos
+    known = getattr(request, "table_versions", None)
+    if known is not None and known[0] == frozenset(models):
+        return known[1]
+    return None
+
+
+def repository_table(request, template_name, context_name, projection, models):
+    """
+    renders the table of a repository page (rows and pagination) through the
+    cache.
+
+    The fragment is stored with the versions of ``models`` in the database
+    (TableVersion, the same ones of the ETag) it was rendered with, so it is
+    used until a save or delete of any of those models bumps them; a flush
+    or a restored database has other versions too.
+    """
+    after, before, size, fragment_key = _fragment_key(request, template_name)
+    current = _known_versions(request, models) or versions.validators(*models)[0]
+
+    stored = cache.get(fragment_key)
+    if stored is not None and stored[0] == current:
+        html = stored[1]
+    else:
+        html = _render(template_name, context_name, projection.page(after, before, size))
+        cache.set(fragment_key, (current, html), settings.REPOSITORY_CACHE_TIMEOUT)
+
+    return mark_safe(html.replace(CSRF_PLACEHOLDER, get_token(request)))
+
@@ -0,0 +1,112 @@
+from typing import NamedTuple
+
+from .models import Client, Medicine, Pet, Product, Provider, Vet
+from .pagination import keyset_page
+
+
+class ClientRow(NamedTuple):
+    """
+    Fila de solo lectura del listado de clientes.
+    """
+
+    id: int
+    name: str
+    phone: int
+    email: str
+    city_name: str
+
+
+class ProductRow(NamedTuple):
+    """
+    Fila de solo lectura del listado de productos.
+    """
+
+    id: int
+    name: str
+    type: str
+    price: float
+
+
+class MedicineRow(NamedTuple):
+    """
+    Fila de solo lectura del listado de medicinas.
+    """
+
+    id: int
+    name: str
+    description: str
+    dose: float
+
+
+class VetRow(NamedTuple):
+    """
+    Fila de solo lectura del listado de veterinarias.
+    """
+
+    id: int
+    name: str
+    phone: str
+    email: str
+
+
+class ProviderRow(NamedTuple):
+    """
+    Fila de solo lectura del listado de proveedores.
+    """
+
+    id: int
+    name: str
+    phone: str
+    email: str
+    address: str
+    floor_apartament: str
+
+
+class PetRow(NamedTuple):
+    """
+    Fila de solo lectura del listado de mascotas.
+    """
+
+    id: int
+    name: str
+    breed_name: str
+    birthday: object
+    weight: float
+
+
+class Listing:
+    """
+    Proyección de solo lectura de un modelo para los listados.
+
+    Trae sólo las columnas que muestra el template (incluyendo los nombres de
+    las relaciones, con un JOIN) y arma tuplas en lugar de instancias del modelo.
+    """
+
+    def __init__(self, model, row, columns):
+        self.model = model
+        self.row = row
+        self.columns = columns
+
+    def queryset(self):
+        """returns the values_list queryset with the listing columns"""
+        return self.model.objects.values_list(*self.columns)
+
+    def rows(self, values):
+        """builds the rows of the listing from the values of the queryset"""
+        return list(map(self.row._make, values))
+
+    def page(self, after=None, before=None, size=None):
+        """gets one page of the listing (see keyset_page)"""
+        return keyset_page(self.queryset(), after, before, size, row=self.row._make)
+
+
+CLIENTS = Listing(Client, ClientRow, ("id", "name", "phone", "email", "city__name"))
+PRODUCTS = Listing(Product, ProductRow, ("id", "name", "type", "price"))
+MEDICINES = Listing(Medicine, MedicineRow, ("id", "name", "description", "dose"))
+VETS = Listing(Vet, VetRow, ("id", "name", "phone", "email"))
+PROVIDERS = Listing(
+    Provider,
+    ProviderRow,
+    ("id", "name", "phone", "email", "address", "floor_apartament"),
+)
+PETS = Listing(Pet, PetRow, ("id", "name", "breed__name", "birthday", "weight"))
@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from app.benchmarks import regressions, route_requests, run_requests, scratch_database
+from app.management.commands.generate_fixtures import insert
+from fixtures import generator
+
+
+class Command(BaseCommand):
+    """
+    Mide la latencia HTTP de todas las rutas de app/urls.py con el cliente de
+    tests de Django, sobre una base descartable cargada con el generador de
+    fixtures: p50/p95/p99, consultas SQL y bytes por request. Guarda los
+    resultados en un JSON y, si se le pasa uno anterior como línea de base,
+    marca las rutas que empeoraron.
+    """
+
+    help = "Benchmark de latencia HTTP de todas las rutas"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("--size", type=int, default=10_000, help="filas de cada modelo")
+        parser.add_argument("--requests", type=int, default=50, help="requests por ruta")
+        parser.add_argument("--seed", type=int, default=0, help="semilla de los datos")
+        parser.add_argument("--output", default="bench.json", help="archivo JSON de resultados")
+        parser.add_argument("--baseline", help="resultados anteriores (JSON) contra los que comparar")
+        parser.add_argument(
+            "--threshold", type=float, default=20,
+            help="porcentaje de aumento del p50 a partir del cual se marca una regresión",
+        )
+
+    def handle(self, *args, **options):
+        """seeds the data, runs every route and compares with the baseline"""
+        size, count = options["size"], options["requests"]
+        if count > size:
+            raise CommandError("--requests no puede ser mayor que --size (cada borrado elimina una fila)")
+
+        baseline = None
+        if options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text())
+
+        # con las métricas activas, para medir también /metrics
+        with scratch_database(), override_settings(ALLOWED_HOSTS=["testserver"], METRICS=True):
+            self.stdout.write(f"Cargando {size} filas de cada modelo...")
+            insert(dict.fromkeys(generator.COUNTS, size), options["seed"], 10_000)
+            cache.clear()
+            results = run_requests(Client(), route_requests(size), count)
+
+        Path(options["output"]).write_text(json.dumps(
+            {"size": size, "requests": count, "routes": results}, indent=2,
+        ))
+
+        self.stdout.write(
+            f"{'ruta':<26} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'consultas':>10} {'bytes':>10}",
+        )
+        for label, result in results.items():
+            self.stdout.write(
+                f"{label:<26} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                f"{result['queries']:>10} {result['bytes']:>10}" + (f"  ({result['errors']} errores)" if result["errors"] else ""),
+            )
+        self.stdout.write(f"Resultados en {options['output']}")
+
+        if baseline is None:
+            return
+        if baseline["size"] != size:
+            self.stdout.write(self.style.WARNING(
+                f"La línea de base se midió con {baseline['size']} filas, no con {size}",
+            ))
+        found = regressions(results, baseline["routes"], options["threshold"] / 100)
+        for label, reason in found:
+            self.stdout.write(self.style.ERROR(f"REGRESIÓN {label}: {reason}"))
+        if found:
+            raise CommandError(f"{len(found)} regresiones respecto de {options['baseline']}")
+        self.stdout.write(self.style.SUCCESS(f"Sin regresiones respecto de {options['baseline']}"))
@@ -0,0 +1,101 @@
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from django.urls import reverse
+
+from app.benchmarks import file_database
+from app.management.commands.generate_fixtures import insert
+from fixtures import generator
+
+PAGES = ["clients_repo", "products_repo", "medicines_repo", "vets_repo", "providers_repo", "pets_repo"]
+
+
+class Command(BaseCommand):
+    """
+    Mide los bytes que viajan y el tiempo hasta el último byte de los
+    listados sin comprimir, con gzip y con brotli (CompressionMiddleware) a
+    través de una conexión local limitada: la app corre en un servidor WSGI
+    en un thread y el cliente lee el socket a --kbps, sobre una base
+    descartable con --rows filas por página.
+    """
+
+    help = "Bytes y tiempo hasta el último byte de los listados con y sin compresión"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("--rows", type=int, default=2000, help="filas de cada modelo (todas en una página)")
+        parser.add_argument("--kbps", type=int, default=10_000, help="velocidad del enlace en kilobits por segundo")
+        parser.add_argument("--requests", type=int, default=3, help="requests por página y codificación")
+
+    def handle(self, *args, **options):
+        """fetches every repository page with each encoding through the throttled link"""
+        rows = options["rows"]
+        with tempfile.TemporaryDirectory() as tmp, file_database(Path(tmp) / "bench.sqlite3"), \
+                override_settings(REPOSITORY_PAGE_SIZE=rows, ALLOWED_HOSTS=["127.0.0.1"]):
+            call_command("migrate", verbosity=0)
+            insert(dict.fromkeys(generator.COUNTS, rows), 0, 10_000)
+
+            self.stdout.write(f"{'página':<16} {'codificación':<13} {'bytes':>11} {'último byte (ms)':>17}")
+            with serve() as address:
+                for name in PAGES:
+                    path = reverse(name)
+                    # la primera visita renderiza la tabla y la guarda en la caché
+                    fetch(address, path, "identity", kbps=None)
+                    for encoding in ("identity", "gzip", "br"):
+                        results = [fetch(address, path, encoding, options["kbps"]) for _ in range(options["requests"])]
+                        size = results[0][0]
+                        elapsed = statistics.median(seconds for _, seconds in results)
+                        self.stdout.write(f"{name:<16} {encoding:<13} {size:>11,} {elapsed * 1000:>17.0f}")
+
+
+class QuietHandler(WSGIRequestHandler):
+    """
+    Handler del servidor WSGI del benchmark, sin el log de cada request.
+    """
+
+    def log_message(self, format, *args):
+        """does not log the requests"""
+
+
+@contextmanager
+def serve():
+    """serves the app in a thread and yields its address"""
+    server = make_server("127.0.0.1", 0, get_wsgi_application(), handler_class=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def fetch(address, path, encoding, kbps):
+    """
+    makes a GET and returns the bytes received (headers included) and the
+    seconds until the last one, reading no faster than ``kbps`` kilobits per
+    second (the small receive buffer makes the server wait, like a slow link)
+    """
+    with socket.socket() as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024)
+        sock.connect(address)
+        start = time.perf_counter()
+        sock.sendall(f"GET {path} HTTP/1.0\r\nHost: 127.0.0.1\r\nAccept-Encoding: {encoding}\r\n\r\n".encode())
+        received = 0
+        while chunk := sock.recv(4096):
+            received += len(chunk)
+            if kbps:
+                wait = start + received * 8 / (kbps * 1000) - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+        return received, time.perf_counter() - start
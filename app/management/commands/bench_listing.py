@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app import listing
+from app.benchmarks import measure_memory, measure_time, scratch_database
+from app.models import City, Client
+
+SEED_BATCH = 10_000
+
+
+class Command(BaseCommand):
+    """
+    Compara el listado de clientes con objects.all() contra la proyección de
+    solo lectura (app.listing), en tiempo y memoria pico, sobre una base
+    descartable.
+    """
+
+    help = "Compara tiempo y memoria de objects.all() contra la proyección del listado"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000],
+            help="cantidades de clientes a medir",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="repeticiones por medición")
+
+    def handle(self, *args, **options):
+        """runs the comparison for every size"""
+        paths = [
+            ("objects.all()", lambda: list(Client.objects.all())),
+            ("listing", lambda: listing.CLIENTS.rows(listing.CLIENTS.queryset().order_by("id"))),
+        ]
+
+        with scratch_database():
+            cities = City.objects.bulk_create(City(name=f"Ciudad {i}") for i in range(20))
+            seeded = 0
+
+            self.stdout.write(f"{'filas':>10} {'camino':<15} {'tiempo (s)':>11} {'memoria (MB)':>13} {'filas/s':>12}")
+            for size in sorted(options["sizes"]):
+                self._seed(cities, seeded, size)
+                seeded = size
+
+                for label, fn in paths:
+                    elapsed = measure_time(fn, options["repeat"])
+                    peak = measure_memory(fn)
+                    self.stdout.write(
+                        f"{size:>10} {label:<15} {elapsed:>11.3f} {peak / 2**20:>13.1f} {size / elapsed:>12,.0f}",
+                    )
+
+        self.stdout.write(
+            "Nota: objects.all() no incluye las consultas extra del template "
+            "(client.city.name dispara una consulta por fila); el listing usa un solo JOIN.",
+        )
+
+    def _seed(self, cities, start, end):
+        for offset in range(start, end, SEED_BATCH):
+            with transaction.atomic():
+                Client.objects.bulk_create(
+                    Client(
+                        name="Cliente de prueba",
+                        phone=5422100000 + i,
+                        email=f"cliente{i}@vetsoft.com",
+                        city=cities[i % len(cities)],
+                    )
+                    for i in range(offset, min(offset + SEED_BATCH, end))
+                )
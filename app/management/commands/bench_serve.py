@@ -0,0 +1,148 @@
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from app.benchmarks import file_database, percentile
+from app.management.commands.bench_compression import PAGES
+from app.management.commands.generate_fixtures import insert
+from fixtures import generator
+
+
+class Command(BaseCommand):
+    """
+    Compara el throughput de runserver con el de "manage.py serve" (ver
+    app.server) con varios workers: cada servidor corre en un proceso aparte
+    sobre una base descartable y --clients procesos piden los listados
+    durante --duration segundos, cada uno por una conexión keep-alive.
+    """
+
+    help = "Requests por segundo y latencia de runserver contra serve"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("--rows", type=int, default=1000, help="filas de cada modelo")
+        parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count() or 1], help="workers de serve")
+        parser.add_argument("--clients", type=int, default=8, help="procesos que hacen requests")
+        parser.add_argument("--duration", type=float, default=5, help="segundos de carga por servidor")
+
+    def handle(self, *args, **options):
+        """runs the load against runserver and against serve with each number of workers"""
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Path(tmp) / "bench.sqlite3"
+            with file_database(database):
+                call_command("migrate", verbosity=0)
+                insert(dict.fromkeys(generator.COUNTS, options["rows"]), 0, 10_000)
+            paths = [reverse(name) for name in PAGES]
+
+            servers = [("runserver", ["runserver", "--noreload"])] + [
+                (f"serve --workers {workers}", ["serve", "--workers", str(workers)])
+                for workers in options["workers"]
+            ]
+            self.stdout.write(f"{'servidor':<20} {'requests/s':>11} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errores':>8}")
+            for name, command in servers:
+                with running(command, database, tmp) as port:
+                    requests, latencies, errors = load(port, paths, options["clients"], options["duration"])
+                latencies.sort()
+                self.stdout.write(
+                    f"{name:<20} {requests / options['duration']:>11,.0f}"
+                    f" {percentile(latencies, 50) * 1000:>9.1f} {percentile(latencies, 99) * 1000:>9.1f} {errors:>8}",
+                )
+
+
+@contextmanager
+def running(command, database, tmp):
+    """
+    runs "manage.py <command>" on a free port over the database and yields
+    the port once it accepts connections; stops it at the end
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    # las métricas de runserver también van a un directorio (serve lo vacía)
+    metrics = Path(tmp) / "metrics"
+    metrics.mkdir(exist_ok=True)
+    env = {**os.environ, "DB_NAME": str(database), "ALLOWED_HOSTS": "127.0.0.1", "PROMETHEUS_MULTIPROC_DIR": str(metrics)}
+    process = subprocess.Popen(
+        [sys.executable, Path(settings.BASE_DIR) / "manage.py", *command, f"127.0.0.1:{port}"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port)).close()
+                break
+            except ConnectionRefusedError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        yield port
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+
+def load(port, paths, clients, duration):
+    """
+    makes requests to the server from ``clients`` processes for ``duration``
+    seconds and returns the requests done, their latencies and the errors
+    """
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    start = time.monotonic() + 1
+    processes = [
+        context.Process(target=_client, args=(port, paths[number % len(paths):] + paths, start, duration, results))
+        for number in range(clients)
+    ]
+    for process in processes:
+        process.start()
+
+    latencies = []
+    errors = 0
+    for _ in processes:
+        found, failed = results.get()
+        latencies += found
+        errors += failed
+    for process in processes:
+        process.join()
+    return len(latencies), latencies, errors
+
+
+def _client(port, paths, start, duration, results):
+    latencies = []
+    errors = 0
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while time.monotonic() < start:
+        time.sleep(0.001)
+
+    deadline = start + duration
+    while time.monotonic() < deadline:
+        path = paths[len(latencies) % len(paths)]
+        began = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - began)
+        except (OSError, http.client.HTTPException):
+            # el servidor cerró la conexión: se abre otra
+            errors += 1
+            connection.close()
+    connection.close()
+    results.put((latencies, errors))
@@ -0,0 +1,58 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from app import shell
+from app.benchmarks import percentile, route_requests, scratch_database, send
+from app.management.commands.generate_fixtures import insert
+from fixtures import generator
+
+
+class Command(BaseCommand):
+    """
+    Mide cuánto ahorra por request el esqueleto de página cacheado (app.shell)
+    en cada página HTML: la latencia p50 con el esqueleto ya renderizado contra
+    la de renderizarlo en cada request, como antes.
+    """
+
+    help = "Ahorro por request del esqueleto de página cacheado"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("--size", type=int, default=1000, help="filas de cada modelo")
+        parser.add_argument("--requests", type=int, default=200, help="requests por página y modo")
+
+    def handle(self, *args, **options):
+        """measures every HTML page with and without the cached shell"""
+        pages = [
+            (label, build)
+            for label, method, build in route_requests(options["size"])
+            if method == "get" and not label.endswith("_export")
+        ]
+
+        with scratch_database(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            insert(dict.fromkeys(generator.COUNTS, options["size"]), 0, 10_000)
+            cache.clear()
+            client = Client()
+
+            self.stdout.write(f"{'página':<24} {'sin caché (ms)':>15} {'con caché (ms)':>15} {'ahorro (ms)':>12} {'ahorro':>7}")
+            for label, build in pages:
+                cold = self._p50(client, build, options["requests"], clear=True)
+                warm = self._p50(client, build, options["requests"], clear=False)
+                self.stdout.write(
+                    f"{label:<24} {cold:>15.3f} {warm:>15.3f} {cold - warm:>12.3f} {(cold - warm) / cold:>7.1%}",
+                )
+
+    def _p50(self, client, build, count, clear):
+        latencies = []
+        for i in range(count):
+            path, data = build(i)
+            if clear:
+                shell.clear()
+            start = time.perf_counter()
+            send(client, "get", path, data)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        return percentile(latencies, 50) * 1000
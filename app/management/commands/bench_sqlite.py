@@ -0,0 +1,103 @@
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.test import override_settings
+
+from app import listing
+from app.benchmarks import FORMS, file_database
+from app.db import pragmas
+from app.management.commands.generate_fixtures import insert
+from app.models import Client
+from fixtures import generator
+
+
+class Command(BaseCommand):
+    """
+    Compara el perfil "default" de SQLite con el "production" (WAL y pragmas,
+    ver app.db) con procesos concurrentes, como los workers de un servidor:
+    lectores que recorren páginas del listado de clientes y escritores que dan
+    de alta clientes con Client.save_client. Cada perfil usa su propio archivo
+    de base en un directorio temporal.
+    """
+
+    help = "Throughput de lectura y escritura concurrente de SQLite por perfil"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("--size", type=int, default=10_000, help="filas de cada modelo")
+        parser.add_argument("--readers", type=int, default=4, help="procesos lectores")
+        parser.add_argument("--writers", type=int, default=4, help="procesos escritores")
+        parser.add_argument("--duration", type=float, default=5, help="segundos de carga")
+
+    def handle(self, *args, **options):
+        """runs the load against each profile"""
+        self.stdout.write(
+            f"{'perfil':<11} {'lecturas/s':>11} {'escrituras/s':>13} {'errores lectura':>16} {'errores escritura':>18}",
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            for profile in ("default", "production"):
+                with file_database(Path(tmp) / f"{profile}.sqlite3") as connection, \
+                        override_settings(DB_PROFILE=profile):
+                    call_command("migrate", verbosity=0)
+                    insert(dict.fromkeys(generator.COUNTS, options["size"]), 0, 10_000)
+                    journal = pragmas(connection)["journal_mode"]
+                    # los procesos hijos abren sus propias conexiones
+                    connections.close_all()
+                    totals = run_workers(options["readers"], options["writers"], options["duration"], options["size"])
+
+                duration = options["duration"]
+                self.stdout.write(
+                    f"{profile:<11} {totals['reader'][0] / duration:>11,.0f} {totals['writer'][0] / duration:>13,.0f} "
+                    f"{totals['reader'][1]:>16} {totals['writer'][1]:>18}   (journal_mode={journal})",
+                )
+
+
+def run_workers(readers, writers, duration, size):
+    """
+    runs the reader and writer processes for ``duration`` seconds and returns,
+    by kind, the operations done and the "database is locked" errors
+    """
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    deadline = time.monotonic() + 1 + duration
+    processes = [
+        context.Process(target=_work, args=(kind, deadline - duration, deadline, size, results))
+        for kind in ["reader"] * readers + ["writer"] * writers
+    ]
+    for process in processes:
+        process.start()
+
+    totals = {"reader": [0, 0], "writer": [0, 0]}
+    for _ in processes:
+        kind, done, errors = results.get()
+        totals[kind][0] += done
+        totals[kind][1] += errors
+    for process in processes:
+        process.join()
+    return totals
+
+
+def _work(kind, start, deadline, size, results):
+    rng = random.Random()
+    done = errors = 0
+    while time.monotonic() < start:
+        time.sleep(0.001)
+
+    while time.monotonic() < deadline:
+        try:
+            if kind == "reader":
+                list(listing.CLIENTS.page(after=rng.randrange(size)))
+            else:
+                Client.save_client(FORMS["clients"](rng.randrange(10**9)))
+            done += 1
+        except OperationalError:
+            errors += 1
+
+    connections.close_all()
+    results.put((kind, done, errors))
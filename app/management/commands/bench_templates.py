@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from app import listing
+from app.benchmarks import measure_time, scratch_database
+from app.fragments import CSRF_PLACEHOLDER
+from app.management.commands.generate_fixtures import insert
+from fixtures import generator
+
+TABLES = [
+    ("clients", listing.CLIENTS),
+    ("products", listing.PRODUCTS),
+    ("medicines", listing.MEDICINES),
+    ("vets", listing.VETS),
+    ("providers", listing.PROVIDERS),
+    ("pets", listing.PETS),
+]
+
+
+class Command(BaseCommand):
+    """
+    Compara el tiempo de renderizar la tabla de cada listado con el motor de
+    plantillas de Django y con Jinja2 (app/jinja2/), según la cantidad de
+    filas de la página, sobre una base descartable.
+    """
+
+    help = "Tiempo de render de las tablas de los listados con Django y con Jinja2"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument(
+            "--rows", nargs="+", type=int, default=[50, 1000, 10_000],
+            help="filas por página a medir",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="repeticiones por medición")
+
+    def handle(self, *args, **options):
+        """renders every table with both engines for every page size"""
+        with scratch_database():
+            insert(dict.fromkeys(generator.COUNTS, max(options["rows"])), 0, 10_000)
+
+            self.stdout.write(f"{'tabla':<10} {'filas':>7} {'django (ms)':>12} {'jinja2 (ms)':>12} {'mejora':>7}")
+            for name, projection in TABLES:
+                for rows in sorted(options["rows"]):
+                    page = projection.page(None, None, rows)
+                    context = {name: page, "page": page, "csrf_token": CSRF_PLACEHOLDER}
+                    times = [
+                        measure_time(lambda: render_to_string(f"{name}/table.html", context, using=engine), options["repeat"])
+                        for engine in ("django", "jinja2")
+                    ]
+                    self.stdout.write(
+                        f"{name:<10} {rows:>7} {times[0] * 1000:>12.2f} {times[1] * 1000:>12.2f} {times[0] / times[1]:>6.1f}x",
+                    )
@@ -0,0 +1,68 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from app import validation
+from fixtures import generator
+
+VALIDATORS = {
+    "client": validation.CLIENT,
+    "pet": validation.PET,
+    "product": validation.PRODUCT,
+    "medicine": validation.MEDICINE,
+    "vet": validation.VET,
+    "provider": validation.PROVIDER,
+}
+
+
+class Command(BaseCommand):
+    """
+    Mide cuántos registros por segundo valida cada validador compilado de
+    app.validation, de a uno (como un formulario) y por lote (validate_many),
+    con filas de fixtures.generator de las que una parte se invalida vaciando
+    un campo. No usa la base: las ciudades válidas son un conjunto de ids.
+    """
+
+    help = "Registros validados por segundo por modelo"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("--records", type=int, default=100_000, help="registros por modelo")
+        parser.add_argument("--invalid", type=float, default=0.1, help="fracción de registros inválidos")
+        parser.add_argument("--seed", type=int, default=0, help="semilla de los datos")
+
+    def handle(self, *args, **options):
+        """validates the records of every model"""
+        rows = _rows(options["records"], options["invalid"], options["seed"])
+        choices = {"city": set(range(1, len(generator.CITIES) + 1))}
+
+        self.stdout.write(f"{'modelo':<10} {'de a uno (reg/s)':>17} {'por lote (reg/s)':>17} {'inválidos':>10}")
+        for model, validator in VALIDATORS.items():
+            records = rows[model]
+
+            start = time.perf_counter()
+            for record in records:
+                validator.validate(record, choices)
+            single = time.perf_counter() - start
+
+            start = time.perf_counter()
+            errors = validator.validate_many(records, choices)
+            batch = time.perf_counter() - start
+
+            self.stdout.write(
+                f"{model:<10} {len(records) / single:>17,.0f} {len(records) / batch:>17,.0f} "
+                f"{sum(map(bool, errors)):>10}",
+            )
+
+
+def _rows(records, invalid, seed):
+    rng = random.Random(seed)
+    rows = {model: [] for model in VALIDATORS}
+    for model, fields in generator.generate(dict.fromkeys(generator.COUNTS, records), seed):
+        if model not in rows:
+            continue
+        if rng.random() < invalid:
+            fields[rng.choice(list(fields))] = ""
+        rows[model].append(fields)
+    return rows
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client as TestClient
+from django.test import override_settings
+
+from app.benchmarks import route_requests, scratch_database, send
+from app.explain import explain
+from app.management.commands.generate_fixtures import insert
+from app.models import Client, Pet, Product, Provider
+from app.queries import QueryCapture
+from fixtures import generator
+
+# Búsquedas que tienen que usar un índice (ver los Meta.indexes de app.models)
+LOOKUPS = {
+    "cliente por email": lambda: Client.objects.filter(email="juan.perez1@vetsoft.com"),
+    "cliente por teléfono": lambda: Client.objects.filter(phone=542215552323),
+    "mascotas de una raza por edad": lambda: Pet.objects.filter(breed=1).order_by("birthday"),
+    "productos de un tipo por precio": lambda: Product.objects.filter(type="Alimento").order_by("price"),
+    "proveedor por nombre": lambda: Provider.objects.filter(name="Distribuidora Perez"),
+}
+
+EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+class Command(BaseCommand):
+    """
+    Hace EXPLAIN QUERY PLAN de las consultas de cada vista (las requests de
+    bench a todas las rutas de app/urls.py, sobre una base descartable) y de
+    las búsquedas indexadas de LOOKUPS, y marca las que recorren una tabla
+    entera para filtrarla u ordenan sin índice.
+    """
+
+    help = "Marca las consultas de las vistas que recorren tablas enteras"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("--size", type=int, default=1000, help="filas de cada modelo")
+        parser.add_argument("--plans", action="store_true", help="mostrar el plan de todas las consultas")
+
+    def handle(self, *args, **options):
+        """explains the queries of every view"""
+        if connection.vendor != "sqlite":
+            raise CommandError("explain_views sólo funciona con SQLite")
+
+        flagged = 0
+        with scratch_database(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            insert(dict.fromkeys(generator.COUNTS, options["size"]), 0, 10_000)
+            client = TestClient()
+
+            for label, method, build in route_requests(options["size"]):
+                path, data = build(0)
+                # sin caché, para que la vista haga sus consultas
+                cache.clear()
+                with QueryCapture() as capture:
+                    send(client, method, path, data)
+
+                for query in capture.queries:
+                    if query.many or not query.sql.lstrip().upper().startswith(EXPLAINED):
+                        continue
+                    flagged += self._report(f"{label} ({query.origin})", query.sql, query.params, options["plans"])
+
+            for label, lookup in LOOKUPS.items():
+                sql, params = lookup().query.sql_with_params()
+                flagged += self._report(label, sql, params, options["plans"])
+
+        if flagged:
+            raise CommandError(f"{flagged} consultas recorren tablas enteras u ordenan sin índice")
+        self.stdout.write(self.style.SUCCESS("Ninguna consulta recorre una tabla entera para filtrarla"))
+
+    def _report(self, label, sql, params, verbose):
+        plan = explain(sql, params)
+        if plan.ok and not verbose:
+            return 0
+
+        style = self.style.SUCCESS if plan.ok else self.style.ERROR
+        problems = [f"SCAN {table}" for table in plan.full_scans]
+        if plan.temp_sorts:
+            problems.append("ORDER BY sin índice")
+        self.stdout.write(style(f"{label}: {', '.join(problems) or 'ok'}"))
+        self.stdout.write(f"    {sql}")
+        for step in plan.steps:
+            self.stdout.write(f"      {step}")
+        return 0 if plan.ok else 1
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from app import exports
+
+
+class Command(BaseCommand):
+    """
+    Exporta una entidad completa a CSV o JSONL, leyendo la tabla por lotes.
+    """
+
+    help = "Exporta clientes, mascotas, productos, medicamentos, veterinarias o proveedores"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("entity", choices=sorted(exports.EXPORTS))
+        parser.add_argument("--format", choices=sorted(exports.CONTENT_TYPES), default="csv")
+        parser.add_argument(
+            "--output",
+            help="archivo de salida (por defecto <entidad>.<formato>; '-' para la salida estándar)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        """writes the export"""
+        entity, fmt = options["entity"], options["format"]
+        output = options["output"] or exports.filename(entity, fmt)
+        chunks = exports.stream(entity, fmt, chunk_size=options["chunk_size"])
+
+        if output == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            return
+
+        with open(output, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Exportado en {output}"), ending="\n")
@@ -0,0 +1,85 @@
+import sys
+import time
+from itertools import groupby, islice
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app import search, versions
+from fixtures import generator
+
+
+class Command(BaseCommand):
+    """
+    Genera datos de prueba con fixtures/generator.py: los escribe como JSONL
+    (para loaddata) o, con --insert, los inserta directamente en la base con
+    bulk_create por lotes. En los dos casos las filas se generan de a una, así
+    que la memoria no crece con la cantidad.
+    """
+
+    help = "Genera datos de prueba (JSONL o directamente en la base)"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        for model, count in generator.COUNTS.items():
+            parser.add_argument(f"--{model}s", type=int, default=count, dest=model, help=f"cantidad de {model}s")
+        parser.add_argument("--seed", type=int, default=0, help="semilla (los mismos datos para la misma semilla)")
+        parser.add_argument("--output", default="fixtures/data.jsonl", help="archivo JSONL de salida ('-' para la salida estándar)")
+        parser.add_argument("--insert", action="store_true", help="insertar en la base en lugar de escribir el JSONL")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="filas por lote al insertar")
+
+    def handle(self, *args, **options):
+        """generates the data"""
+        counts = {model: options[model] for model in generator.COUNTS}
+        start = time.perf_counter()
+
+        if options["insert"]:
+            total = insert(counts, options["seed"], options["batch_size"])
+            destination = f"la base '{connection.settings_dict['NAME']}'"
+        elif options["output"] == "-":
+            total = generator.write_jsonl(sys.stdout, counts, options["seed"])
+            return
+        else:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                total = generator.write_jsonl(output, counts, options["seed"])
+            destination = options["output"]
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Se generaron {total} filas en {destination} en {elapsed:.2f}s "
+            f"({total / elapsed if elapsed else total:,.0f} filas/s)",
+        ))
+
+
+def insert(counts, seed, batch_size):
+    """
+    inserts the generated rows with bulk_create, a batch per transaction, and
+    returns how many were inserted; the tables have to be empty because the
+    foreign keys are the positions of the cities and breeds
+    """
+    models = [apps.get_model("app", name) for name in ("city", "breed", *generator.COUNTS)]
+    not_empty = [model.__name__ for model in models if model.objects.exists()]
+    if not_empty:
+        raise CommandError(f"Las tablas tienen que estar vacías: {', '.join(not_empty)}")
+
+    total = 0
+    for name, rows in groupby(generator.generate(counts, seed), key=lambda row: row[0]):
+        model = apps.get_model("app", name)
+        attnames = {}
+        pk = 0
+        while batch := list(islice(rows, batch_size)):
+            objects = []
+            for _, fields in batch:
+                pk += 1
+                objects.append(model(pk=pk, **{
+                    attnames.setdefault(field, model._meta.get_field(field).attname): value
+                    for field, value in fields.items()
+                }))
+            with search.bulk_insert(model):
+                model.objects.bulk_create(objects)
+            total += len(objects)
+
+    # bulk_create no dispara las señales de los modelos
+    versions.touch(*models)
+    return total
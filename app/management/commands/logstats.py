@@ -0,0 +1,49 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app import accesslog
+from app.benchmarks import percentile
+
+
+class Command(BaseCommand):
+    """
+    Resume el log de acceso (ver app.accesslog) por ruta y método: cantidad de
+    requests y de errores, percentiles de la duración y tiempo en la base y en
+    las plantillas, de la ruta que más tiempo suma a la que menos.
+    """
+
+    help = "Percentiles de duración por ruta del log de acceso en JSONL"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("--dir", default=settings.ACCESS_LOG_DIR, help="directorio de los logs")
+        parser.add_argument("--view", help="sólo esta vista (nombre de la ruta, como clients_repo)")
+
+    def handle(self, *args, **options):
+        """prints the stats of every route"""
+        records = accesslog.load(options["dir"]) if options["dir"] else []
+        routes = defaultdict(list)
+        for record in records:
+            if not options["view"] or record["view"] == options["view"]:
+                routes[f"{record['method']} {record['view']}"].append(record)
+        if not routes:
+            raise CommandError(f"No hay requests en el log de {options['dir'] or 'ACCESS_LOG_DIR'}")
+
+        self.stdout.write(
+            f"{'ruta':<26} {'requests':>9} {'5xx':>5} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}"
+            f" {'base p50':>9} {'consultas':>10} {'plant. p50':>11}",
+        )
+        by_total = sorted(routes.items(), key=lambda item: -sum(record["duration_ms"] for record in item[1]))
+        for route, found in by_total:
+            durations = sorted(record["duration_ms"] for record in found)
+            db = sorted(record["db_ms"] for record in found)
+            templates = sorted(record["template_ms"] for record in found)
+            errors = sum(record["status"] >= 500 for record in found)
+            queries = sum(record["queries"] for record in found) / len(found)
+            self.stdout.write(
+                f"{route:<26} {len(found):>9} {errors:>5} {percentile(durations, 50):>9.1f}"
+                f" {percentile(durations, 95):>9.1f} {percentile(durations, 99):>9.1f}"
+                f" {percentile(db, 50):>9.1f} {queries:>10.1f} {percentile(templates, 50):>11.1f}",
+            )
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app import profiling
+
+
+class Command(BaseCommand):
+    """
+    Resume los perfiles de PROFILING_DIR (ver app.profiling) por vista: el
+    tiempo en plantillas, en el ORM y la base, en validaciones y en el resto,
+    y las funciones con más tiempo acumulado.
+    """
+
+    help = "Resume por vista los perfiles de cProfile de los requests"
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("--dir", default=settings.PROFILING_DIR, help="directorio de los perfiles")
+        parser.add_argument("--view", help="sólo esta vista (nombre de la ruta, como clients_repo)")
+        parser.add_argument("--limit", type=int, default=20, help="funciones a mostrar por vista")
+        parser.add_argument(
+            "--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"],
+            help="orden de las funciones",
+        )
+
+    def handle(self, *args, **options):
+        """prints the report of every view"""
+        views = profiling.load(options["dir"])
+        if options["view"]:
+            views = {view: found for view, found in views.items() if view == options["view"]}
+        if not views:
+            raise CommandError(f"No hay perfiles en {options['dir']}")
+
+        for view, (requests, stats) in views.items():
+            total = stats.total_tt or 1
+            self.stdout.write(f"=== {view}: {requests} requests, {stats.total_tt / requests * 1000:.1f} ms por request")
+            for category, seconds in profiling.breakdown(stats).items():
+                self.stdout.write(f"    {category:<14} {seconds / requests * 1000:>9.1f} ms  {seconds / total:>6.1%}")
+
+            self.stdout.write(f"    {'llamadas':>10} {'propio (ms)':>12} {'acumulado (ms)':>15}  función")
+            for calls, own, cumulative, location in profiling.top(stats, requests, options["sort"], options["limit"]):
+                self.stdout.write(f"    {calls:>10.1f} {own:>12.2f} {cumulative:>15.2f}  {location}")
+            self.stdout.write("")
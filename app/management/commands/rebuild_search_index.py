@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app import search
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye el índice de búsqueda (FTS5) a partir de las tablas.
+    """
+
+    help = "Reconstruye el índice de búsqueda de clientes, mascotas, productos, medicamentos y proveedores"
+
+    def handle(self, *args, **options):
+        """rebuilds the index"""
+        if connection.vendor != "sqlite":
+            raise CommandError("El índice de búsqueda sólo existe en SQLite")
+
+        search.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM app_search")
+            (count,) = cursor.fetchone()
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda reconstruido: {count} filas"))
@@ -0,0 +1,84 @@
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app import server
+
+
+class Command(BaseCommand):
+    """
+    Sirve la app en producción con varios procesos (ver app.server): carga la
+    app de vetsoft/wsgi.py una vez y hace fork de --workers procesos que
+    atienden en threads y mantienen las conexiones abiertas (keep-alive).
+    SIGHUP recarga el código sin cortar requests y SIGTERM termina.
+    """
+
+    help = "Servidor HTTP de producción con varios workers"
+
+    # los checks importan la app: se corren después de definir el directorio
+    # de las métricas (como runserver, en handle)
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        """arguments of the command"""
+        parser.add_argument("addrport", nargs="?", default="127.0.0.1:8000", help="dirección y puerto, o sólo el puerto")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos que atienden requests")
+        parser.add_argument("--keepalive", type=float, default=5, help="segundos que queda abierta una conexión sin requests")
+        parser.add_argument(
+            "--max-requests", type=int, default=0,
+            help="requests después de los que se reemplaza un worker (0: nunca)",
+        )
+        parser.add_argument(
+            "--max-requests-jitter", type=int, default=0,
+            help="hasta cuántos requests más al azar, para que no se reemplacen todos juntos",
+        )
+        parser.add_argument(
+            "--graceful-timeout", type=float, default=30,
+            help="segundos que se espera a un worker al terminar antes de matarlo",
+        )
+        parser.add_argument("--backlog", type=int, default=1024, help="conexiones en espera del socket")
+
+    def handle(self, *args, **options):
+        """runs the master process until SIGTERM or SIGINT"""
+        host, _, port = options["addrport"].rpartition(":")
+        if not port.isdigit():
+            raise CommandError(f"Puerto inválido: {options['addrport']}")
+        if options["workers"] < 1:
+            raise CommandError("Tiene que haber al menos un worker")
+        local = [alias for alias, cache in settings.CACHES.items() if cache["BACKEND"].endswith(".LocMemCache")]
+        if options["workers"] > 1 and local:
+            # cada worker tendría su propia caché: los listados y las
+            # ciudades y razas cacheadas no se enterarían de los cambios
+            # hechos en los demás
+            raise CommandError(
+                f"La caché {', '.join(local)} es LocMemCache, una por proceso: con varios workers "
+                "usar una compartida (CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache "
+                "y CACHE_LOCATION con un directorio) o --workers 1",
+            )
+
+        if settings.METRICS or "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            # las métricas de los workers se suman en /metrics desde este
+            # directorio, que se vacía al arrancar (no al recargar). Con la
+            # variable definida prometheus_client escribe ahí aunque no se
+            # expongan, así que el directorio tiene que existir
+            directory = os.environ.setdefault(
+                "PROMETHEUS_MULTIPROC_DIR", str(Path(tempfile.gettempdir()) / f"vetsoft-metrics-{port}"),
+            )
+            if server.LISTEN_FD not in os.environ:
+                server.clear_directory(directory)
+        self.check(display_num_errors=True)
+
+        master = server.Master(
+            (host.strip("[]") or "127.0.0.1", int(port)),
+            options["workers"],
+            keepalive=options["keepalive"],
+            max_requests=options["max_requests"],
+            max_requests_jitter=options["max_requests_jitter"],
+            graceful_timeout=options["graceful_timeout"],
+            backlog=options["backlog"],
+            log=lambda message: (self.stdout.write(message), self.stdout.flush()),
+        )
+        master.run()
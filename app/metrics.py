@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+from contextvars import ContextVar
+
+from django.db import connections
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .queries import model_method
+
+# Métricas de los requests en el formato de Prometheus, que junta
+# app.middleware.MetricsMiddleware y se leen en /metrics.
+#
+# Con varios procesos (workers) cada uno guarda sus valores en archivos del
+# directorio de la variable de entorno PROMETHEUS_MULTIPROC_DIR (la de
+# prometheus_client), y /metrics suma los de todos. La variable se tiene que
+# definir antes de arrancar los procesos y el directorio vaciarse en cada
+# arranque.
+
+LABELS = ("view", "method")
+
+# Límites de los histogramas
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNTS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUESTS = Counter(
+    "vetsoft_requests", "Requests por vista, método y código de respuesta", [*LABELS, "status"],
+)
+LATENCY = Histogram(
+    "vetsoft_request_duration_seconds", "Duración de los requests", LABELS, buckets=SECONDS,
+)
+QUERIES = Histogram(
+    "vetsoft_db_queries", "Consultas SQL por request", LABELS, buckets=QUERY_COUNTS,
+)
+DB_TIME = Histogram(
+    "vetsoft_db_duration_seconds", "Tiempo de las consultas SQL de cada request", LABELS, buckets=SECONDS,
+)
+TEMPLATE_TIME = Histogram(
+    "vetsoft_template_render_seconds",
+    "Tiempo de render de plantillas de cada request (con las consultas que hacen)",
+    LABELS,
+    buckets=SECONDS,
+)
+RESPONSE_SIZE = Histogram(
+    "vetsoft_response_bytes",
+    "Bytes del cuerpo de las respuestas, comprimido si corresponde (sin las streaming)",
+    LABELS,
+    buckets=BYTES,
+)
+ACCESS_LOG_DROPPED = Counter(
+    "vetsoft_access_log_dropped", "Registros del log de acceso descartados porque su cola estaba llena",
+)
+
+# métricas del request en curso (None fuera de MetricsMiddleware)
+_current = ContextVar("metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Consultas SQL y tiempo de plantillas de un request, mientras el contexto
+    está activo. Con ``model_methods`` registra además los métodos de los
+    modelos (como ``Client.save_client``) que hicieron consultas.
+    """
+
+    __slots__ = (
+        "queries", "db_seconds", "template_seconds", "model_methods", "rendering", "_wrapper", "_token",
+    )
+
+    def __init__(self, model_methods=False):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.model_methods = [] if model_methods else None
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """runs the query (as a connection execute wrapper) timing it"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+            if self.model_methods is not None:
+                method = model_method(sys._getframe(1))
+                if method is not None and method not in self.model_methods:
+                    self.model_methods.append(method)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self._wrapper = connections["default"].execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+        _current.reset(self._token)
+
+    def observe(self, view, request, response, seconds):
+        """records the metrics of the request to the view, which took ``seconds``"""
+        labels = (view, request.method)
+        REQUESTS.labels(*labels, str(response.status_code)).inc()
+        LATENCY.labels(*labels).observe(seconds)
+        QUERIES.labels(*labels).observe(self.queries)
+        DB_TIME.labels(*labels).observe(self.db_seconds)
+        TEMPLATE_TIME.labels(*labels).observe(self.template_seconds)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(*labels).observe(len(response.content))
+
+
+def view_name(request):
+    """returns the name of the route of the request, or "sin_vista" if none matched"""
+    match = request.resolver_match
+    return match.view_name if match is not None else "sin_vista"
+
+
+def timed_render(render, *args):
+    """
+    runs ``render`` adding its time to the templates of the current request;
+    a template rendered inside another one (the page shell) counts once
+    """
+    current = _current.get()
+    if current is None or current.rendering:
+        return render(*args)
+
+    current.rendering = True
+    start = time.perf_counter()
+    try:
+        return render(*args)
+    finally:
+        current.rendering = False
+        current.template_seconds += time.perf_counter() - start
+
+
+def exposition():
+    """returns the metrics of every process in the Prometheus text format, and its content type"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
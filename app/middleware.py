@@ -0,0 +1,181 @@
+import cProfile
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from . import accesslog, compression, metrics, profiling, static
+from .queries import QueryBudgetExceeded, QueryCapture, QueryReport
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """
+    Cuenta las consultas SQL de cada request y avisa (QUERY_BUDGET="warn") o
+    falla (QUERY_BUDGET="raise") cuando la vista supera su presupuesto en
+    app.urls.query_budgets o repite consultas con la misma forma (N+1).
+    """
+
+    def __init__(self, get_response):
+        self.mode = settings.QUERY_BUDGET
+        if self.mode not in ("warn", "raise"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """runs the request counting its queries"""
+        with QueryCapture() as capture:
+            response = self.get_response(request)
+
+        if request.resolver_match is not None:
+            report = QueryReport.for_request(
+                request.method, request.resolver_match, capture.queries,
+            )
+            if not report.ok:
+                if self.mode == "raise":
+                    raise QueryBudgetExceeded(str(report))
+                logger.warning("%s", report)
+        return response
+
+
+class StaticFilesMiddleware:
+    """
+    Sirve los archivos estáticos de STATIC_ROOT (los que copia collectstatic)
+    sin un servidor web aparte, antes de pasar por el resto de los
+    middlewares: la versión brotli o gzip si el navegador la acepta y, para
+    los nombres con hash, con caché de un año en el navegador.
+
+    Los archivos se listan al arrancar el proceso: después de un
+    collectstatic hay que reiniciarlo.
+    """
+
+    def __init__(self, get_response):
+        self.prefix = settings.STATIC_URL
+        self.files = static.collected_files()
+        if not self.files or not self.prefix.startswith("/"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """serves the static file of the request, if it is one"""
+        if request.method in ("GET", "HEAD") and request.path_info.startswith(self.prefix):
+            file = self.files.get(request.path_info[len(self.prefix):])
+            if file is not None:
+                return static.serve(request, file)
+        return self.get_response(request)
+
+
+class MetricsMiddleware:
+    """
+    Registra de cada request, por vista y método, la duración, las consultas
+    SQL y su tiempo, el tiempo de las plantillas y el tamaño de la respuesta,
+    que se leen en /metrics (app.metrics, con METRICS=True), y lo escribe en el
+    log de acceso (app.accesslog, con ACCESS_LOG_DIR). Va antes de
+    CompressionMiddleware para medir los bytes que se mandan.
+    """
+
+    def __init__(self, get_response):
+        self.metrics = settings.METRICS
+        self.access_log = bool(settings.ACCESS_LOG_DIR)
+        if not self.metrics and not self.access_log:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """runs the request recording its metrics"""
+        start = time.perf_counter()
+        with metrics.RequestMetrics(model_methods=self.access_log) as current:
+            response = self.get_response(request)
+        seconds = time.perf_counter() - start
+
+        view = metrics.view_name(request)
+        if self.metrics:
+            current.observe(view, request, response, seconds)
+        if self.access_log:
+            if not accesslog.write(accesslog.record(view, request, response, seconds, current)):
+                metrics.ACCESS_LOG_DROPPED.inc()
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Comprime las respuestas de texto (HTML, JSON, CSV) con brotli o gzip,
+    según lo que acepte el navegador, a partir de COMPRESSION_MIN_SIZE bytes.
+    Las respuestas streaming (las exportaciones) se comprimen a medida que se
+    generan.
+
+    Las respuestas que llevan el token CSRF (las que lo pidieron con
+    get_token) se comprimen sólo con gzip y con relleno al azar, como
+    GZipMiddleware de Django, para que su largo no revele el token (BREACH).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+
+    def __call__(self, request):
+        """compresses the response of the request if the browser accepts it"""
+        response = self.get_response(request)
+        if response.has_header("Content-Encoding") or not response.get("Content-Type", "").startswith(
+            compression.COMPRESSIBLE_TYPES,
+        ):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encodings = compression.accepted(request.headers.get("Accept-Encoding", ""))
+        padding = 0
+        if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+            # brotli no tiene dónde poner el relleno
+            encodings = [encoding for encoding in encodings if encoding == "gzip"]
+            padding = compression.BREACH_PADDING
+        if not encodings:
+            return response
+        encoding = encodings[0]
+
+        if response.streaming:
+            stream = compression.acompress_stream if response.is_async else compression.compress_stream
+            response.streaming_content = stream(response.streaming_content, encoding, padding=padding)
+            response.headers.pop("Content-Length", None)
+        else:
+            compressed = compression.compress(response.content, encoding, compression.FAST, padding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # el contenido comprimido no es byte a byte el de la ETag
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Perfila con cProfile los requests que lo piden (header X-Profile con el
+    valor de PROFILING_TOKEN) o que caen en la muestra (PROFILING_SAMPLE_PERCENT)
+    y guarda cada perfil en PROFILING_DIR; "python manage.py profile_report"
+    los resume por vista. Va último en MIDDLEWARE para perfilar sólo la vista.
+    """
+
+    def __init__(self, get_response):
+        if not profiling.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """runs the request under cProfile if it has to be profiled"""
+        if not profiling.wanted(request):
+            return self.get_response(request)
+
+        profile = cProfile.Profile()
+        response = profile.runcall(self.get_response, request)
+        path = profiling.save(profile, profiling.view_name(request))
+        response.headers["X-Profile-File"] = path.name
+        return response
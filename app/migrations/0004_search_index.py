@@ -0,0 +1,71 @@
+from django.db import migrations
+
+# (tipo, código, tabla, columna "name", columna "detail")
+# El rowid de cada fila del índice es id * 8 + código, así las altas, bajas y
+# modificaciones tocan una sola fila del índice por rowid.
+SOURCES = [
+    ("client", 1, "app_client", "name", "email"),
+    ("pet", 2, "app_pet", "name", "''"),
+    ("product", 3, "app_product", "name", "type"),
+    ("medicine", 4, "app_medicine", "name", "description"),
+    ("provider", 5, "app_provider", "name", "address"),
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE app_search USING fts5("
+        "kind UNINDEXED, name, detail, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    )
+
+    for kind, code, table, name, detail in SOURCES:
+        new_name = "new." + name
+        new_detail = detail if detail.startswith("'") else "new." + detail
+        insert = (
+            f"INSERT INTO app_search(rowid, kind, name, detail) "
+            f"VALUES (new.id * 8 + {code}, '{kind}', {new_name}, {new_detail});"
+        )
+        delete = f"DELETE FROM app_search WHERE rowid = old.id * 8 + {code};"
+        columns = name if detail.startswith("'") else f"{name}, {detail}"
+
+        schema_editor.execute(
+            f"CREATE TRIGGER app_search_{kind}_insert AFTER INSERT ON {table} "
+            f"BEGIN {insert} END",
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER app_search_{kind}_update AFTER UPDATE OF {columns} ON {table} "
+            f"BEGIN {delete} {insert} END",
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER app_search_{kind}_delete AFTER DELETE ON {table} "
+            f"BEGIN {delete} END",
+        )
+        schema_editor.execute(
+            f"INSERT INTO app_search(rowid, kind, name, detail) "
+            f"SELECT id * 8 + {code}, '{kind}', {name}, {detail} FROM {table}",
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    for kind, *_ in SOURCES:
+        for action in ("insert", "update", "delete"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS app_search_{kind}_{action}")
+    schema_editor.execute("DROP TABLE IF EXISTS app_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_merge_20240607_0453'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
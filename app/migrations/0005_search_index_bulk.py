@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# (tipo, código, tabla, columna "name", columna "detail"), igual que en 0004
+SOURCES = [
+    ("client", 1, "app_client", "name", "email"),
+    ("pet", 2, "app_pet", "name", "''"),
+    ("product", 3, "app_product", "name", "type"),
+    ("medicine", 4, "app_medicine", "name", "description"),
+    ("provider", 5, "app_provider", "name", "address"),
+]
+
+
+def _insert(kind, code, name, detail):
+    new_detail = detail if detail.startswith("'") else "new." + detail
+    return (
+        f"INSERT INTO app_search(rowid, kind, name, detail) "
+        f"VALUES (new.id * 8 + {code}, '{kind}', new.{name}, {new_detail});"
+    )
+
+
+def pausable_insert_triggers(apps, schema_editor):
+    # Mientras haya una fila en app_search_paused (sólo visible dentro de la
+    # transacción que la inserta) los triggers de alta no indexan fila por
+    # fila: la carga masiva indexa todo junto al final (ver app.search).
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute("CREATE TABLE app_search_paused (id INTEGER PRIMARY KEY)")
+    for kind, code, table, name, detail in SOURCES:
+        schema_editor.execute(f"DROP TRIGGER app_search_{kind}_insert")
+        schema_editor.execute(
+            f"CREATE TRIGGER app_search_{kind}_insert AFTER INSERT ON {table} "
+            f"WHEN NOT EXISTS (SELECT 1 FROM app_search_paused) "
+            f"BEGIN {_insert(kind, code, name, detail)} END",
+        )
+
+
+def plain_insert_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    for kind, code, table, name, detail in SOURCES:
+        schema_editor.execute(f"DROP TRIGGER app_search_{kind}_insert")
+        schema_editor.execute(
+            f"CREATE TRIGGER app_search_{kind}_insert AFTER INSERT ON {table} "
+            f"BEGIN {_insert(kind, code, name, detail)} END",
+        )
+    schema_editor.execute("DROP TABLE app_search_paused")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(pausable_insert_triggers, plain_insert_triggers),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+# Tablas cuyos cambios se registran (app.signals.TRACKED_MODELS)
+TABLES = ["breed", "city", "client", "medicine", "pet", "product", "provider", "vet"]
+
+
+def create_versions(apps, schema_editor):
+    TableVersion = apps.get_model("app", "TableVersion")
+    now = timezone.now()
+    TableVersion.objects.bulk_create(
+        TableVersion(table=f"app.{table}", updated_at=now) for table in TABLES
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_search_index_bulk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=100, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Los triggers de app_pet como los dejó 0005_search_index_bulk.
+PET_INSERT = (
+    "INSERT INTO app_search(rowid, kind, name, detail) "
+    "VALUES (new.id * 8 + 2, 'pet', new.name, '');"
+)
+PET_DELETE = "DELETE FROM app_search WHERE rowid = old.id * 8 + 2;"
+PET_TRIGGERS = [
+    "CREATE TRIGGER app_search_pet_insert AFTER INSERT ON app_pet "
+    f"WHEN NOT EXISTS (SELECT 1 FROM app_search_paused) BEGIN {PET_INSERT} END",
+    f"CREATE TRIGGER app_search_pet_update AFTER UPDATE OF name ON app_pet BEGIN {PET_DELETE} {PET_INSERT} END",
+    f"CREATE TRIGGER app_search_pet_delete AFTER DELETE ON app_pet BEGIN {PET_DELETE} END",
+]
+
+
+def recreate_pet_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    for action in ("insert", "update", "delete"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS app_search_pet_{action}")
+    for trigger in PET_TRIGGERS:
+        schema_editor.execute(trigger)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_table_version'),
+    ]
+
+    operations = [
+        # El índice (breed, birthday) reemplaza al de la clave foránea. En
+        # SQLite el AlterField vuelve a crear la tabla app_pet, y con ella se
+        # pierden los triggers de la búsqueda: se crean de nuevo después, al
+        # aplicar y al revertir.
+        migrations.RunPython(migrations.RunPython.noop, recreate_pet_triggers),
+        migrations.AlterField(
+            model_name='pet',
+            name='breed',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='app.breed'),
+        ),
+        migrations.RunPython(recreate_pet_triggers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['email'], name='app_client_email_aa6bce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['phone'], name='app_client_phone_8771f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['breed', 'birthday'], name='app_pet_breed_i_9d50c7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['type', 'price'], name='app_product_type_964c6a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='provider',
+            index=models.Index(fields=['name'], name='app_provide_name_e75f04_idx'),
+        ),
+    ]
@@ -1,7 +1,8 @@
-import re
-from datetime import date, datetime
-
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Round
+
+from . import validation
 
 
 ############################################## CITY ################################################
@@ -10,6 +11,12 @@ class City(models.Model):
     Representa la lista de ciudades
     """
     name = models.CharField(max_length=10, unique=True)
+
+
+def _names(model):
+    # import local: app.reference usa app.versions, que importa este módulo
+    from . import reference
+    return reference.names(model)
 ####################################################################################################
 
 ############################################## CLIENT ##############################################
@@ -22,42 +29,23 @@ class Client(models.Model):
     email = models.EmailField()
     city = models.ForeignKey(City, on_delete=models.CASCADE, default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["email"]),
+            models.Index(fields=["phone"]),
+        ]
+
     @classmethod
-    def validate_client(cls, data):
-        """validate a client by the data passed"""
-        errors = {}
-
-        name = data.get("name", "")
-        phone = data.get("phone", "")
-        email = data.get("email", "")
-        city = data.get("city", "")
-
-        if not name:
-            errors["name"] = "Por favor ingrese un nombre"
-        elif re.fullmatch(r'^[A-Za-zÁÉÍÓÚáéíóúÜü_ ]*$', name) is None:
-            errors["name"] = "Por favor ingrese solo caracteres permitidos"
-
-        if not phone:
-            errors["phone"] = "Por favor ingrese un teléfono"
-        elif not re.match(r'^54\d+$', str(phone)):
-            errors["phone"] = "El teléfono debe comenzar con '54' y ser un número"
-
-        if email == "":
-            errors["email"] = "Por favor ingrese un email"
-        elif email.count("@") == 0:
-            errors["email"] = "Por favor ingrese un email valido"
-        elif not email.endswith("@vetsoft.com"):
-            errors["email"] = 'El email debe finalizar con "@vetsoft.com"'
-
-        if city == "":
-            errors["city"] = "Por favor seleccione una ciudad"
-
-        if not city:
-            errors["city"] = "Por favor seleccione una ciudad"
-        elif not City.objects.filter(id=city).exists():
-            errors["city"] = "Esa ciudad no existe"
-
-        return errors
+    def validate_client(cls, data, city_ids=None):
+        """
+        validate a client by the data passed.
+
+        city_ids is an optional set with the ids of the existing cities, to
+        validate many clients without querying the cities for each one.
+        """
+        if city_ids is None:
+            city_ids = _names(City)
+        return validation.CLIENT.validate(data, {"city": city_ids})
 
     @classmethod
     def save_client(cls, client_data):
@@ -71,7 +59,7 @@ class Client(models.Model):
             name=client_data.get("name"),
             phone=int(client_data.get("phone")),
             email=client_data.get("email"),
-            city=City.objects.get(pk=client_data.get("city")),
+            city_id=int(client_data.get("city")),
         )
 
         return True, None
@@ -81,15 +69,17 @@ class Client(models.Model):
         self.name = client_data.get("name", "") or self.name
         self.email = client_data.get("email", "") or self.email
         self.phone = client_data.get("phone", "") or self.phone
-        if City.objects.filter(id=client_data.get("city")).exists():
-            self.city = City.objects.get(pk=client_data.get("city"))
+        city = client_data.get("city")
+        city_ids = _names(City)
+        if str(city).isdigit() and int(city) in city_ids:
+            self.city_id = int(city)
 
         errors = self.validate_client({
             "name": self.name,
             "phone": self.phone,
             "email": self.email,
-            "city": self.city.id,
-        })
+            "city": self.city_id,
+        }, city_ids=city_ids)
 
         if len(errors.keys()) > 0:
             return False, errors
@@ -111,6 +101,9 @@ class Product(models.Model):
     type = models.CharField(max_length=25)
     price = models.FloatField()
 
+    class Meta:
+        indexes = [models.Index(fields=["type", "price"])]
+
     @classmethod
     def save_product(cls, product_data: dict) -> tuple[bool, dict | None]:
         """Saves a product"""
@@ -129,21 +122,22 @@ class Product(models.Model):
     @classmethod
     def validate_product(cls, data: dict) -> dict | None:
         """Return the dict of text for the fields with errors (if exists any) None otherwise"""
-        errors = {
-            "name": "Por favor ingrese un nombre",
-            "type": "Por favor ingrese un tipo",
-            "price": "Por favor ingrese un precio",
-        }
-        for key in list(errors.keys()):
-            # restrict values not null
-            if data.get(key):
-                errors.pop(key)
-
-                # retrict price not negative
-                if (key == 'price' and (float(data.get(key)) <= 0) ):
-                    errors[key] = "Los precios deben ser mayores que 0"
-
-        return errors or None
+        return validation.PRODUCT.validate(data) or None
+
+    @classmethod
+    def update_prices(cls, change_data: dict) -> tuple[bool, dict | None]:
+        """
+        changes by a percentage the price of every product of a type, with a
+        single UPDATE (it sends no signals: the caller touches the versions)
+        """
+        errors = validation.PRICE_CHANGE.validate(change_data)
+
+        if errors:
+            return False, errors
+
+        factor = 1 + float(change_data["percent"]) / 100
+        Product.objects.filter(type=change_data["type"]).update(price=Round(F("price") * factor, 2))
+        return True, None
 
     def update_product(self, product_data: dict)  -> tuple[bool, dict | None]:
         """update a product if data passed is correct"""
@@ -187,26 +181,7 @@ class Medicine(models.Model):
     @classmethod
     def validate_medicine(cls, data: dict) -> dict | None:
         """Validate that the passed data is correct"""
-
-        errors = {
-            "name": "Por favor ingrese un nombre",
-            "description": "Por favor ingrese una descripción",
-            "dose": "Por favor ingrese una dosis",
-        }
-        for key in list(errors.keys()):
-            # restrict values not null
-            if data.get(key):
-                errors.pop(key)
-
-                # restrict (1 < dosis < 10)
-                if (key == 'dose' and not (1 <= float(data.get(key)) <= 10) ):
-                    errors[key] = "Las dosis deben estar entre 1 y 10"
-                    
-                # restrict name no puede contener ni "ñ" ni "espacios"
-                if (key == 'name' and not (re.fullmatch(r'^[^\sñ]+$', data.get(key)))):
-                    errors[key] = "Los nombres de medicamento no pueden contener ni ñ ni espacios"
-                    
-        return errors or None
+        return validation.MEDICINE.validate(data) or None
 
     def update_medicine(self, medicine_data: dict) -> tuple[bool, dict | None]:
         """update a product if data passed is correct"""
@@ -236,24 +211,7 @@ class Vet(models.Model):
     @classmethod
     def validate_vet(cls, data):
         """Validate that the passed data is correct for a vet"""
-        errors = {}
-
-        name = data.get("name", "")
-        phone = data.get("phone", "")
-        email = data.get("email", "")
-
-        if name == "":
-            errors["name"] = "Por favor ingrese un nombre"
-
-        if phone == "":
-            errors["phone"] = "Por favor ingrese un teléfono"
-
-        if email == "":
-            errors["email"] = "Por favor ingrese un email"
-        elif email.count("@") == 0:
-            errors["email"] = "Por favor ingrese un email valido"
-
-        return errors
+        return validation.VET.validate(data)
 
     @classmethod
     def save_vet(cls, vet_data):
@@ -293,35 +251,13 @@ class Provider(models.Model):
     address = models.CharField(max_length=100, blank=True)
     floor_apartament = models.CharField(max_length=100, blank=True) #1. Agregar un atributo para la dirección en la clase Provider. agrego localidad.
 
+    class Meta:
+        indexes = [models.Index(fields=["name"])]
+
     @classmethod
     def validate_provider(cls, data):
         """Validate that the passed data is correct for a provider"""
-        errors = {}
-
-        name = data.get("name", "")
-        phone = data.get("phone", "")
-        email = data.get("email", "")
-        address = data.get("address", "")
-        floor_apartament = data.get("floor_apartament", "")
-
-        if name == "":
-            errors["name"] = "Por favor ingrese un nombre"
-
-        if phone == "":
-            errors["phone"] = "Por favor ingrese un teléfono"
-
-        if email == "":
-            errors["email"] = "Por favor ingrese un email"
-        elif email.count("@") == 0:
-            errors["email"] = "Por favor ingrese un email valido"
-
-        if address == "":
-            errors["address"] = "Por favor ingrese una dirección"
-
-        if floor_apartament == "":
-            errors["floor_apartament"] = "Por favor ingrese si es una casa o el numero de piso del departamento"
-
-        return errors
+        return validation.PROVIDER.validate(data)
 
     @classmethod
     def save_provider(cls, provider_data):
@@ -372,47 +308,18 @@ class Pet(models.Model):
     """
 
     name = models.CharField(max_length=100)
-    breed = models.ForeignKey(Breed, on_delete=models.CASCADE)
+    # sin índice propio: lo cubre el índice (breed, birthday)
+    breed = models.ForeignKey(Breed, on_delete=models.CASCADE, db_index=False)
     weight = models.FloatField(default=0.0)
     birthday = models.DateField()
 
+    class Meta:
+        indexes = [models.Index(fields=["breed", "birthday"])]
+
     @classmethod
     def validate_pet(cls, data):
         """Validate that the passed data is correct for a pet"""
-        errors = {}
-
-        name = data.get("name", "")
-        breed = data.get("breed", "")
-        birthday = data.get("birthday", "")
-        weight = data.get("weight", "")
-
-        # Validar que la fecha de nacimiento sea menor a la fecha actual
-        if birthday == "":
-                errors["birthday"] = "Por favor ingrese una fecha"
-        else:
-            try:
-                birthday_date = datetime.strptime(birthday, "%Y-%m-%d").date()
-                if birthday_date >= date.today():
-                    errors['birthday'] = 'La fecha de nacimiento debe ser anterior a la fecha actual.'
-            except (ValueError, TypeError):
-                errors['birthday'] = 'La fecha de nacimiento no es válida.'
-
-        if name == "":
-            errors["name"] = "Por favor ingrese un nombre"
-
-        if breed == "":
-            errors["breed"] = "Por favor ingrese una raza"
-
-        if weight == "":
-            errors["weight"] = "Por favor ingrese un peso"
-        else:
-            try:
-                weight = float(weight)
-                if weight <= 0:
-                    errors["weight"] = "El peso debe ser mayor que 0"
-            except ValueError:
-                errors["weight"] = "El peso debe ser un número válido"
-        return errors
+        return validation.PET.validate(data, {"breed": _names(Breed)})
 
     @classmethod
     def save_pet(cls, pet_data):
@@ -425,7 +332,7 @@ class Pet(models.Model):
         try:
             Pet.objects.create(
                 name=pet_data.get("name"),
-                breed=Breed.objects.get(pk=pet_data.get("breed")),
+                breed_id=int(pet_data.get("breed")),
                 birthday=pet_data.get("birthday"),
                 weight=pet_data.get("weight"),
             )
@@ -442,7 +349,7 @@ class Pet(models.Model):
             return False, errors
 
         self.name = pet_data.get("name", "") or self.name
-        self.breed = Breed.objects.get(pk=pet_data.get("breed")) or self.breed
+        self.breed_id = int(pet_data.get("breed"))
         self.birthday = pet_data.get("birthday", "") or self.birthday
         self.weight = pet_data.get("weight", "") or self.weight
 
@@ -450,3 +357,16 @@ class Pet(models.Model):
         return True, None
 
 ####################################################################################################
+
+########################################### TABLE_VERSION ##########################################
+class TableVersion(models.Model):
+    """
+    Versión de una tabla: aumenta con cada alta, baja o modificación de sus
+    filas (ver app.versions.touch). Sirve para responder 304 a las páginas que
+    el navegador ya tiene.
+    """
+    table = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+####################################################################################################
@@ -0,0 +1,91 @@
+from django.conf import settings
+
+
+class KeysetPage:
+    """
+    Representa una página de un listado paginado por cursor (keyset).
+
+    Los cursores son ids: la página siguiente son las filas con id mayor a
+    ``next_cursor`` y la anterior las filas con id menor a ``prev_cursor``.
+    """
+
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        """returns True if there is a page after this one"""
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        """returns True if there is a page before this one"""
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def parse_cursor(value):
+    """returns the cursor as a non negative int, None if it is missing or invalid"""
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor >= 0 else None
+
+
+def keyset_page(queryset, after=None, before=None, size=None, row=None):
+    """
+    gets one page of the queryset ordered by id.
+
+    Uses ``WHERE id > after LIMIT size`` (or ``id < before`` going backwards)
+    so every page costs the same primary key range scan, no matter how deep.
+    ``row`` builds each object of the page from the fetched values (useful for
+    ``values_list`` querysets); the objects must expose an ``id`` attribute.
+    """
+    size = size or settings.REPOSITORY_PAGE_SIZE
+    after = parse_cursor(after)
+    before = parse_cursor(before)
+
+    if before is not None and after is None:
+        rows = _fetch(queryset.filter(id__lt=before).order_by("-id")[:size + 1], row)
+        if not rows:
+            # no hay nada antes del cursor: volvemos a la primera página
+            return keyset_page(queryset, size=size, row=row)
+
+        has_prev = len(rows) > size
+        rows = rows[:size][::-1]
+        return KeysetPage(
+            rows,
+            next_cursor=rows[-1].id,
+            prev_cursor=rows[0].id if has_prev else None,
+        )
+
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    rows = _fetch(queryset.order_by("id")[:size + 1], row)
+
+    has_next = len(rows) > size
+    rows = rows[:size]
+
+    prev_cursor = None
+    if after is not None:
+        prev_cursor = rows[0].id if rows else after + 1
+
+    return KeysetPage(
+        rows,
+        next_cursor=rows[-1].id if has_next else None,
+        prev_cursor=prev_cursor,
+    )
+
+
+def _fetch(queryset, row):
+    if row is None:
+        return list(queryset)
+    return list(map(row, queryset))
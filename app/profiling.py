@@ -0,0 +1,145 @@
+import pstats
+import random
+import re
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+
+# Perfiles con cProfile de requests de producción (ver
+# app.middleware.ProfilingMiddleware): cada request perfilado se guarda como
+# <vista>.<timestamp>.pstats en PROFILING_DIR, que guarda los últimos
+# PROFILING_MAX_FILES, y "python manage.py profile_report" los junta por vista.
+
+# Header con el que se pide perfilar un request (con el valor de PROFILING_TOKEN)
+HEADER = "X-Profile"
+
+# Partes del tiempo de un request que se separan en el reporte, según el
+# archivo (o la función de C) de las funciones
+CATEGORIES = {
+    "plantillas": ("/django/template/", "/django/templatetags/", "/jinja2/"),
+    "ORM y base": ("/django/db/", "sqlite3"),
+    "validaciones": ("/app/validation.py",),
+}
+
+_VIEW_NAME = re.compile(r"[^\w-]")
+
+
+def enabled():
+    """whether requests can be profiled, by header or by sampling"""
+    return bool(settings.PROFILING_TOKEN) or settings.PROFILING_SAMPLE_PERCENT > 0
+
+
+def wanted(request):
+    """whether to profile the request: it asks for it with the token, or it falls in the sample"""
+    token = settings.PROFILING_TOKEN
+    if token and constant_time_compare(request.headers.get(HEADER, ""), token):
+        return True
+    return random.random() * 100 < settings.PROFILING_SAMPLE_PERCENT
+
+
+def view_name(request):
+    """returns the name of the view that handled the request (its url name)"""
+    match = request.resolver_match
+    if match is None or not match.view_name:
+        return "sin_vista"
+    return _VIEW_NAME.sub("_", match.view_name)
+
+
+def save(profile, view):
+    """
+    writes the profile of a request of the view to PROFILING_DIR, deleting the
+    oldest files beyond PROFILING_MAX_FILES, and returns its path
+    """
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{view}.{time.time_ns()}.pstats"
+    profile.dump_stats(path)
+
+    files = sorted(directory.glob("*.pstats"), key=lambda file: (file.stat().st_mtime_ns, file.name.split(".")[1]))
+    for old in files[:-settings.PROFILING_MAX_FILES]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def load(directory):
+    """returns the profiles of the directory merged by view, as {view: (requests, Stats)}"""
+    files = defaultdict(list)
+    for path in sorted(Path(directory).glob("*.pstats")):
+        files[path.name.split(".", 1)[0]].append(str(path))
+    return {view: (len(paths), pstats.Stats(*paths)) for view, paths in sorted(files.items())}
+
+
+def breakdown(stats):
+    """
+    returns the time (seconds) of the profile in templates, ORM and database,
+    validations and the rest ("otros"), adding up to the total.
+
+    Every function counts in its own category; the own time of the rest
+    (Django or Python helpers) is split between the categories of its callers
+    in proportion to the time of each call, like gprof.
+    """
+    shares = {}
+    totals = dict.fromkeys([*CATEGORIES, "otros"], 0.0)
+    for function, (_, _, own, _, _) in stats.stats.items():
+        for category, share in _shares(stats, function, shares).items():
+            totals[category] += own * share
+    return totals
+
+
+def _shares(stats, function, shares):
+    # fracción del tiempo de la función que corresponde a cada categoría
+    if function in shares:
+        return shares[function]
+    category = _category(function)
+    if category is not None:
+        shares[function] = {category: 1.0}
+        return shares[function]
+
+    # mientras se calcula, una llamada recursiva no suma nada (y el resto de
+    # las llamadas se reparte el tiempo)
+    shares[function] = {}
+    callers = stats.stats[function][4]
+    total = sum(cumulative for _, _, _, cumulative in callers.values())
+    mix = {}
+    for caller, (calls, _, _, cumulative) in callers.items():
+        weight = cumulative / total if total else calls / sum(edge[0] for edge in callers.values())
+        for name, share in _shares(stats, caller, shares).items():
+            mix[name] = mix.get(name, 0.0) + weight * share
+    resolved = sum(mix.values())
+    shares[function] = {name: share / resolved for name, share in mix.items()} if resolved else {"otros": 1.0}
+    return shares[function]
+
+
+def _category(function):
+    filename, _, name = function
+    location = f"{filename}:{name}"
+    return next(
+        (category for category, markers in CATEGORIES.items() if any(marker in location for marker in markers)),
+        None,
+    )
+
+
+def top(stats, requests, sort="cumulative", limit=20):
+    """
+    returns the first ``limit`` functions of the profile by ``sort`` as
+    (calls, own ms, cumulative ms, location), per request
+    """
+    stats.sort_stats(sort)
+    rows = []
+    for function in stats.fcn_list[:limit]:
+        _, calls, own, cumulative, _ = stats.stats[function]
+        rows.append((calls / requests, own / requests * 1000, cumulative / requests * 1000, _location(function)))
+    return rows
+
+
+def _location(function):
+    filename, line, name = function
+    if filename == "~":
+        return name
+    # ruta desde site-packages o desde la raíz del proyecto
+    for root in ("site-packages/", f"{settings.BASE_DIR}/"):
+        filename = filename.split(root, 1)[-1]
+    return f"{filename}:{line}({name})"
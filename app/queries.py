@@ -0,0 +1,214 @@
+import re
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import base as template_base
+
+APP_DIR = str(Path(__file__).resolve().parent)
+
+MODELS_FILE = str(Path(APP_DIR) / "models.py")
+
+# archivos de la app que nunca son el origen "real" de una consulta
+_IGNORED_FILES = {__file__, str(Path(APP_DIR) / "middleware.py")}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Se lanza cuando una vista supera su presupuesto de consultas o tiene N+1.
+    """
+
+
+def fingerprint(sql):
+    """returns the shape of the query: the sql without its literal values"""
+    sql = sql.replace("%s", "?")
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def query_origin(frame=None):
+    """
+    returns where a query comes from: the template line that triggered it, or
+    the app function/method (e.g. ``Client.update_client``) that ran it
+    """
+    frame = frame or sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename == template_base.__file__ and code.co_name == "render_annotated":
+            node = frame.f_locals.get("self")
+            origin = getattr(node, "origin", None)
+            if origin is not None:
+                token = getattr(node, "token", None)
+                return f"{origin.template_name}:{getattr(token, 'lineno', '?')}"
+        elif (
+            code.co_filename.startswith(APP_DIR)
+            and code.co_filename not in _IGNORED_FILES
+            and not _is_private(code.co_name)
+        ):
+            return _qualname(frame)
+        frame = frame.f_back
+    return None
+
+
+def model_method(frame=None):
+    """
+    returns the method of app.models (e.g. ``Client.save_client``) that ran a
+    query, or None if it did not come from one
+    """
+    frame = frame or sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_filename == MODELS_FILE and not _is_private(frame.f_code.co_name):
+            return _qualname(frame)
+        frame = frame.f_back
+    return None
+
+
+def _is_private(name):
+    return name.startswith("_") and not name.startswith("__")
+
+
+def _qualname(frame):
+    code = frame.f_code
+    qualname = getattr(code, "co_qualname", None)
+    if qualname is not None:
+        return qualname
+
+    owner = frame.f_locals.get("self", frame.f_locals.get("cls"))
+    if owner is None:
+        return code.co_name
+    owner = owner if isinstance(owner, type) else type(owner)
+    return f"{owner.__name__}.{code.co_name}"
+
+
+class CapturedQuery:
+    """
+    Consulta SQL registrada por QueryCapture.
+    """
+
+    __slots__ = ("sql", "duration", "origin", "params", "many")
+
+    def __init__(self, sql, duration, origin, params=(), many=False):
+        self.sql = sql
+        self.duration = duration
+        self.origin = origin
+        self.params = params
+        self.many = many
+
+    @property
+    def fingerprint(self):
+        """returns the shape of the query"""
+        return fingerprint(self.sql)
+
+
+class QueryCapture:
+    """
+    Registra las consultas SQL (con su duración y origen) que se ejecutan en
+    la conexión mientras el contexto está activo. No depende de DEBUG.
+    """
+
+    def __init__(self, using="default"):
+        self.using = using
+        self.queries = []
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """runs the query (as a connection execute wrapper) and records it"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                CapturedQuery(
+                    sql, time.perf_counter() - start, query_origin(sys._getframe(1)), params, many,
+                ),
+            )
+
+    def __enter__(self):
+        self._wrapper = connections[self.using].execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+
+class QueryReport:
+    """
+    Resultado de revisar las consultas de una vista contra su presupuesto y
+    contra consultas repetidas con la misma forma (N+1).
+    """
+
+    def __init__(self, view, queries, budget=None, threshold=None):
+        self.view = view
+        self.queries = queries
+        self.budget = budget
+        threshold = threshold or settings.QUERY_BUDGET_N_PLUS_ONE
+
+        groups = {}
+        for query in queries:
+            groups.setdefault(query.fingerprint, []).append(query)
+        self.repeated = [
+            (shape, same) for shape, same in groups.items() if len(same) >= threshold
+        ]
+
+    @classmethod
+    def for_request(cls, method, resolver_match, queries):
+        """builds the report of a resolved request using the budgets of app.urls"""
+        from .urls import query_budgets
+
+        url_name = getattr(resolver_match, "url_name", None)
+        budget = query_budgets.get(url_name, {}).get(method.upper())
+        view = url_name or "?"
+        func = getattr(resolver_match, "func", None)
+        if func is not None:
+            view_class = getattr(func, "view_class", None)
+            view = f"{view} ({(view_class or func).__name__})"
+        return cls(f"{method.upper()} {view}", queries, budget=budget)
+
+    @property
+    def over_budget(self):
+        """returns True if the view ran more queries than its budget"""
+        return self.budget is not None and len(self.queries) > self.budget
+
+    @property
+    def ok(self):
+        """returns True if there is nothing to report"""
+        return not self.over_budget and not self.repeated
+
+    def __str__(self):
+        lines = [f"{self.view}: {len(self.queries)} consultas"]
+        if self.over_budget:
+            origins = {}
+            for query in self.queries:
+                origins[query.origin] = origins.get(query.origin, 0) + 1
+            lines.append(f"  supera el presupuesto de {self.budget} consultas:")
+            lines.extend(f"    {count}x desde {origin}" for origin, count in origins.items())
+        for shape, same in self.repeated:
+            lines.append(f"  N+1: {len(same)}x desde {same[0].origin}: {shape}")
+        return "\n".join(lines)
+
+
+class QueryBudgetMixin:
+    """
+    Mixin para los TestCase: hace un request con el cliente de test y falla si
+    la vista supera su presupuesto de consultas o repite consultas (N+1).
+    """
+
+    def assertQueryBudget(self, path, method="get", data=None, **extra):
+        """requests the path and fails if the view goes over its query budget"""
+        with QueryCapture() as capture:
+            response = getattr(self.client, method)(path, data, **extra)
+
+        report = QueryReport.for_request(method, response.resolver_match, capture.queries)
+        if not report.ok:
+            self.fail(str(report))
+        return response
@@ -0,0 +1,47 @@
+from typing import NamedTuple
+
+from . import versions
+
+# Tablas de referencia (ciudades y razas) cacheadas en cada proceso como
+# {id: nombre}. Casi nunca cambian, pero cada formulario de clientes o de
+# mascotas las muestra y cada alta o edición las usa para validar.
+#
+# Cada mapa se guarda con el token de versión de su modelo (app.versions) y
+# se vuelve a leer de la base cuando el token cambia: cualquier alta, baja o
+# modificación de una ciudad o raza, en cualquier proceso, cambia el token en
+# la caché compartida. Con DummyCache el token cambia siempre, así que se lee
+# la base en cada uso, como sin esta caché.
+
+# modelo -> (versión, {id: nombre}) de este proceso
+_loaded = {}
+
+
+class Choice(NamedTuple):
+    """
+    Opción de un formulario: una ciudad o una raza.
+    """
+
+    id: int
+    name: str
+
+
+def names(model):
+    """returns the {id: name} map of the reference model (City or Breed)"""
+    # la versión se lee antes que la tabla: si cambia en el medio, el mapa
+    # queda guardado con la versión vieja y se vuelve a leer en el próximo uso
+    version = versions.current(model)
+    loaded = _loaded.get(model)
+    if loaded is None or loaded[0] != version:
+        loaded = (version, dict(model.objects.order_by("id").values_list("id", "name")))
+        _loaded[model] = loaded
+    return loaded[1]
+
+
+def choices(model):
+    """returns the options of a form select for the reference model"""
+    return [Choice(id, name) for id, name in names(model).items()]
+
+
+def exists(model, id):
+    """whether there is a row of the reference model with that id"""
+    return str(id).isdigit() and int(id) in names(model)
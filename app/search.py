@@ -0,0 +1,155 @@
+import re
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+
+from .models import Client, Medicine, Pet, Product, Provider
+
+_WORDS = re.compile(r"\w+")
+
+
+class Source(NamedTuple):
+    """
+    Modelo indexado en la búsqueda: qué campos se indexan y a dónde lleva.
+    """
+
+    code: int
+    model: type
+    name: str
+    detail: str | None
+    label: str
+    url_name: str
+
+
+# El código forma parte del rowid del índice (id * 8 + código), tiene que
+# coincidir con la migración 0004_search_index.
+SOURCES = {
+    "client": Source(1, Client, "name", "email", "Cliente", "clients_edit"),
+    "pet": Source(2, Pet, "name", None, "Mascota", "pets_edit"),
+    "product": Source(3, Product, "name", "type", "Producto", "products_edit"),
+    "medicine": Source(4, Medicine, "name", "description", "Medicamento", "medicines_edit"),
+    "provider": Source(5, Provider, "name", "address", "Proveedor", "providers_edit"),
+}
+
+
+class SearchResult(NamedTuple):
+    """
+    Resultado de la búsqueda.
+    """
+
+    kind: str
+    id: int
+    name: str
+    detail: str
+
+    @property
+    def label(self):
+        """returns the name of the kind of the result"""
+        return SOURCES[self.kind].label
+
+    @property
+    def url(self):
+        """returns the url of the edit page of the result"""
+        return reverse(SOURCES[self.kind].url_name, kwargs={"id": self.id})
+
+
+def match_expression(text):
+    """
+    builds the FTS5 query for the text: every word must match, as a prefix
+    (so "jua ver" finds "Juan Sebastián Veron")
+    """
+    return " ".join(f'"{word}"*' for word in _WORDS.findall(text))
+
+
+def search(text, limit=50):
+    """
+    returns the first results for the text across all the indexed models.
+
+    They come in index order: ranking them (ORDER BY rank) scores every match,
+    which for common words at a million rows costs over 100ms instead of ~5ms.
+    """
+    match = match_expression(text)
+    if not match:
+        return []
+
+    if connection.vendor != "sqlite":
+        return _search_like(text, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT rowid, kind, name, detail FROM app_search "
+            "WHERE app_search MATCH %s LIMIT %s",
+            [match, limit],
+        )
+        return [
+            SearchResult(kind, rowid // 8, name, detail or "")
+            for rowid, kind, name, detail in cursor.fetchall()
+        ]
+
+
+def _search_like(text, limit):
+    # otros motores no tienen FTS5: búsqueda lineal con LIKE
+    results = []
+    for kind, source in SOURCES.items():
+        condition = Q()
+        for word in _WORDS.findall(text):
+            matches = Q(**{f"{source.name}__icontains": word})
+            if source.detail:
+                matches |= Q(**{f"{source.detail}__icontains": word})
+            condition &= matches
+
+        fields = ["id", source.name] + ([source.detail] if source.detail else [])
+        for id, name, *detail in source.model.objects.filter(condition).values_list(*fields)[:limit]:
+            results.append(SearchResult(kind, id, name, detail[0] if detail else ""))
+    return results[:limit]
+
+
+def rebuild():
+    """rebuilds the whole search index from the tables"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("DELETE FROM app_search")
+        for kind in SOURCES:
+            cursor.execute(_index_sql(kind), [kind, 0])
+        cursor.execute("INSERT INTO app_search(app_search) VALUES ('optimize')")
+
+
+@contextmanager
+def bulk_insert(model):
+    """
+    context (and transaction) for inserting many rows of the model: the index
+    triggers are paused and the new rows are indexed with a single statement
+    at the end, which is several times cheaper than indexing row by row
+    """
+    kind = next((kind for kind, source in SOURCES.items() if source.model is model), None)
+    if kind is None or connection.vendor != "sqlite":
+        with transaction.atomic():
+            yield
+        return
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # la pausa sólo la ve esta transacción, y toma el lock de escritura
+        # antes de leer el último id
+        cursor.execute("INSERT INTO app_search_paused DEFAULT VALUES")
+        cursor.execute(f"SELECT coalesce(max(id), 0) FROM {table}")
+        (last_id,) = cursor.fetchone()
+
+        yield
+
+        cursor.execute(_index_sql(kind), [kind, last_id])
+        cursor.execute("DELETE FROM app_search_paused")
+
+
+def _index_sql(kind):
+    # indexa las filas con id mayor al segundo parámetro
+    source = SOURCES[kind]
+    quote = connection.ops.quote_name
+    detail = quote(source.detail) if source.detail else "''"
+    return (
+        f"INSERT INTO app_search(rowid, kind, name, detail) "
+        f"SELECT id * 8 + {source.code}, %s, {quote(source.name)}, {detail} "
+        f"FROM {quote(source.model._meta.db_table)} WHERE id > %s"
+    )
@@ -0,0 +1,283 @@
+import gc
+import os
+import random
+import shutil
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from django.core.servers import basehttp
+from django.db import connections
+
+from . import accesslog
+
+# Servidor HTTP de producción ("python manage.py serve") con la librería
+# estándar y el servidor WSGI de Django: un proceso maestro carga la app una
+# vez, abre el socket y hace fork de los workers, que comparten con él la
+# memoria de la app (copy-on-write, con gc.freeze() para que el recolector no
+# la toque). Cada worker atiende las conexiones en threads y las mantiene
+# abiertas entre requests (HTTP/1.1 keep-alive).
+#
+# Señales del maestro:
+# - SIGHUP: recarga sin cortar requests. El maestro se vuelve a ejecutar
+#   (con el código nuevo) conservando el socket, arranca workers nuevos y
+#   termina los viejos cuando completan lo que estaban atendiendo.
+# - SIGTERM o SIGINT: termina los workers de la misma forma y sale.
+
+# Variables de entorno con las que el maestro recargado recibe el socket y
+# los workers viejos
+LISTEN_FD = "VETSOFT_SERVE_FD"
+OLD_WORKERS = "VETSOFT_SERVE_WORKERS"
+
+# Segundos entre revisiones de los workers
+TICK = 0.2
+
+
+class ServerHandler(basehttp.ServerHandler):
+    """
+    Respuesta de un request: si el worker se está por ir (es su último
+    request o recibió SIGTERM), le avisa al cliente que cierra la conexión.
+    """
+
+    def cleanup_headers(self):
+        """adds "Connection: close" when the worker is stopping"""
+        super().cleanup_headers()
+        if self.request_handler.server.stopping.is_set():
+            self.headers["Connection"] = "close"
+            self.request_handler.close_connection = True
+
+
+class RequestHandler(basehttp.WSGIRequestHandler):
+    """
+    Handler HTTP/1.1 de los workers: la conexión queda abierta entre requests
+    hasta ``keepalive`` segundos sin actividad.
+    """
+
+    def setup(self):
+        """applies the keep-alive timeout to the connection"""
+        self.timeout = self.server.keepalive
+        super().setup()
+
+    def handle_one_request(self):
+        """handles a request of the connection and counts it"""
+        # el de Django, contando el request antes de responder
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+        except (TimeoutError, ConnectionError):
+            # el cliente no mandó otro request a tiempo, o cortó
+            self.close_connection = True
+            return
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ""
+            self.request_version = ""
+            self.command = ""
+            self.send_error(414)
+            return
+        if not self.parse_request():
+            return
+
+        self.server.count_request()
+        handler = ServerHandler(self.rfile, self.wfile, self.get_stderr(), self.get_environ())
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+    def log_message(self, format, *args):
+        """does not log every request (the access log does, see ACCESS_LOG_DIR)"""
+
+
+class WorkerServer(basehttp.ThreadedWSGIServer):
+    """
+    Servidor WSGI de un worker sobre el socket que abrió el maestro (todos
+    los workers aceptan conexiones del mismo socket). Después de
+    ``max_requests`` requests deja de aceptar conexiones, completa las que
+    tiene y termina, y el maestro arranca otro worker en su lugar.
+    """
+
+    # server_close() espera a los threads de las conexiones abiertas
+    daemon_threads = False
+
+    def __init__(self, sock, app, keepalive, max_requests):
+        super().__init__(sock.getsockname()[:2], RequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.server_name, self.server_port = sock.getsockname()[:2]
+        self.setup_environ()
+        self.set_app(app)
+        self.keepalive = keepalive
+        self.max_requests = max_requests
+        self.requests = 0
+        self.stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        """counts a request, stopping the worker at the last one"""
+        with self._lock:
+            self.requests += 1
+            if self.max_requests and self.requests >= self.max_requests:
+                self.stop()
+
+    def stop(self):
+        """stops accepting connections, without waiting (safe in handlers and signals)"""
+        if not self.stopping.is_set():
+            self.stopping.set()
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+
+def run_worker(sock, app, keepalive, max_requests):
+    """serves requests until SIGTERM or ``max_requests``, then returns"""
+    gc.enable()
+    # el fork copia el estado del generador (el muestreo de los perfiles lo usa)
+    random.seed()
+    server = WorkerServer(sock, app, keepalive, max_requests)
+    signal.signal(signal.SIGTERM, lambda *args: server.stop())
+    # Ctrl+C y el SIGHUP llegan a todo el grupo: los maneja el maestro
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    server.serve_forever(poll_interval=TICK)
+    server.server_close()
+    accesslog.close()
+
+
+class Master:
+    """
+    Proceso maestro: carga la app, abre el socket y mantiene ``workers``
+    procesos atendiendo, reemplazando a los que terminan.
+    """
+
+    def __init__(self, address, workers, keepalive=5, max_requests=0, max_requests_jitter=0,
+                 graceful_timeout=30, backlog=1024, log=print):
+        self.address = address
+        self.count = workers
+        self.keepalive = keepalive
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.log = log
+        # pids de los workers, y de los de antes de una recarga
+        self.workers = set()
+        self.old_workers = set()
+        self.signal = None
+
+    def listen(self):
+        """returns the listening socket: the one of the reloaded master, or a new one"""
+        fd = os.environ.pop(LISTEN_FD, None)
+        if fd is not None:
+            self.old_workers = {int(pid) for pid in os.environ.pop(OLD_WORKERS, "").split(",") if pid}
+            return socket.socket(fileno=int(fd))
+        host, port = self.address
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        return socket.create_server((host, port), family=family, backlog=self.backlog)
+
+    def run(self):
+        """serves until SIGTERM or SIGINT"""
+        self.socket = self.listen()
+        # todos los workers esperan conexiones en el socket y uno solo la
+        # acepta: los demás no se tienen que quedar bloqueados en accept()
+        self.socket.setblocking(False)
+        # el recolector no recorre (ni copia en los workers) la memoria de la app
+        gc.disable()
+        self.app = basehttp.get_internal_wsgi_application()
+        connections.close_all()
+        gc.collect()
+        gc.freeze()
+
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.handle_signal)
+        host, port = self.socket.getsockname()[:2]
+        self.log(f"Escuchando en http://{host}:{port} con {self.count} workers (maestro {os.getpid()})")
+
+        for _ in range(self.count):
+            self.spawn()
+        # los workers de antes de la recarga terminan cuando ya están los nuevos
+        self.kill(self.old_workers, signal.SIGTERM)
+
+        while self.signal is None:
+            time.sleep(TICK)
+            self.reap()
+            while len(self.workers) < self.count and self.signal is None:
+                self.spawn()
+
+        if self.signal == signal.SIGHUP:
+            self.reload()
+        self.log("Terminando los workers")
+        self.stop()
+
+    def handle_signal(self, signum, frame):
+        """remembers the signal, handled by the main loop"""
+        self.signal = signum
+
+    def spawn(self):
+        """forks a new worker"""
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            # que no se reinicien todos juntos
+            max_requests += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.socket, self.app, self.keepalive, max_requests)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self.workers.add(pid)
+
+    def reap(self):
+        """forgets the workers that exited"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                self.log(f"El worker {pid} terminó con código {code}")
+            self.workers.discard(pid)
+            self.old_workers.discard(pid)
+
+    def kill(self, pids, signum):
+        """sends the signal to the workers"""
+        for pid in list(pids):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pids.discard(pid)
+
+    def reload(self):
+        """runs the master again (new code) keeping the socket and the current workers"""
+        self.log("Recargando")
+        os.set_inheritable(self.socket.fileno(), True)
+        os.environ[LISTEN_FD] = str(self.socket.fileno())
+        os.environ[OLD_WORKERS] = ",".join(str(pid) for pid in self.workers | self.old_workers)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable, [sys.executable, *sys.orig_argv[1:]])
+
+    def stop(self):
+        """stops every worker, killing the ones still busy after the graceful timeout"""
+        workers = self.workers | self.old_workers
+        self.kill(workers, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while (self.workers or self.old_workers) and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(TICK)
+        self.kill(self.workers | self.old_workers, signal.SIGKILL)
+        self.reap()
+
+
+def clear_directory(path):
+    """empties the directory (creating it if needed)"""
+    path = Path(path)
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True, exist_ok=True)
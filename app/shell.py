@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.safestring import mark_safe
+
+# Esqueleto de las páginas: base.html sin su bloque main (el <head>, la barra
+# de navegación y los scripts). Sólo cambia con la sección activa de la barra,
+# así que se renderiza una vez por sección y proceso, y cada request renderiza
+# únicamente su bloque main.
+#
+# El esqueleto se renderiza con marcas en el lugar del bloque main y del texto
+# de la búsqueda (lo único de la barra que depende del request) y se parte en
+# esas marcas; base.html junta las partes.
+#
+# Las URLs de la barra dependen del urlconf y del prefijo de la app (el
+# SCRIPT_NAME con que la sirve el servidor), así que todo se guarda por
+# urlconf y prefijo.
+
+MAIN = "__shell_main__"
+QUERY = "__shell_query__"
+
+# (nombre de la ruta, texto, ícono) de la barra de navegación y del home
+SECTIONS = [
+    ("home", "Home", "bi-house-door"),
+    ("clients_repo", "Clientes", "bi-people"),
+    ("vets_repo", "Veterinarias", "bi-shop"),
+    ("products_repo", "Productos", "bi-basket"),
+    ("medicines_repo", "Medicamentos", "bi-capsule"),
+    ("providers_repo", "Proveedores", "bi-truck"),
+    ("pets_repo", "Mascotas", "bi-chat-heart"),
+]
+
+# (urlconf, prefijo) -> links de la barra y botones del home
+_links = {}
+_buttons = {}
+# (urlconf, prefijo, sección activa) -> partes renderizadas (None: ninguna sección)
+_rendered = {}
+
+
+def _urls():
+    return get_urlconf() or settings.ROOT_URLCONF, get_script_prefix()
+
+
+def links():
+    """returns the links of the navbar, resolved once per urlconf and prefix"""
+    urls = _urls()
+    if urls not in _links:
+        _links[urls] = [
+            {"label": label, "href": reverse(name), "icon": f"bi {icon}"}
+            for name, label, icon in SECTIONS
+        ]
+    return _links[urls]
+
+
+def home_buttons():
+    """returns the buttons of the home page, resolved once per urlconf and prefix"""
+    urls = _urls()
+    if urls not in _buttons:
+        _buttons[urls] = [
+            {"url": reverse(name), "id": f"home-{label}", "icon": icon, "text": label}
+            for name, label, icon in SECTIONS[1:]
+        ]
+    return _buttons[urls]
+
+
+def section(path):
+    """returns the href of the navbar link that is active for the path"""
+    for link in links():
+        if path == link["href"] or (link["href"] != "/" and path.startswith(link["href"])):
+            return link["href"]
+    return None
+
+
+def parts(active):
+    """
+    returns the parts of the page shell with the ``active`` section: the
+    part before the search text, the one between it and the main block and
+    the one after the main block
+    """
+    key = (*_urls(), active)
+    if key in _rendered and not settings.DEBUG:
+        return _rendered[key]
+
+    html = render_to_string("partials/shell.html", {
+        "links": [{**link, "active": link["href"] == active} for link in links()],
+        "query": QUERY,
+        "main": MAIN,
+    })
+    head, rest = html.split(QUERY, 1)
+    nav, tail = rest.split(MAIN, 1)
+    _rendered[key] = {"head": mark_safe(head), "nav": mark_safe(nav), "tail": mark_safe(tail)}
+    return _rendered[key]
+
+
+def clear():
+    """forgets the rendered shells and the resolved links"""
+    _links.clear()
+    _buttons.clear()
+    _rendered.clear()
@@ -0,0 +1,44 @@
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+from . import db, versions
+from .models import (
+    Breed,
+    City,
+    Client,
+    Medicine,
+    Pet,
+    Product,
+    Provider,
+    TableVersion,
+    Vet,
+)
+
+# Modelos cuyos cambios invalidan lo que haya en la caché para ellos (los
+# listados de clientes y mascotas también muestran ciudades y razas)
+TRACKED_MODELS = (Breed, City, Client, Medicine, Pet, Product, Provider, Vet)
+
+
+def model_changed(sender, **kwargs):
+    """bumps the version of the model that was saved or deleted"""
+    versions.touch(sender)
+
+
+def database_changed(sender, using, **kwargs):
+    """
+    bumps the version of every tracked model after migrate or flush (which
+    sends post_migrate too): the tables may have changed without signals,
+    and a flush also deletes the TableVersion rows
+    """
+    if sender.label == "app" and TableVersion._meta.db_table in connections[using].introspection.table_names():
+        versions.touch(*TRACKED_MODELS)
+
+
+def connect():
+    """connects the signals of the tracked models and of the database connections"""
+    connection_created.connect(db.apply_profile, dispatch_uid="db-profile")
+    post_migrate.connect(database_changed, dispatch_uid="versions-migrate")
+    for model in TRACKED_MODELS:
+        post_save.connect(model_changed, sender=model, dispatch_uid=f"versions-save-{model.__name__}")
+        post_delete.connect(model_changed, sender=model, dispatch_uid=f"versions-delete-{model.__name__}")
@@ -0,0 +1,135 @@
+import mimetypes
+import os
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage,
+)
+from django.core.files.base import ContentFile
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .compression import COMPRESSIBLE, ENCODINGS, accepted, compress
+
+# Archivos estáticos (Bootstrap y Bootstrap Icons en app/static/vendor/) servidos
+# por la misma app: collectstatic los copia a STATIC_ROOT con el hash del
+# contenido en el nombre y escribe sus versiones gzip y brotli, y
+# app.middleware.StaticFilesMiddleware los sirve desde ahí.
+
+# Un nombre con hash nunca cambia de contenido: el navegador lo guarda un año
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Storage de los archivos estáticos: como ManifestStaticFilesStorage (cada
+    archivo con el hash de su contenido en el nombre), y además escribe al
+    lado de cada archivo de texto su versión gzip (.gz) y brotli (.br).
+    """
+
+    # Los .map de las librerías no se copian, así que no se reescriben sus
+    # referencias (sólo las usan las herramientas de desarrollo del navegador)
+    patterns = tuple(
+        (extension, tuple(pattern for pattern in patterns if "sourceMappingURL" not in str(pattern)))
+        for extension, patterns in ManifestStaticFilesStorage.patterns
+    )
+
+    def stored_name(self, name):
+        """returns the hashed name, or the same name before the first collectstatic"""
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        """hashes the files and then writes the compressed versions of the text ones"""
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name is not None:
+                names.update((name, hashed_name))
+            yield name, hashed_name, processed
+
+        if not dry_run:
+            for name in sorted(names):
+                if name.endswith(COMPRESSIBLE):
+                    self._compress(name)
+
+    def _compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        for encoding, extension in ENCODINGS.items():
+            compressed = compress(data, encoding)
+            # si casi no achica no vale la pena descomprimirlo en el navegador
+            if len(compressed) > len(data) * 0.95:
+                continue
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            self._save(name + extension, ContentFile(compressed))
+
+
+class StaticFile(NamedTuple):
+    """
+    Archivo de STATIC_ROOT listo para servir, con sus versiones comprimidas.
+    """
+
+    path: str
+    content_type: str
+    last_modified: int
+    cache_control: str
+    # codificación -> ruta del archivo comprimido
+    variants: dict
+
+
+def collected_files():
+    """
+    returns the files of STATIC_ROOT by their name in the URL; the ones with
+    the hash in the name are cached by the browser for a year, the rest are
+    revalidated with Last-Modified
+    """
+    root = settings.STATIC_ROOT
+    if not root or not os.path.isdir(root):
+        return {}
+
+    hashed = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            if any(name.endswith(extension) for extension in ENCODINGS.values()):
+                continue
+            content_type, _ = mimetypes.guess_type(name)
+            files[name] = StaticFile(
+                path,
+                content_type or "application/octet-stream",
+                int(os.stat(path).st_mtime),
+                IMMUTABLE if name in hashed else "no-cache",
+                {
+                    encoding: path + extension
+                    for encoding, extension in ENCODINGS.items()
+                    if os.path.exists(path + extension)
+                },
+            )
+    return files
+
+
+def serve(request, static):
+    """returns the response with the file, compressed if the browser accepts it"""
+    response = get_conditional_response(request, last_modified=static.last_modified)
+    if response is not None:
+        return response
+
+    encodings = accepted(request.headers.get("Accept-Encoding", ""))
+    encoding = next((encoding for encoding in encodings if encoding in static.variants), None)
+    response = FileResponse(open(static.variants.get(encoding, static.path), "rb"), content_type=static.content_type)
+    # FileResponse lo agrega con el nombre del archivo, que es el del .br o .gz
+    response.headers.pop("Content-Disposition", None)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    if static.variants:
+        response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Last-Modified"] = http_date(static.last_modified)
+    response.headers["Cache-Control"] = static.cache_control
+    return response
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.template.backends import django as django_backend
+from django.template.backends import jinja2 as jinja2_backend
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.timezone import template_localtime
+from jinja2 import ChainableUndefined, Environment
+
+from . import metrics
+
+# Motor de plantillas de las tablas de los listados y de los formularios.
+#
+# Las plantillas de app/jinja2/ son las de app/templates/ traducidas a Jinja2
+# (sin los tags de Django, que por fila cuestan bastante más) y tienen que dar
+# exactamente el mismo HTML: el entorno imprime las variables como Django
+# (zona horaria, formato de números y fechas, su escape de HTML) y las que no
+# existen como texto vacío.
+
+
+def engine(kind):
+    """
+    returns the name of the template engine for ``kind``, "tables" (the
+    repository tables) or "forms"
+    """
+    if settings.TEMPLATE_ENGINE == "jinja2" and (kind == "tables" or settings.JINJA2_FORMS):
+        return "jinja2"
+    return "django"
+
+
+class TimedTemplate:
+    """
+    Plantilla de un motor (Django o Jinja2) que suma su tiempo de render a las
+    métricas del request (app.metrics).
+    """
+
+    def __init__(self, template):
+        self._wrapped = template
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def render(self, context=None, request=None):
+        """renders the template, timing it"""
+        return metrics.timed_render(self._wrapped.render, context, request)
+
+
+class _TimedBackend:
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class DjangoTemplates(_TimedBackend, django_backend.DjangoTemplates):
+    """
+    Motor de plantillas de Django (app/templates/) con el tiempo de render en
+    las métricas.
+    """
+
+
+class Jinja2(_TimedBackend, jinja2_backend.Jinja2):
+    """
+    Motor Jinja2 (app/jinja2/) con el tiempo de render en las métricas.
+    """
+
+
+def environment(**options):
+    """returns the Jinja2 environment of the app/jinja2/ templates"""
+    options.update(undefined=ChainableUndefined, keep_trailing_newline=True, finalize=_finalize)
+    env = Environment(**options)
+    env.globals["url"] = _url
+    return env
+
+
+def _finalize(value):
+    # lo mismo que Django al imprimir una variable (render_value_in_context),
+    # sin pasar por el formato del idioma para los textos y los enteros (la
+    # mayoría de los valores de una fila), que no lo usan
+    if isinstance(value, str):
+        return conditional_escape(value)
+    if isinstance(value, int) and not settings.USE_THOUSAND_SEPARATOR:
+        return str(value)
+    return conditional_escape(localize(template_localtime(value)))
+
+
+def _url(name, *args, **kwargs):
+    return reverse(name, args=args or None, kwargs=kwargs or None)
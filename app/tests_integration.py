@@ -1,7 +1,37 @@
-from django.test import TestCase
+import csv
+import gzip
+import http.client
+import json
+import os
+import re
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import brotli
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client as DjangoClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.shortcuts import reverse
-from app.models import Breed, City, Client, Medicine, Pet, Product, Provider, Vet
+from app.models import Breed, City, Client, Medicine, Pet, Product, Provider, TableVersion, Vet
 from datetime import date, datetime, timedelta
+from app import accesslog, metrics, profiling, reference, search, shell, validation, versions
+from app.benchmarks import route_requests, run_requests
+from app.fragments import CSRF_PLACEHOLDER
+from app.management.commands.generate_fixtures import insert
+from app.queries import QueryBudgetMixin
+from app.urls import query_budgets, urlpatterns
+from fixtures import generator
 from app.views import MedicineFormView, MedicineRepositoryView, PetFormView, VetFormView
 
 class ViewTestCase(TestCase):
@@ -178,6 +208,63 @@ class DeleteViewTestCase(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertFalse(Pet.objects.filter(id=self.pet1.id).exists())            
 
+    def test_delete_selected_products_in_one_query(self):
+        others = [Product.objects.create(name=f"Product {i}", type="1", price=10.0) for i in range(3)]
+        selected = [self.product1.id, others[0].id, others[1].id]
+
+        with self.assertNumQueries(3):  # ids existentes, DELETE ... IN y versión de la tabla
+            response = self.client.post(reverse('products_delete'), {'product_id': selected})
+
+        self.assertRedirects(response, reverse('products_repo'))
+        self.assertEqual(list(Product.objects.values_list("id", flat=True)), [others[2].id])
+
+    def test_delete_ignores_missing_ids_but_needs_one(self):
+        response = self.client.post(reverse('vets_delete'), {'vet_id': [self.vet1.id, 999]})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Vet.objects.exists())
+
+        response = self.client.post(reverse('vets_delete'), {'vet_id': [999, "x"]})
+        self.assertEqual(response.status_code, 404)
+
+    def test_repository_has_a_checkbox_per_row(self):
+        response = self.client.get(reverse('clients_repo'))
+
+        self.assertContains(response, 'form="clients-seleccion" name="client_id" value="%d"' % self.client1.id)
+        self.assertContains(response, 'data-testid="borrar-seleccionados"')
+
+class ProductPricesTest(TestCase):
+    def setUp(self):
+        Product.objects.create(name="Alimento Premium", type="Alimento", price=1000.0)
+        Product.objects.create(name="Alimento Cachorro", type="Alimento", price=99.99)
+        Product.objects.create(name="Correa", type="Accesorio", price=500.0)
+
+    def test_form_lists_the_types(self):
+        response = self.client.get(reverse("products_prices"))
+
+        self.assertEqual(list(response.context["types"]), ["Accesorio", "Alimento"])
+
+    def test_raises_the_prices_of_a_type_in_one_update(self):
+        with self.assertNumQueries(2):  # UPDATE de los precios y versión de la tabla
+            response = self.client.post(reverse("products_prices"), {"type": "Alimento", "percent": "10"})
+
+        self.assertRedirects(response, reverse("products_repo"))
+        self.assertEqual(
+            list(Product.objects.order_by("id").values_list("price", flat=True)),
+            [1100.0, 109.99, 500.0],
+        )
+
+    def test_lowers_the_prices(self):
+        self.client.post(reverse("products_prices"), {"type": "Accesorio", "percent": "-12.5"})
+
+        self.assertEqual(Product.objects.get(name="Correa").price, 437.5)
+
+    def test_shows_the_errors(self):
+        response = self.client.post(reverse("products_prices"), {"type": "", "percent": "-100"})
+
+        self.assertContains(response, "Por favor seleccione un tipo")
+        self.assertContains(response, "El porcentaje debe ser mayor que -100")
+        self.assertEqual(Product.objects.get(name="Correa").price, 500.0)
+
 class HomePageTest(TestCase):
     def test_use_home_template(self):
         response = self.client.get(reverse("home"))
@@ -197,6 +284,538 @@ class FormPagesTest(TestCase):
         self.assertTemplateUsed(response_providers_form, "providers/form.html")
         self.assertTemplateUsed(response_pets_form, "pets/form.html")
 
+class RepositoryPaginationTest(TestCase):
+    def setUp(self):
+        self.city = City.objects.create(name='Berisso')
+        for i in range(3):
+            Client.objects.create(
+                name=f"Cliente {i}",
+                phone=54221555232,
+                city=self.city,
+                email=f"cliente{i}@vetsoft.com",
+            )
+
+    @override_settings(REPOSITORY_PAGE_SIZE=2)
+    def test_repo_shows_first_page_with_next_cursor(self):
+        response = self.client.get(reverse("clients_repo"))
+        page = response.context["page"]
+
+        self.assertEqual(len(response.context["clients"]), 2)
+        self.assertContains(response, f"?after={page.next_cursor}")
+        self.assertNotContains(response, "Cliente 2")
+
+    @override_settings(REPOSITORY_PAGE_SIZE=2)
+    def test_repo_follows_cursor(self):
+        first = self.client.get(reverse("clients_repo")).context["page"]
+        response = self.client.get(reverse("clients_repo"), {"after": first.next_cursor})
+
+        self.assertContains(response, "Cliente 2")
+        self.assertNotContains(response, "Cliente 0")
+        self.assertFalse(response.context["page"].has_next)
+
+    def test_repo_fetches_city_names_in_one_query(self):
+        # la versión de las tablas (para el ETag) y el listado
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("clients_repo"))
+
+        self.assertContains(response, "Berisso", count=3)
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"}}
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RepositoryCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.city = City.objects.create(name='Berisso')
+        self.client_ = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, city=self.city, email="brujita75@vetsoft.com",
+        )
+
+    def test_repo_table_is_served_from_the_cache(self):
+        self.client.get(reverse("clients_repo"))
+
+        # sólo la versión de las tablas (para el ETag)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("clients_repo"))
+
+        self.assertContains(response, "Juan Sebastian Veron")
+
+    def test_saving_a_client_invalidates_the_table(self):
+        self.client.get(reverse("clients_repo"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_.name = "Guido Carrillo"
+            self.client_.save()
+
+        response = self.client.get(reverse("clients_repo"))
+        self.assertContains(response, "Guido Carrillo")
+        self.assertNotContains(response, "Juan Sebastian Veron")
+
+    def test_renaming_a_city_invalidates_the_clients_table(self):
+        self.client.get(reverse("clients_repo"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city.name = "Ensenada"
+            self.city.save()
+
+        self.assertContains(self.client.get(reverse("clients_repo")), "Ensenada")
+
+    def test_deleting_a_client_invalidates_the_table(self):
+        self.client.get(reverse("clients_repo"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_.delete()
+
+        self.assertContains(self.client.get(reverse("clients_repo")), "No existen clientes")
+
+    def test_version_changes_before_and_after_the_commit(self):
+        before = versions.current(Client)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            versions.touch(Client)
+            during = versions.current(Client)
+            self.assertNotEqual(during, before)
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotIn(versions.current(Client), (before, during))
+
+    def test_flush_invalidates_the_tables(self):
+        self.client.get(reverse("clients_repo"))
+
+        call_command("flush", interactive=False, verbosity=0)
+
+        self.assertContains(self.client.get(reverse("clients_repo")), "No existen clientes")
+
+    def test_cached_table_gets_the_csrf_token_of_the_request(self):
+        self.client.get(reverse("clients_repo"))
+        response = self.client.get(reverse("clients_repo"))
+
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ReferenceCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.city = City.objects.create(name="Berisso")
+        self.breed = Breed.objects.create(name="Ovejero Aleman")
+
+    def test_forms_read_the_cities_and_breeds_once(self):
+        self.client.get(reverse("clients_form"))
+        self.client.get(reverse("pets_form"))
+
+        # sólo la versión de las tablas (para el ETag)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("clients_form"))
+        self.assertContains(response, "Berisso")
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("pets_form"))
+        self.assertContains(response, "Ovejero Aleman")
+
+    def test_validations_use_the_cached_ids(self):
+        reference.names(City)
+
+        # el INSERT y la versión de la tabla, sin consultar las ciudades
+        with self.assertNumQueries(2):
+            saved, _ = Client.save_client({
+                "name": "Juan", "phone": "54221555232", "email": "j@vetsoft.com", "city": self.city.id,
+            })
+        self.assertTrue(saved)
+        self.assertEqual(Client.validate_client({"city": 999})["city"], "Esa ciudad no existe")
+
+    def test_a_new_city_is_listed_after_the_commit(self):
+        self.client.get(reverse("clients_form"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.create(name="Ensenada")
+
+        self.assertContains(self.client.get(reverse("clients_form")), "Ensenada")
+
+    def test_reloads_when_another_process_bumps_the_version(self):
+        self.assertEqual(reference.names(City), {self.city.id: "Berisso"})
+
+        # otro proceso cambia la fila y la versión en la caché compartida
+        City.objects.filter(id=self.city.id).update(name="Tandil")
+        self.assertEqual(reference.names(City), {self.city.id: "Berisso"})
+        with self.captureOnCommitCallbacks(execute=True):
+            versions.touch(City)
+
+        self.assertEqual(reference.names(City), {self.city.id: "Tandil"})
+
+    def test_flush_empties_the_cached_maps(self):
+        self.assertEqual(reference.names(City), {self.city.id: "Berisso"})
+
+        call_command("flush", interactive=False, verbosity=0)
+
+        self.assertEqual(reference.names(City), {})
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.city = City.objects.create(name='Berisso')
+        self.client_ = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, city=self.city, email="brujita75@vetsoft.com",
+        )
+
+    def test_repo_answers_not_modified_to_a_current_etag(self):
+        etag = self.client.get(reverse("clients_repo"))["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("clients_repo"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_repo_answers_not_modified_since_last_change(self):
+        last_modified = self.client.get(reverse("clients_repo"))["Last-Modified"]
+
+        response = self.client.get(reverse("clients_repo"), HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_saving_a_client_changes_the_etag(self):
+        etag = self.client.get(reverse("clients_repo"))["ETag"]
+
+        Client.objects.create(name="Guido Carrillo", phone=54221555232, city=self.city, email="g@vetsoft.com")
+
+        response = self.client.get(reverse("clients_repo"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Guido Carrillo")
+
+    def test_edit_page_answers_not_modified(self):
+        url = reverse("clients_edit", kwargs={"id": self.client_.id})
+        etag = self.client.get(url)["ETag"]
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.city.name = "Ensenada"
+        self.city.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_table_version_counts_every_change(self):
+        before = TableVersion.objects.get(table="app.client").version
+
+        self.client_.update_client({"name": "Guido Carrillo"})
+        self.client_.delete()
+
+        self.assertEqual(TableVersion.objects.get(table="app.client").version, before + 2)
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.city = City.objects.create(name='Berisso')
+        self.breed = Breed.objects.create(name='Ovejero Aleman')
+        for i in range(5):
+            Client.objects.create(name="Juan", phone=54221555232, city=self.city, email="j@vetsoft.com")
+            Product.objects.create(name="Producto", type="Tipo", price=10.0)
+            Medicine.objects.create(name="ibuprofeno", description="desc", dose=1.0)
+            Vet.objects.create(name="vet", phone="54100", email="v@vetsoft.com")
+            Provider.objects.create(name="prov", phone="54100", email="p@vetsoft.com", address="calle 1", floor_apartament="1")
+            Pet.objects.create(name="Firulais", breed=self.breed, weight=5.0, birthday="2020-05-20")
+
+    def test_every_route_declares_a_budget(self):
+        for pattern in urlpatterns:
+            self.assertIn(pattern.name, query_budgets)
+
+    def test_pages_are_within_budget(self):
+        self.assertQueryBudget(reverse("home"))
+        for entity in ["clients", "products", "medicines", "vets", "providers", "pets"]:
+            self.assertQueryBudget(reverse(f"{entity}_repo"))
+            self.assertQueryBudget(reverse(f"{entity}_form"))
+            self.assertQueryBudget(reverse(f"{entity}_edit", kwargs={"id": 1}))
+
+    def test_writes_are_within_budget(self):
+        self.assertQueryBudget(reverse("clients_form"), "post", {
+            "name": "Juan Sebastian Veron", "phone": "54221555232", "email": "j@vetsoft.com", "city": self.city.id,
+        })
+        self.assertQueryBudget(reverse("clients_form"), "post", {"id": 1, "name": "Guido Carrillo"})
+        self.assertQueryBudget(reverse("pets_edit", kwargs={"id": 1}), "post", {
+            "id": 1, "name": "Firulais", "breed": self.breed.id, "weight": "4", "birthday": "2020-05-20",
+        })
+        self.assertQueryBudget(reverse("products_delete"), "post", {"product_id": 1})
+
+    def test_batch_api_is_within_budget_whatever_the_size(self):
+        for size in [1, 100]:
+            self.assertQueryBudget(reverse("clients_api"), "post", json.dumps({
+                "create": [
+                    {"name": "Juan", "phone": "54221555232", "email": f"j{i}@vetsoft.com", "city": self.city.id}
+                    for i in range(size)
+                ],
+                "update": [{"id": id, "name": "Guido"} for id in range(1, 4)],
+                "delete": [4, 5],
+            }), content_type="application/json")
+
+class BatchApiTest(TestCase):
+    def setUp(self):
+        self.city = City.objects.create(name="Berisso")
+        self.breed = Breed.objects.create(name="Ovejero Aleman")
+
+    def post(self, entity, body):
+        return self.client.post(reverse(f"{entity}_api"), json.dumps(body), content_type="application/json")
+
+    def test_creates_updates_and_deletes_in_one_request(self):
+        first = Client.objects.create(name="Juan", phone=54221555232, email="j@vetsoft.com", city=self.city)
+        second = Client.objects.create(name="Ana", phone=54221555232, email="a@vetsoft.com", city=self.city)
+
+        response = self.post("clients", {
+            "create": [{"name": "Guido Carrillo", "phone": "54221555233", "email": "g@vetsoft.com", "city": self.city.id}],
+            "update": [{"id": first.id, "email": "juan@vetsoft.com"}],
+            "delete": [second.id],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data["ok"])
+        created = Client.objects.get(name="Guido Carrillo")
+        self.assertEqual(data["create"], [{"ok": True, "id": created.id}])
+        self.assertEqual(data["update"], [{"ok": True, "id": first.id}])
+        self.assertEqual(data["delete"], [{"ok": True, "id": second.id}])
+        first.refresh_from_db()
+        self.assertEqual((first.name, first.email), ("Juan", "juan@vetsoft.com"))
+        self.assertFalse(Client.objects.filter(id=second.id).exists())
+
+    def test_reports_the_errors_of_every_item_and_applies_the_rest(self):
+        pet = Pet.objects.create(name="Luna", breed=self.breed, weight=5.0, birthday="2020-05-20")
+
+        data = self.post("pets", {
+            "create": [
+                {"name": "Rex", "breed": self.breed.id, "birthday": "2021-01-10", "weight": 8},
+                {"name": "Rex", "breed": 999, "birthday": "2021-01-10", "weight": -1},
+                "Rex",
+            ],
+            "update": [{"id": pet.id, "weight": "6.5"}, {"id": 999, "weight": "6.5"}, pet.id],
+            "delete": [999],
+        }).json()
+
+        self.assertFalse(data["ok"])
+        self.assertTrue(data["create"][0]["ok"])
+        self.assertEqual(data["create"][1], {"ok": False, "errors": {
+            "breed": "Esa raza no existe", "weight": "El peso debe ser mayor que 0",
+        }})
+        self.assertEqual(data["create"][2]["errors"], {"item": "Cada ítem tiene que ser un objeto"})
+        self.assertEqual(data["update"][1]["errors"], {"id": "Ese registro no existe"})
+        self.assertEqual(data["update"][2], {"ok": False, "errors": {"item": "Cada ítem tiene que ser un objeto"}})
+        self.assertEqual(data["delete"], [{"ok": False, "errors": {"id": "Ese registro no existe"}}])
+        self.assertEqual(Pet.objects.count(), 2)
+        pet.refresh_from_db()
+        self.assertEqual((pet.weight, pet.birthday), (6.5, date(2020, 5, 20)))
+
+    def test_created_rows_are_searchable_and_invalidate_the_listing(self):
+        version = TableVersion.objects.get(table="app.product").version
+
+        self.post("products", {"create": [{"name": "Alimento Premium", "type": "Alimento", "price": 1500}]})
+
+        self.assertEqual([result.name for result in search.search("premium")], ["Alimento Premium"])
+        self.assertEqual(TableVersion.objects.get(table="app.product").version, version + 1)
+
+    def test_values_of_the_wrong_type_are_item_errors(self):
+        client = {"name": "Juan", "phone": "54221555232", "email": "j@vetsoft.com", "city": self.city.id}
+        product = {"name": "Alimento", "type": "Alimento", "price": 1500}
+        vet = {"name": "Ana", "phone": "221555232", "email": "a@vetsoft.com"}
+        cases = [
+            ("clients", {**client, "email": 5}, "email", "El email debe ser un texto de hasta 254 caracteres"),
+            ("clients", {**client, "name": None}, "name", "Por favor ingrese un nombre"),
+            ("clients", {**client, "phone": "54" + "1" * 20}, "phone", "El teléfono puede tener hasta 19 dígitos"),
+            ("vets", {**vet, "name": None}, "name", "Por favor ingrese un nombre"),
+            ("vets", {**vet, "email": ["a@vetsoft.com"]}, "email", "El email debe ser un texto de hasta 254 caracteres"),
+            ("vets", {**vet, "phone": "5" * 40}, "phone", "El teléfono debe ser un texto de hasta 15 caracteres"),
+            ("products", {**product, "price": "nan"}, "price", "El precio debe ser un número válido"),
+            ("products", {**product, "price": "1e400"}, "price", "El precio debe ser un número válido"),
+            ("products", {**product, "price": True}, "price", "El precio debe ser un número válido"),
+            ("products", {**product, "name": "A" * 76}, "name", "El nombre debe ser un texto de hasta 75 caracteres"),
+            ("medicines", {"name": 5, "description": "x", "dose": 2}, "name",
+             "El nombre debe ser un texto de hasta 75 caracteres"),
+        ]
+        for entity, item, field, message in cases:
+            response = self.post(entity, {"create": [item]})
+
+            self.assertEqual(response.status_code, 200, item)
+            self.assertEqual(response.json()["create"], [{"ok": False, "errors": {field: message}}], item)
+        for model in (Client, Vet, Product, Medicine):
+            self.assertFalse(model.objects.exists())
+
+    def test_choices_come_from_the_reference_cache(self):
+        item = {"name": "Juan", "phone": "54221555232", "email": "j@vetsoft.com", "city": self.city.id}
+        self.post("clients", {"create": [item]})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.post("clients", {"create": [item]})
+
+        self.assertFalse(any('"app_city"' in query["sql"] for query in queries.captured_queries))
+        self.assertEqual(Client.objects.count(), 2)
+
+    def test_rejects_bodies_that_are_not_a_batch(self):
+        for body in ["[", "[]", '{"create": {}}', '{"borrar": []}']:
+            response = self.client.post(reverse("vets_api"), body, content_type="application/json")
+
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn("error", response.json())
+
+class SearchViewTest(TestCase):
+    def test_search_shows_results_with_links(self):
+        Provider.objects.create(name="Distribuidora Sur", phone="54100", email="p@vetsoft.com", address="Calle 7", floor_apartament="1")
+        Medicine.objects.create(name="ibuprofeno", description="Antiinflamatorio", dose=1.0)
+
+        response = self.client.get(reverse("search"), {"q": "distribuidora"})
+
+        self.assertTemplateUsed(response, "search/results.html")
+        self.assertContains(response, "Distribuidora Sur")
+        self.assertContains(response, reverse("providers_edit", kwargs={"id": 1}))
+        self.assertNotContains(response, "ibuprofeno")
+
+    def test_search_without_results(self):
+        response = self.client.get(reverse("search"), {"q": "nada"})
+        self.assertContains(response, "No se encontraron resultados")
+
+class ImportClientsCommandTest(TestCase):
+    def setUp(self):
+        self.city = City.objects.create(name='Berisso')
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "clientes.csv"
+        with self.path.open("w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "phone", "email", "city"])
+            writer.writerow(["Juan Sebastian Veron", "54221555232", "juan@vetsoft.com", self.city.id])
+            writer.writerow(["Guido Carrillo", "54221555233", "guido@vetsoft.com", self.city.id])
+            writer.writerow(["123", "44221", "guido@gmail.com", 999])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_imports_valid_rows_and_writes_rejected_ones(self):
+        call_command("import_clients", str(self.path), batch_size=2, stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Client.objects.values_list("name", flat=True)),
+            ["Guido Carrillo", "Juan Sebastian Veron"],
+        )
+        with self.path.with_suffix(".errores.csv").open(newline="") as f:
+            rejected = list(csv.DictReader(f))
+        self.assertEqual(len(rejected), 1)
+        self.assertEqual(rejected[0]["linea"], "4")
+        self.assertIn("Por favor ingrese solo caracteres permitidos", rejected[0]["errores"])
+        self.assertIn("El teléfono debe comenzar con '54' y ser un número", rejected[0]["errores"])
+        self.assertIn("Esa ciudad no existe", rejected[0]["errores"])
+
+    def test_rejected_rows_keep_the_columns_of_the_header(self):
+        with self.path.open("a", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Martin Palermo", "54221555234", "martin@gmail.com", self.city.id, "sobra"])
+            writer.writerow(["Martin Palermo", "54221555234"])
+
+        call_command("import_clients", str(self.path), stdout=StringIO())
+
+        with self.path.with_suffix(".errores.csv").open(newline="") as f:
+            rejected = list(csv.reader(f))
+        self.assertEqual(rejected[0], ["name", "phone", "email", "city", "linea", "errores"])
+        self.assertEqual(
+            rejected[2][:5], ["Martin Palermo", "54221555234", "martin@gmail.com", str(self.city.id), "5"],
+        )
+        self.assertEqual(rejected[3][:5], ["Martin Palermo", "54221555234", "", "", "6"])
+        self.assertEqual({len(row) for row in rejected}, {6})
+
+    def test_no_errors_file_without_rejected_rows(self):
+        with self.path.open("w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "phone", "email", "city"])
+            writer.writerow(["Juan Sebastian Veron", "54221555232", "juan@vetsoft.com", self.city.id])
+
+        call_command("import_clients", str(self.path), stdout=StringIO())
+
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertFalse(self.path.with_suffix(".errores.csv").exists())
+
+    def test_a_failure_still_invalidates_the_imported_batches(self):
+        before = versions.current(Client)
+        # el segundo lote falla después de insertar el primero
+        with mock.patch.object(validation.CLIENT, "validate_many", side_effect=[[{}, {}], RuntimeError]):
+            with self.assertRaises(RuntimeError):
+                call_command("import_clients", str(self.path), batch_size=2, stdout=StringIO())
+
+        self.assertEqual(Client.objects.count(), 2)
+        self.assertNotEqual(versions.current(Client), before)
+
+    def test_imported_clients_are_searchable(self):
+        call_command("import_clients", str(self.path), stdout=StringIO())
+
+        self.assertEqual(len(search.search("carrillo")), 1)
+
+        # los triggers vuelven a indexar fila por fila después de la carga
+        Client.objects.create(name="Martin Palermo", phone=54221, email="m@vetsoft.com", city=self.city)
+        self.assertEqual(len(search.search("palermo")), 1)
+
+class GenerateFixturesCommandTest(TestCase):
+    def test_inserts_the_generated_rows(self):
+        call_command("generate_fixtures", "--insert", "--clients", "30", "--batch-size", "7", stdout=StringIO())
+
+        self.assertEqual(Client.objects.count(), 30)
+        self.assertEqual(City.objects.count(), len(generator.CITIES))
+        self.assertTrue(search.search(Client.objects.first().name))
+
+    def test_refuses_to_insert_into_tables_with_data(self):
+        City.objects.create(name='Berisso')
+
+        with self.assertRaises(CommandError):
+            call_command("generate_fixtures", "--insert", stdout=StringIO())
+
+    def test_writes_loadable_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "data.jsonl"
+            call_command("generate_fixtures", "--output", str(path), stdout=StringIO())
+            call_command("loaddata", str(path), stdout=StringIO())
+
+        self.assertEqual(Pet.objects.count(), generator.COUNTS["pet"])
+
+@override_settings(METRICS=True)
+class RouteBenchmarkTest(TestCase):
+    def test_every_route_is_benchmarked(self):
+        labels = {label.split()[1] for label, _, _ in route_requests(10)}
+
+        for pattern in urlpatterns:
+            self.assertIn(pattern.name, labels)
+
+    def test_every_benchmark_request_succeeds(self):
+        insert(dict.fromkeys(generator.COUNTS, 3), 0, 100)
+
+        results = run_requests(self.client, route_requests(3), 2)
+
+        for label, result in results.items():
+            self.assertEqual(result["errors"], 0, label)
+        self.assertGreater(results["GET clients_repo"]["bytes"], 0)
+        # altas del formulario y de la API por lotes, menos los borrados
+        self.assertEqual(Client.objects.count(), 3 + 2 + 2 * 10 - 2)
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.breed = Breed.objects.create(name='Ovejero Aleman')
+        for name in ["Firulais", "Rex", "Luna"]:
+            Pet.objects.create(name=name, breed=self.breed, weight=5.0, birthday="2020-05-20")
+
+    def test_export_csv_is_streamed(self):
+        response = self.client.get(reverse("pets_export", kwargs={"fmt": "csv"}))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="mascotas.csv"')
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], ["id", "name", "breed_name", "birthday", "weight"])
+        self.assertEqual(rows[1][1:], ["Firulais", "Ovejero Aleman", "2020-05-20", "5.0"])
+        self.assertEqual(len(rows), 4)
+
+    def test_export_jsonl(self):
+        response = self.client.get(reverse("pets_export", kwargs={"fmt": "jsonl"}))
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["name"] for line in lines], ["Firulais", "Rex", "Luna"])
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse("pets_export", kwargs={"fmt": "xml"}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "mascotas.jsonl"
+            call_command("export", "pets", "--format", "jsonl", "--output", str(output), stdout=StringIO())
+            self.assertEqual(len(output.read_text().splitlines()), 3)
+
 class ClientsTest(TestCase):
     def test_repo_use_repo_template(self):
         response = self.client.get(reverse("clients_repo"))
@@ -258,6 +877,23 @@ class ClientsTest(TestCase):
 
         self.assertContains(response, "Por favor ingrese un email valido")
 
+    def test_validation_too_long_values(self):
+        city = City.objects.create(name='Berisso')
+        response = self.client.post(
+            reverse("clients_form"),
+            data={
+                "name": "A" * 101,
+                "phone": "54" + "1" * 20,
+                "city": city.id,
+                "email": "a" * 250 + "@vetsoft.com",
+            },
+        )
+
+        self.assertContains(response, "El nombre debe ser un texto de hasta 100 caracteres")
+        self.assertContains(response, "El teléfono puede tener hasta 19 dígitos")
+        self.assertContains(response, "El email debe ser un texto de hasta 254 caracteres")
+        self.assertFalse(Client.objects.exists())
+
     def test_edit_user_with_valid_data(self):
         city = City.objects.create(name='Berisso')
         client = Client.objects.create(
@@ -366,6 +1002,23 @@ class ProviderIntegrationTest(TestCase):
 
         self.assertContains(response, "Por favor ingrese un email valido")
 
+    def test_validation_too_long_values(self):
+        response = self.client.post(
+            reverse("providers_form"),
+            data={
+                "name": "Proveedor XYZ",
+                "phone": "9" * 16,
+                "email": "proveedor@ejemplo.com",
+                "address": "A" * 101,
+                "floor_apartament": "A" * 101,
+            },
+        )
+
+        self.assertContains(response, "El teléfono debe ser un texto de hasta 15 caracteres")
+        self.assertContains(response, "La dirección debe ser un texto de hasta 100 caracteres")
+        self.assertContains(response, "El piso debe ser un texto de hasta 100 caracteres")
+        self.assertFalse(Provider.objects.exists())
+
 class MedicinesIntegrationTest(TestCase):
     def test_can_create_medicine_and_view_in_list(self):
         medicine_data = {
@@ -376,6 +1029,16 @@ class MedicinesIntegrationTest(TestCase):
 
         response = self.client.post(reverse('medicines_form'), data=medicine_data)
         self.assertTrue(response.status_code < 400)
+
+    def test_validation_too_long_values(self):
+        response = self.client.post(
+            reverse("medicines_form"),
+            data={"name": "A" * 76, "description": "A" * 256, "dose": 1.0},
+        )
+
+        self.assertContains(response, "El nombre debe ser un texto de hasta 75 caracteres")
+        self.assertContains(response, "La descripción debe ser un texto de hasta 255 caracteres")
+        self.assertFalse(Medicine.objects.exists())
         
     def test_update_medicine(self):
             medicine = Medicine.objects.create(
@@ -407,6 +1070,16 @@ class MedicinesIntegrationTest(TestCase):
             self.assertEqual(updated_medicine.dose, updated_data["dose"])
 
 class ProductsIntegrationTest(TestCase):
+    def test_validation_too_long_values(self):
+        response = self.client.post(
+            reverse("products_form"),
+            data={"name": "A" * 76, "type": "A" * 26, "price": 100.0},
+        )
+
+        self.assertContains(response, "El nombre debe ser un texto de hasta 75 caracteres")
+        self.assertContains(response, "El tipo debe ser un texto de hasta 25 caracteres")
+        self.assertFalse(Product.objects.exists())
+
     def test_update_product(self):
         product = Product.objects.create(
             name="Producto Test",
@@ -437,6 +1110,16 @@ class ProductsIntegrationTest(TestCase):
         self.assertEqual(updated_product.price, updated_data["price"])
 
 class VetsIntegrationTest(TestCase):
+    def test_validation_too_long_values(self):
+        response = self.client.post(
+            reverse("vets_form"),
+            data={"name": "A" * 101, "phone": "5" * 16, "email": "vet@test.com"},
+        )
+
+        self.assertContains(response, "El nombre debe ser un texto de hasta 100 caracteres")
+        self.assertContains(response, "El teléfono debe ser un texto de hasta 15 caracteres")
+        self.assertFalse(Vet.objects.exists())
+
     def test_update_vet(self):
         vet = Vet.objects.create(
             name="Veterinario Test",
@@ -486,4 +1169,413 @@ class PetsIntegrationTest(TestCase):
         self.assertEqual(pets[0].name, "K-nine")
         self.assertEqual(pets[0].breed, Breed.objects.get(pk=1))
         self.assertEqual(pets[0].birthday, date(2024, 5, 20))
-        self.assertEqual(pets[0].weight, 15.5)
\ No newline at end of file
+        self.assertEqual(pets[0].weight, 15.5)
+
+    def test_form_rejects_an_unknown_breed_and_a_too_long_name(self):
+        response = self.client.post(
+            reverse("pets_form"),
+            data={"name": "A" * 101, "breed": 999, "birthday": "2024-05-20", "weight": 15.5},
+        )
+
+        self.assertContains(response, "El nombre debe ser un texto de hasta 100 caracteres")
+        self.assertContains(response, "Esa raza no existe")
+        self.assertFalse(Pet.objects.exists())
+
+class StaticFilesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls.root.cleanup)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.root.name))
+        call_command("collectstatic", interactive=False, verbosity=0, ignore_patterns=["admin"])
+
+    def setUp(self):
+        # el esqueleto de las páginas tiene las URLs de los archivos estáticos
+        shell.clear()
+        self.addCleanup(shell.clear)
+
+    def asset_urls(self):
+        html = DjangoClient().get(reverse("home")).content.decode()
+        return re.findall(r'(?:href|src)="(/static/[^"]+)"', html)
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        css = Path(self.root.name, "vendor/bootstrap-5.3.3/css")
+        hashed = [path.name for path in css.glob("bootstrap.min.*.css")]
+
+        self.assertEqual(len(hashed), 1)
+        self.assertTrue((css / f"{hashed[0]}.gz").exists())
+        self.assertTrue((css / f"{hashed[0]}.br").exists())
+        # las fuentes woff2 ya vienen comprimidas
+        self.assertFalse(list(Path(self.root.name).glob("**/*.woff2.*")))
+
+    def test_pages_use_the_local_hashed_assets(self):
+        urls = self.asset_urls()
+
+        self.assertEqual(len(urls), 3)
+        for url in urls:
+            self.assertRegex(url, r"\.[0-9a-f]{12}\.(css|js)$")
+
+    def test_assets_are_served_precompressed_and_cached_for_a_year(self):
+        client = DjangoClient()
+        for url in self.asset_urls():
+            original = b"".join(client.get(url).streaming_content)
+            for encoding, decompress in [("br", brotli.decompress), ("gzip", gzip.decompress)]:
+                with self.subTest(url=url, encoding=encoding):
+                    response = client.get(url, HTTP_ACCEPT_ENCODING=f"{encoding}, deflate")
+
+                    self.assertEqual(response["Content-Encoding"], encoding)
+                    self.assertEqual(response["Vary"], "Accept-Encoding")
+                    self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+                    self.assertEqual(decompress(b"".join(response.streaming_content)), original)
+
+    def test_names_without_hash_are_revalidated(self):
+        client = DjangoClient()
+        response = client.get("/static/vendor/bootstrap-5.3.3/css/bootstrap.min.css")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(
+            client.get(
+                "/static/vendor/bootstrap-5.3.3/css/bootstrap.min.css", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+            ).status_code,
+            304,
+        )
+        self.assertEqual(client.get("/static/vendor/nada.css").status_code, 404)
+
+
+class CompressionMiddlewareTest(TestCase):
+    def setUp(self):
+        city = City.objects.create(name="La Plata")
+        Client.objects.bulk_create(
+            Client(name=f"Cliente {i}", phone=f"54221{i}", email=f"cliente{i}@vetsoft.com", city=city)
+            for i in range(30)
+        )
+
+    def test_pages_are_compressed_with_the_encoding_the_browser_accepts(self):
+        page = self.client.get(reverse("search"), {"q": "cliente"})
+        self.assertNotIn("Content-Encoding", page)
+
+        for accept, encoding, decompress in [
+            ("gzip, deflate, br", "br", brotli.decompress),
+            ("gzip, deflate", "gzip", gzip.decompress),
+        ]:
+            with self.subTest(encoding=encoding):
+                response = self.client.get(reverse("search"), {"q": "cliente"}, HTTP_ACCEPT_ENCODING=accept)
+
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertEqual(response["Vary"], "Accept-Encoding")
+                self.assertLess(len(response.content), len(page.content) / 5)
+                self.assertEqual(decompress(response.content), page.content)
+
+    def test_pages_with_the_csrf_token_are_gzip_with_random_padding(self):
+        page = self.client.get(reverse("clients_repo"))
+
+        responses = [
+            self.client.get(reverse("clients_repo"), HTTP_ACCEPT_ENCODING="gzip, deflate, br") for _ in range(10)
+        ]
+
+        for response in responses:
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(response["ETag"], f"W/{page['ETag']}")
+            self.assertEqual(response.content[3], gzip.FNAME)
+            # el token CSRF cambia en cada render
+            self.assertEqual(
+                re.sub(rb'csrfmiddlewaretoken" value="\w+"', b"", gzip.decompress(response.content)),
+                re.sub(rb'csrfmiddlewaretoken" value="\w+"', b"", page.content),
+            )
+        self.assertGreater(len({response.content.index(b"\x00", 10) for response in responses}), 1)
+
+        response = self.client.get(reverse("clients_repo"), HTTP_ACCEPT_ENCODING="br")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_streaming_exports_are_compressed_as_they_are_generated(self):
+        export = b"".join(self.client.get(reverse("clients_export", kwargs={"fmt": "csv"})).streaming_content)
+
+        response = self.client.get(reverse("clients_export", kwargs={"fmt": "csv"}), HTTP_ACCEPT_ENCODING="br")
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertNotIn("Content-Length", response)
+        self.assertEqual(brotli.decompress(b"".join(response.streaming_content)), export)
+
+    @override_settings(COMPRESSION_MIN_SIZE=10**7)
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(reverse("clients_repo"), HTTP_ACCEPT_ENCODING="br")
+
+        self.assertNotIn("Content-Encoding", response)
+        self.assertNotIn("Vary", response)
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = Path(tmp.name)
+        settings = override_settings(PROFILING_TOKEN="secreto", PROFILING_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        City.objects.create(name="La Plata")
+
+    def test_only_requests_with_the_token_are_profiled(self):
+        self.client.get(reverse("clients_repo"))
+        self.client.get(reverse("clients_repo"), HTTP_X_PROFILE="otro")
+        self.assertEqual(list(self.directory.glob("*.pstats")), [])
+
+        response = self.client.get(reverse("clients_repo"), HTTP_X_PROFILE="secreto")
+
+        files = list(self.directory.glob("*.pstats"))
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].name.startswith("clients_repo."))
+        self.assertEqual(response["X-Profile-File"], files[0].name)
+
+    @override_settings(PROFILING_MAX_FILES=2)
+    def test_only_the_last_profiles_are_kept(self):
+        names = [
+            self.client.get(reverse(view), HTTP_X_PROFILE="secreto")["X-Profile-File"]
+            for view in ("clients_repo", "pets_repo", "products_repo")
+        ]
+
+        self.assertEqual(sorted(file.name for file in self.directory.glob("*.pstats")), sorted(names[1:]))
+
+    def test_report_groups_the_profiles_by_view(self):
+        for _ in range(2):
+            self.client.get(reverse("clients_repo"), HTTP_X_PROFILE="secreto")
+        self.client.get(reverse("pets_form"), HTTP_X_PROFILE="secreto")
+
+        requests, stats = profiling.load(self.directory)["clients_repo"]
+        self.assertEqual(requests, 2)
+        self.assertAlmostEqual(sum(profiling.breakdown(stats).values()), stats.total_tt)
+
+        out = StringIO()
+        call_command("profile_report", dir=self.directory, view="clients_repo", stdout=out)
+        self.assertIn("=== clients_repo: 2 requests", out.getvalue())
+        self.assertNotIn("pets_form", out.getvalue())
+        for category in [*profiling.CATEGORIES, "otros"]:
+            self.assertIn(category, out.getvalue())
+
+    def test_report_without_profiles_fails(self):
+        with self.assertRaises(CommandError):
+            call_command("profile_report", dir=self.directory, stdout=StringIO())
+
+
+@override_settings(METRICS=True)
+class MetricsTest(TestCase):
+    def setUp(self):
+        city = City.objects.create(name="La Plata")
+        Client.objects.create(name="Juan Sebastian Veron", phone="54221555232", email="brujita75@vetsoft.com", city=city)
+
+    def sample(self, name, view, **labels):
+        return metrics.REGISTRY.get_sample_value(name, {"view": view, "method": "GET", **labels}) or 0
+
+    def test_requests_are_recorded_by_view(self):
+        before = {
+            name: self.sample(name, "clients_repo")
+            for name in ("vetsoft_db_queries_sum", "vetsoft_template_render_seconds_sum", "vetsoft_response_bytes_sum")
+        }
+        requests = self.sample("vetsoft_requests_total", "clients_repo", status="200")
+
+        response = self.client.get(reverse("clients_repo"))
+
+        self.assertEqual(self.sample("vetsoft_requests_total", "clients_repo", status="200"), requests + 1)
+        self.assertEqual(self.sample("vetsoft_db_queries_sum", "clients_repo") - before["vetsoft_db_queries_sum"], 2)
+        self.assertGreater(
+            self.sample("vetsoft_template_render_seconds_sum", "clients_repo"),
+            before["vetsoft_template_render_seconds_sum"],
+        )
+        self.assertEqual(
+            self.sample("vetsoft_response_bytes_sum", "clients_repo") - before["vetsoft_response_bytes_sum"],
+            len(response.content),
+        )
+
+    def test_metrics_are_exposed_in_prometheus_format(self):
+        self.client.get(reverse("clients_repo"))
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertContains(response, 'vetsoft_request_duration_seconds_bucket{le="0.005",method="GET",view="clients_repo"}')
+
+    @override_settings(METRICS=False)
+    def test_metrics_can_be_disabled(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+    def test_metrics_of_every_process_are_added_up(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": tmp}):
+            for _ in range(2):
+                subprocess.run(
+                    [sys.executable, "-c", "from app import metrics; metrics.LATENCY.labels('pets_repo', 'GET').observe(0.02)"],
+                    cwd=Path(__file__).resolve().parent.parent,
+                    check=True,
+                )
+
+            body, _ = metrics.exposition()
+
+        self.assertIn(b'vetsoft_request_duration_seconds_count{method="GET",view="pets_repo"} 2.0', body)
+
+
+class AccessLogTest(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = Path(tmp.name)
+        settings = override_settings(ACCESS_LOG_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(accesslog.close)
+        self.city = City.objects.create(name="La Plata")
+
+    def test_every_request_is_logged_as_a_json_line(self):
+        self.client.get(reverse("clients_repo"))
+        self.client.post(
+            reverse("clients_form"),
+            data={"name": "Juan Sebastian Veron", "phone": "54221555232", "city": self.city.id, "email": "brujita75@vetsoft.com"},
+        )
+        accesslog.close()
+
+        listing, form = accesslog.load(self.directory)
+        self.assertEqual(
+            {key: listing[key] for key in ("view", "method", "path", "status", "queries", "model_methods")},
+            {"view": "clients_repo", "method": "GET", "path": "/clientes/", "status": 200, "queries": 2, "model_methods": []},
+        )
+        self.assertGreater(listing["template_ms"], 0)
+        self.assertGreaterEqual(listing["duration_ms"], listing["template_ms"])
+        self.assertEqual((form["view"], form["method"], form["status"]), ("clients_form", "POST", 302))
+        self.assertIn("Client.save_client", form["model_methods"])
+
+    def test_logstats_computes_percentiles_by_route(self):
+        for _ in range(3):
+            self.client.get(reverse("clients_repo"))
+        self.client.get(reverse("pets_repo"))
+        accesslog.close()
+
+        out = StringIO()
+        call_command("logstats", dir=self.directory, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertIn("p95 (ms)", lines[0])
+        self.assertEqual(
+            {line.split()[1]: int(line.split()[2]) for line in lines[1:]},
+            {"clients_repo": 3, "pets_repo": 1},
+        )
+
+    def test_logstats_without_requests_fails(self):
+        with self.assertRaises(CommandError):
+            call_command("logstats", dir=self.directory, stdout=StringIO())
+
+    def test_records_are_dropped_and_counted_when_the_queue_is_full(self):
+        release = threading.Event()
+
+        def run(writer, run=accesslog.Writer._run):
+            # el thread no escribe hasta que se lo deja
+            release.wait()
+            run(writer)
+
+        with mock.patch.object(accesslog.Writer, "_run", run):
+            writer = accesslog.Writer(self.directory / "access.jsonl", 2)
+        self.addCleanup(writer.close)
+        self.addCleanup(release.set)
+
+        with self.assertLogs("app.accesslog", "WARNING"):
+            queued = [writer.write({"number": number}) for number in range(5)]
+
+        self.assertEqual(queued, [True, True, False, False, False])
+        self.assertEqual(writer.dropped, 3)
+        release.set()
+        writer.close()
+        self.assertEqual([record["number"] for record in accesslog.load(self.directory)], [0, 1])
+
+    def test_dropped_records_are_exposed_in_the_metrics(self):
+        dropped = metrics.REGISTRY.get_sample_value("vetsoft_access_log_dropped_total")
+
+        with mock.patch.object(accesslog, "write", return_value=False):
+            self.client.get(reverse("clients_repo"))
+
+        self.assertEqual(metrics.REGISTRY.get_sample_value("vetsoft_access_log_dropped_total"), dropped + 1)
+
+
+class ServeCommandTest(TestCase):
+    root = Path(__file__).resolve().parent.parent
+
+    @contextmanager
+    def serve(self, tmp, *args, **env):
+        """runs "manage.py serve" with the arguments over a database in ``tmp`` and yields its port"""
+        env = {
+            **os.environ, "ALLOWED_HOSTS": "127.0.0.1", "DB_NAME": f"{tmp}/db.sqlite3",
+            "PROMETHEUS_MULTIPROC_DIR": f"{tmp}/metrics", **env,
+        }
+        process = subprocess.Popen(
+            [sys.executable, "manage.py", "serve", "127.0.0.1:0", *args],
+            cwd=self.root, env=env, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            line = ""
+            while "Escuchando" not in line:
+                line = process.stdout.readline()
+                if not line:
+                    self.fail(f"serve terminó sin escuchar (código {process.wait()})")
+            yield int(re.search(r":(\d+) ", line).group(1))
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+            process.stdout.close()
+        self.assertEqual(process.returncode, 0)
+
+    def test_workers_keep_connections_alive_and_are_recycled(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.serve(tmp, "--workers", "1", "--max-requests", "2", ACCESS_LOG_DIR=f"{tmp}/logs") as port:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                responses = []
+                for _ in range(5):
+                    connection.request("GET", reverse("home"))
+                    response = connection.getresponse()
+                    response.read()
+                    responses.append((response.status, response.getheader("Connection")))
+                connection.close()
+
+            # el segundo request de cada worker avisa que cierra la conexión
+            self.assertEqual(responses, [(200, None), (200, "close")] * 2 + [(200, None)])
+            self.assertEqual(len(list(Path(tmp, "logs").glob("*.jsonl"))), 3)
+            self.assertEqual(len(accesslog.load(Path(tmp, "logs"))), 5)
+
+    def test_workers_share_the_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            subprocess.run(
+                [sys.executable, "manage.py", "migrate", "--verbosity", "0"],
+                cwd=self.root, env={**os.environ, "DB_NAME": f"{tmp}/db.sqlite3"}, check=True,
+            )
+            with sqlite3.connect(f"{tmp}/db.sqlite3") as database:
+                database.execute("INSERT INTO app_city (name) VALUES ('La Plata')")
+            cache = {
+                "CACHE_BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "CACHE_LOCATION": f"{tmp}/cache",
+            }
+
+            def get(port, path, method="GET", body=None):
+                # una conexión por request, para que los atiendan distintos workers
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                headers = {"Content-Type": "application/x-www-form-urlencoded"} if body else {}
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                content = response.read().decode()
+                connection.close()
+                return response.status, content
+
+            with self.serve(tmp, "--workers", "3", **cache) as port:
+                # cada worker guarda la tabla del listado vacía
+                before = [get(port, reverse("clients_repo")) for _ in range(9)]
+                created = get(
+                    port, reverse("clients_form"), "POST",
+                    "name=Juan+Sebastian+Veron&phone=54221555232&email=brujita75%40vetsoft.com&city=1",
+                )
+                after = [get(port, reverse("clients_repo")) for _ in range(9)]
+
+            self.assertEqual(created[0], 302)
+            self.assertFalse(any("Juan Sebastian Veron" in content for _, content in before))
+            self.assertEqual([(status, "Juan Sebastian Veron" in content) for status, content in after], [(200, True)] * 9)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_several_workers_need_a_shared_cache(self):
+        with self.assertRaisesMessage(CommandError, "LocMemCache"):
+            call_command("serve", "127.0.0.1:0", workers=2, stdout=StringIO())
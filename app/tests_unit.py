@@ -1,9 +1,24 @@
+import gzip
+import re
+import types
+
+import brotli
+
+from django.conf import settings
 from django.forms import ValidationError
-from django.test import TestCase, Client as DjangoClient
-from django.urls import reverse
+from django.db import connections
+from django.test import TestCase, Client as DjangoClient, override_settings
+from django.template.loader import render_to_string
+from django.urls import include, path, reverse, set_script_prefix
 from app.models import Breed, City, Client, Medicine, Pet, Product, Provider, Vet
+from app import api, compression, db, listing, search, shell, templating, validation, versions
+from app.benchmarks import percentile, regressions
+from app.explain import explain
+from app.pagination import keyset_page
+from app.queries import QueryCapture, QueryReport, fingerprint
 from app.views import ClientRepositoryView, ProviderFormView
 from datetime import date, timedelta
+from fixtures import generator
 
 class ClientModelTest(TestCase):
     def test_cant_create_user_with_not_valid_name(self):
@@ -429,3 +444,423 @@ class CityModelTest(TestCase):
 
         for i, city in enumerate(cities):
             self.assertEqual(city.name, valid_names[i])
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        for i in range(5):
+            Product.objects.create(name=f"Producto {i}", type="Tipo", price=10.0)
+        self.ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+
+    def test_first_page(self):
+        page = keyset_page(Product.objects.all(), size=2)
+        self.assertEqual([p.id for p in page], self.ids[:2])
+        self.assertEqual(page.next_cursor, self.ids[1])
+        self.assertFalse(page.has_prev)
+
+    def test_next_and_prev_pages(self):
+        page = keyset_page(Product.objects.all(), after=self.ids[1], size=2)
+        self.assertEqual([p.id for p in page], self.ids[2:4])
+        self.assertTrue(page.has_next)
+
+        prev_page = keyset_page(Product.objects.all(), before=page.prev_cursor, size=2)
+        self.assertEqual([p.id for p in prev_page], self.ids[:2])
+        self.assertFalse(prev_page.has_prev)
+        self.assertEqual(prev_page.next_cursor, self.ids[1])
+
+    def test_last_page_has_no_next(self):
+        page = keyset_page(Product.objects.all(), after=self.ids[3], size=2)
+        self.assertEqual([p.id for p in page], self.ids[4:])
+        self.assertFalse(page.has_next)
+
+    def test_invalid_cursor_returns_first_page(self):
+        page = keyset_page(Product.objects.all(), after="abc", size=2)
+        self.assertEqual([p.id for p in page], self.ids[:2])
+
+class ListingTest(TestCase):
+    def test_pet_rows_include_breed_name(self):
+        breed = Breed.objects.create(name="Ovejero Aleman")
+        Pet.objects.create(name="Firulais", breed=breed, weight=5.0, birthday="2020-01-01")
+
+        page = listing.PETS.page()
+
+        self.assertEqual(len(page), 1)
+        self.assertIsInstance(page.object_list[0], listing.PetRow)
+        self.assertEqual(page.object_list[0].breed_name, "Ovejero Aleman")
+        self.assertEqual(page.object_list[0].birthday, date(2020, 1, 1))
+
+class QueryReportTest(TestCase):
+    def test_fingerprint_ignores_literal_values(self):
+        self.assertEqual(
+            fingerprint('SELECT "id" FROM "app_city" WHERE "id" = 12 AND "name" IN (%s, %s)'),
+            fingerprint('SELECT "id" FROM "app_city" WHERE "id" = 7 AND "name" IN (%s)'),
+        )
+
+    def test_detects_n_plus_one_with_its_origin(self):
+        city = City.objects.create(name="Berisso")
+        for i in range(3):
+            Client.objects.create(name="Juan", phone=54221, email="j@vetsoft.com", city=city)
+
+        with QueryCapture() as capture:
+            for client in Client.objects.all():
+                client.update_client({"city": city.id})
+
+        report = QueryReport("clientes", capture.queries, threshold=3)
+        self.assertFalse(report.ok)
+        self.assertIn("Client.update_client", str(report))
+
+    def test_over_budget(self):
+        with QueryCapture() as capture:
+            list(City.objects.all())
+            list(Breed.objects.all())
+
+        self.assertTrue(QueryReport("vista", capture.queries, budget=1).over_budget)
+        self.assertTrue(QueryReport("vista", capture.queries, budget=2).ok)
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.city = City.objects.create(name="Berisso")
+        self.client_obj = Client.objects.create(
+            name="Juan Sebastián Veron", phone=54221555232, email="brujita75@vetsoft.com", city=self.city,
+        )
+
+    def test_finds_by_prefix_and_without_accents(self):
+        results = search.search("sebastian ver")
+        self.assertEqual([(r.kind, r.id) for r in results], [("client", self.client_obj.id)])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.client_obj.update_client({"name": "Guido Carrillo"})
+        self.assertEqual(search.search("veron"), [])
+        self.assertEqual(len(search.search("carrillo")), 1)
+
+        self.client_obj.delete()
+        self.assertEqual(search.search("carrillo"), [])
+
+    def test_rebuild(self):
+        Product.objects.create(name="Alimento balanceado", type="Perro", price=10.0)
+        search.rebuild()
+        self.assertEqual([r.kind for r in search.search("perro")], ["product"])
+        self.assertEqual(len(search.search("brujita75")), 1)
+
+    def test_triggers_survive_every_migration(self):
+        # la base de los tests se crea con todas las migraciones: una que
+        # vuelva a crear una tabla indexada sin crear de nuevo sus triggers
+        # la deja sin ellos
+        with connections["default"].cursor() as cursor:
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+            triggers = dict(cursor.fetchall())
+
+        names = [f"app_search_{kind}_{action}" for kind in search.SOURCES for action in ("insert", "update", "delete")]
+        self.assertEqual(sorted(triggers), sorted(names))
+        for kind in search.SOURCES:
+            self.assertIn("app_search_paused", triggers[f"app_search_{kind}_insert"])
+
+        Pet.objects.create(name="Firulais", breed=Breed.objects.create(name="Caniche"), weight=5.0, birthday="2020-05-20")
+        self.assertEqual([r.kind for r in search.search("firulais")], ["pet"])
+
+class FixtureGeneratorTest(TestCase):
+    def test_same_seed_generates_the_same_rows(self):
+        self.assertEqual(list(generator.generate(seed=7)), list(generator.generate(seed=7)))
+        self.assertNotEqual(list(generator.generate(seed=7)), list(generator.generate(seed=8)))
+
+    def test_count_of_a_model_does_not_change_the_others(self):
+        few = [row for row in generator.generate({"client": 5}) if row[0] == "pet"]
+        many = [row for row in generator.generate({"client": 500}) if row[0] == "pet"]
+
+        self.assertEqual(few, many)
+
+    def test_generated_rows_pass_the_validations(self):
+        City.objects.bulk_create(City(name=name) for name in generator.CITIES)
+        Breed.objects.bulk_create(Breed(name=name) for name in generator.BREEDS)
+        # bulk_create no manda señales
+        versions.touch(City, Breed)
+        validators = {
+            "client": Client.validate_client,
+            "pet": Pet.validate_pet,
+            "product": Product.validate_product,
+            "medicine": Medicine.validate_medicine,
+            "vet": Vet.validate_vet,
+            "provider": Provider.validate_provider,
+        }
+        for model, fields in generator.generate({"client": 50, "pet": 50}):
+            if model in validators:
+                data = {key: str(value) for key, value in fields.items()}
+                self.assertFalse(validators[model](data), fields)
+
+class BenchmarkResultsTest(TestCase):
+    def test_percentile_uses_the_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_flags_slower_routes_and_more_queries(self):
+        baseline = {
+            "GET clients_repo": {"p50_ms": 10.0, "queries": 2},
+            "GET pets_repo": {"p50_ms": 10.0, "queries": 2},
+            "GET vets_repo": {"p50_ms": 10.0, "queries": 2},
+        }
+        results = {
+            "GET clients_repo": {"p50_ms": 11.0, "queries": 2},
+            "GET pets_repo": {"p50_ms": 13.0, "queries": 2},
+            "GET vets_repo": {"p50_ms": 9.0, "queries": 3},
+            "GET home": {"p50_ms": 1.0, "queries": 0},
+        }
+
+        found = [label for label, _ in regressions(results, baseline, 0.2)]
+
+        self.assertEqual(found, ["GET pets_repo", "GET vets_repo"])
+
+class ExplainTest(TestCase):
+    def plan(self, queryset):
+        return explain(*queryset.query.sql_with_params())
+
+    def test_indexed_lookups_do_not_scan(self):
+        self.assertTrue(self.plan(Client.objects.filter(email="juan@vetsoft.com")).ok)
+        self.assertTrue(self.plan(Client.objects.filter(phone=54221555232)).ok)
+        self.assertTrue(self.plan(Pet.objects.filter(breed=1).order_by("birthday")).ok)
+        self.assertTrue(self.plan(Product.objects.filter(type="Alimento").order_by("price")).ok)
+        self.assertTrue(self.plan(Provider.objects.filter(name="Distribuidora Perez")).ok)
+
+    def test_flags_filtering_by_a_column_without_index(self):
+        plan = self.plan(Client.objects.filter(name="Juan Sebastian Veron"))
+
+        self.assertFalse(plan.ok)
+        self.assertEqual(plan.full_scans, ["app_client"])
+
+    def test_flags_sorting_without_index(self):
+        plan = self.plan(Client.objects.order_by("name")[:50])
+
+        self.assertFalse(plan.ok)
+        self.assertEqual(plan.temp_sorts, 1)
+
+    def test_reading_a_whole_table_or_its_first_rows_is_expected(self):
+        self.assertTrue(self.plan(City.objects.all()).ok)
+        self.assertTrue(self.plan(listing.CLIENTS.queryset().order_by("id")[:51]).ok)
+
+
+
+class DatabaseProfileTest(TestCase):
+    def new_connection(self):
+        connection = connections.create_connection("default")
+        connection.ensure_connection()
+        self.addCleanup(connection.close)
+        return connection
+
+    def test_production_profile_applies_the_pragmas_to_new_connections(self):
+        with override_settings(DB_PROFILE="production"):
+            current = db.pragmas(self.new_connection())
+
+        self.assertEqual(current["synchronous"], 1)  # NORMAL
+        self.assertEqual(current["cache_size"], -64 * 2**10)
+        self.assertEqual(current["temp_store"], 2)  # MEMORY
+
+    def test_default_profile_leaves_sqlite_defaults(self):
+        with override_settings(DB_PROFILE="default"):
+            current = db.pragmas(self.new_connection())
+
+        self.assertEqual(current["synchronous"], 2)  # FULL
+        self.assertEqual(current["temp_store"], 0)  # DEFAULT
+
+
+class ValidationTest(TestCase):
+    def test_validate_many_checks_every_row_like_validate(self):
+        rows = [
+            {"name": "Juan Sebastian Veron", "phone": "54221555232", "email": "juan@vetsoft.com", "city": "1"},
+            {"name": "Juan 2", "phone": "221555232", "email": "juan@gmail.com", "city": "3"},
+            {},
+        ]
+
+        errors = validation.CLIENT.validate_many(rows, {"city": {1, 2}})
+
+        self.assertEqual(errors, [validation.CLIENT.validate(row, {"city": {1, 2}}) for row in rows])
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1], {
+            "name": "Por favor ingrese solo caracteres permitidos",
+            "phone": "El teléfono debe comenzar con '54' y ser un número",
+            "email": 'El email debe finalizar con "@vetsoft.com"',
+            "city": "Esa ciudad no existe",
+        })
+        self.assertEqual(list(errors[2]), ["name", "phone", "email", "city"])
+
+    def test_choice_accepts_a_function(self):
+        errors = validation.CLIENT.validate(
+            {"name": "Juan", "phone": "54221", "email": "juan@vetsoft.com", "city": "7"},
+            {"city": lambda city: city == "7"},
+        )
+
+        self.assertEqual(errors, {})
+
+    def test_the_first_failing_rule_gives_the_error(self):
+        self.assertEqual(validation.PET.validate({"birthday": "2020-02-30"})["birthday"], "La fecha de nacimiento no es válida.")
+        self.assertEqual(validation.PET.validate({"weight": "-1"})["weight"], "El peso debe ser mayor que 0")
+        self.assertEqual(validation.MEDICINE.validate({"dose": "11"})["dose"], "Las dosis deben estar entre 1 y 10")
+
+    def test_prices_and_doses_that_are_not_numbers_are_errors(self):
+        self.assertEqual(
+            Product.validate_product({"name": "Alimento", "type": "Alimento", "price": "caro"}),
+            {"price": "El precio debe ser un número válido"},
+        )
+        self.assertEqual(
+            Medicine.validate_medicine({"name": "Ibuprofeno", "description": "x", "dose": "mucha"}),
+            {"dose": "La dosis debe ser un número válido"},
+        )
+
+    def test_text_rules_match_the_max_length_of_the_models(self):
+        tables = [
+            (Client, validation.CLIENT), (Product, validation.PRODUCT), (Medicine, validation.MEDICINE),
+            (Vet, validation.VET), (Provider, validation.PROVIDER), (Pet, validation.PET),
+        ]
+        for model, validator in tables:
+            for field, rules in validator.rules.items():
+                limits = [argument for kind, argument, _ in rules if kind == "text"]
+                model_field = model._meta.get_field(field)
+                if model_field.get_internal_type() in ("CharField", "EmailField"):
+                    self.assertEqual(limits, [model_field.max_length], f"{model.__name__}.{field}")
+
+
+class DeleteRowsTest(TestCase):
+    def test_deleted_models_have_no_dependent_rows(self):
+        # api.delete_rows (los borrados de la API y de los formularios) hace un
+        # DELETE directo, sin las cascadas de QuerySet.delete(): si otro modelo
+        # apunta a uno de estos, o gana un muchos a muchos, hay que cambiarlo
+        for entity in api.ENTITIES.values():
+            relations = [
+                field.name for field in entity.model._meta.get_fields()
+                if field.is_relation and (field.auto_created or field.many_to_many)
+            ]
+            self.assertEqual(relations, [], entity.model.__name__)
+
+        # las razas sí tienen mascotas
+        self.assertNotEqual(
+            [field.name for field in Breed._meta.get_fields() if field.auto_created and field.is_relation], [],
+        )
+
+
+class ShellTest(TestCase):
+    def setUp(self):
+        shell.clear()
+        self.addCleanup(shell.clear)
+
+    def test_the_shell_is_rendered_once_per_section(self):
+        first = shell.parts(reverse("clients_repo"))
+
+        self.assertIs(shell.parts(reverse("clients_repo")), first)
+        self.assertIsNot(shell.parts(reverse("pets_repo")), first)
+
+    def test_the_active_section_depends_on_the_path(self):
+        self.assertEqual(shell.section(reverse("clients_form")), reverse("clients_repo"))
+        self.assertEqual(shell.section(reverse("home")), reverse("home"))
+        self.assertIsNone(shell.section("/otra/"))
+
+    def test_links_follow_the_urlconf_and_the_script_prefix(self):
+        self.assertEqual(shell.links()[1]["href"], "/clientes/")
+
+        urls = types.ModuleType("otras_urls")
+        urls.urlpatterns = [path("otra/", include("vetsoft.urls"))]
+        with override_settings(ROOT_URLCONF=urls):
+            self.assertEqual(shell.links()[1]["href"], "/otra/clientes/")
+            self.assertEqual(shell.home_buttons()[0]["url"], "/otra/clientes/")
+
+        set_script_prefix("/vetsoft/")
+        self.addCleanup(set_script_prefix, "/")
+        self.assertEqual(shell.links()[1]["href"], "/vetsoft/clientes/")
+        self.assertIn('href="/vetsoft/clientes/"', shell.parts(None)["head"])
+
+    def test_pages_keep_the_active_link_and_the_search_text(self):
+        response = self.client.get(reverse("search"), {"q": "<Kitty>"})
+
+        self.assertContains(response, 'value="&lt;Kitty&gt;"')
+        self.assertContains(response, "<!DOCTYPE html>", count=1)
+
+        response = self.client.get(reverse("pets_repo"))
+
+        self.assertContains(response, 'aria-current="page"', count=1)
+        self.assertContains(response, f'href="{reverse("pets_repo")}"')
+
+
+class JinjaTemplatesTest(TestCase):
+    TABLES = [
+        ("clients", listing.CLIENTS),
+        ("products", listing.PRODUCTS),
+        ("medicines", listing.MEDICINES),
+        ("vets", listing.VETS),
+        ("providers", listing.PROVIDERS),
+        ("pets", listing.PETS),
+    ]
+
+    def setUp(self):
+        city = City.objects.create(name="La Plata")
+        breed = Breed.objects.create(name="Siamés")
+        Client.objects.create(name="O'Brien <b>", phone="54221555232", email='"juan"@vetsoft.com', city=city)
+        Product.objects.create(name="Alimento & agua", type="Alimento", price=1234.5)
+        Medicine.objects.create(name="Ibuprofeno", description="Para el <dolor>", dose=5)
+        Vet.objects.create(name="Vet 'Sur'", phone="221", email="sur@vetsoft.com")
+        Provider.objects.create(name="Proveedor", phone="221", email="p@vetsoft.com", address="Calle 1", floor_apartament="2B")
+        Pet.objects.create(name="Kitty", breed=breed, birthday=date(2020, 2, 29), weight=4.25)
+
+    def render_forms(self, engine, path, data=None):
+        with override_settings(TEMPLATE_ENGINE=engine, JINJA2_FORMS=True):
+            response = self.client.post(path, data) if data is not None else self.client.get(path)
+        # el token CSRF cambia en cada render
+        return re.sub(r'name="csrfmiddlewaretoken" value="\w+"', "", response.content.decode())
+
+    def test_tables_render_the_same_with_both_engines(self):
+        for name, projection in self.TABLES:
+            for page in (projection.page(None, None, 50), projection.page(10**6, None, 50)):
+                context = {name: page, "page": page, "csrf_token": "token"}
+                with self.subTest(table=name, rows=len(page)):
+                    self.assertEqual(
+                        render_to_string(f"{name}/table.html", context, using="jinja2"),
+                        render_to_string(f"{name}/table.html", context, using="django"),
+                    )
+
+    def test_forms_render_the_same_with_both_engines(self):
+        for name in ("clients", "products", "medicines", "vets", "providers", "pets"):
+            for path, data in [
+                (reverse(f"{name}_form"), None),
+                (reverse(f"{name}_edit", kwargs={"id": 1}), None),
+                (reverse(f"{name}_form"), {"name": "<x>", "price": "caro", "weight": "-1", "city": "1"}),
+            ]:
+                with self.subTest(path=path, data=data):
+                    self.assertEqual(self.render_forms("jinja2", path, data), self.render_forms("django", path, data))
+
+    def test_the_engine_depends_on_the_settings(self):
+        with override_settings(TEMPLATE_ENGINE="django", JINJA2_FORMS=True):
+            self.assertEqual(templating.engine("tables"), "django")
+            self.assertEqual(templating.engine("forms"), "django")
+        with override_settings(TEMPLATE_ENGINE="jinja2", JINJA2_FORMS=False):
+            self.assertEqual(templating.engine("tables"), "jinja2")
+            self.assertEqual(templating.engine("forms"), "django")
+
+
+class CompressionTest(TestCase):
+    def test_accepted_encodings_follow_the_preference_of_the_app(self):
+        self.assertEqual(compression.accepted("gzip, deflate, br"), ["br", "gzip"])
+        self.assertEqual(compression.accepted("gzip;q=0.5"), ["gzip"])
+        self.assertEqual(compression.accepted("br;q=0, gzip"), ["gzip"])
+        self.assertEqual(compression.accepted("*"), ["br", "gzip"])
+        self.assertEqual(compression.accepted(""), [])
+
+    def test_streams_are_flushed_every_flush_size_bytes(self):
+        chunks = [b"%d,Cliente %d\n" % (i, i) for i in range(50_000)]
+        data = b"".join(chunks)
+
+        for encoding, decompress in [("br", brotli.decompress), ("gzip", gzip.decompress)]:
+            with self.subTest(encoding=encoding):
+                parts = list(compression.compress_stream(chunks, encoding))
+
+                self.assertEqual(decompress(b"".join(parts)), data)
+                self.assertLessEqual(len(parts), len(data) // compression.STREAM_FLUSH_SIZE + 2)
+                self.assertGreater(len(parts), 2)
+
+    def test_gzip_padding_is_random_and_keeps_the_content(self):
+        data = b"<input name='csrfmiddlewaretoken'>" * 100
+
+        compressed = {compression.compress(data, "gzip", padding=100) for _ in range(10)}
+        streams = {b"".join(compression.compress_stream([data, data], "gzip", padding=100)) for _ in range(10)}
+
+        self.assertGreater(len({len(item) for item in compressed}), 1)
+        self.assertGreater(len({len(item) for item in streams}), 1)
+        self.assertEqual({gzip.decompress(item) for item in compressed}, {data})
+        self.assertEqual({gzip.decompress(item) for item in streams}, {data + data})
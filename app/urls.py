@@ -5,40 +5,114 @@ from . import views
 urlpatterns = [
     # Ruta raíz
     path("", view=views.home, name="home"),
+    path("buscar/", view=views.SearchView.as_view(), name="search"),
+    path("metrics", view=views.MetricsView.as_view(), name="metrics"),
 
     #CLIENTES
     path("clientes/", view=views.ClientRepositoryView.as_view(), name="clients_repo"),
     path("clientes/nuevo/", view=views.ClientFormView.as_view(), name="clients_form"),
     path("clientes/editar/<int:id>/", view=views.ClientFormView.as_view(), name="clients_edit"),
     path("clientes/eliminar/", view=views.ClientDeleteView.as_view(), name="clients_delete"),
+    path("clientes/exportar/<str:fmt>/", views.ExportView.as_view(), {"entity": "clients"}, name="clients_export"),
+    path("api/clientes/", views.BatchView.as_view(), {"entity": "clients"}, name="clients_api"),
 
     #PRODUCTOS
     path("productos/", views.ProductRepositoryView.as_view(), name="products_repo"),
     path("productos/nuevo/", views.ProductFormView.as_view(), name="products_form"),
     path("productos/editar/<int:id>/", views.ProductFormView.as_view(), name="products_edit"),
     path("productos/eliminar/", views.ProductDeleteView.as_view(), name="products_delete"),
+    path("productos/precios/", views.ProductPriceView.as_view(), name="products_prices"),
+    path("productos/exportar/<str:fmt>/", views.ExportView.as_view(), {"entity": "products"}, name="products_export"),
+    path("api/productos/", views.BatchView.as_view(), {"entity": "products"}, name="products_api"),
 
     #VETERINARIAS
     path("veterinarias/", view=views.VetRepositoryView.as_view(), name="vets_repo"),
     path("veterinarias/nuevo/", view=views.VetFormView.as_view(), name="vets_form"),
     path("veterinarias/editar/<int:id>/", view=views.VetFormView.as_view(), name="vets_edit"),
     path("veterinarias/eliminar/", view=views.VetDeleteView.as_view(), name="vets_delete"),
+    path("veterinarias/exportar/<str:fmt>/", views.ExportView.as_view(), {"entity": "vets"}, name="vets_export"),
+    path("api/veterinarias/", views.BatchView.as_view(), {"entity": "vets"}, name="vets_api"),
 
     #MEDICAMENTOS
     path("medicamentos/", views.MedicineRepositoryView.as_view(), name="medicines_repo"),
     path("medicamentos/nuevo/", views.MedicineFormView.as_view(), name="medicines_form"),
     path("medicamentos/editar/<int:id>/", views.MedicineFormView.as_view(), name="medicines_edit"),
     path("medicamentos/eliminar/", views.MedicineDeleteView.as_view(), name="medicines_delete"),
+    path("medicamentos/exportar/<str:fmt>/", views.ExportView.as_view(), {"entity": "medicines"}, name="medicines_export"),
+    path("api/medicamentos/", views.BatchView.as_view(), {"entity": "medicines"}, name="medicines_api"),
 
     #PROVEEDORES
     path("proveedores/", view=views.ProviderRepositoryView.as_view(), name="providers_repo"),
     path("proveedores/nuevo/", view=views.ProviderFormView.as_view(), name="providers_form"),
     path("proveedores/editar/<int:id>/", view=views.ProviderFormView.as_view(), name="providers_edit"),
     path("proveedores/eliminar/", view=views.ProviderDeleteView.as_view(), name="providers_delete"),
+    path("proveedores/exportar/<str:fmt>/", views.ExportView.as_view(), {"entity": "providers"}, name="providers_export"),
+    path("api/proveedores/", views.BatchView.as_view(), {"entity": "providers"}, name="providers_api"),
 
     #MASCOTAS
     path("mascotas/", view=views.PetRepositoryView.as_view(), name="pets_repo"),
     path("mascotas/nueva/", view=views.PetFormView.as_view(), name="pets_form"),
     path("mascotas/editar/<int:id>/", view=views.PetFormView.as_view(), name="pets_edit"),
     path("mascotas/eliminar/", view=views.PetDeleteView.as_view(), name="pets_delete"),
-]
\ No newline at end of file
+    path("mascotas/exportar/<str:fmt>/", views.ExportView.as_view(), {"entity": "pets"}, name="pets_export"),
+    path("api/mascotas/", views.BatchView.as_view(), {"entity": "pets"}, name="pets_api"),
+]
+
+# Presupuesto de consultas SQL por vista y método HTTP (ver app.queries).
+# Los listados son una sola consulta sin importar cuántas filas haya; si un
+# cambio (por ejemplo {{ client.city.name }} en un template) lo supera, el
+# middleware QueryBudgetMiddleware y QueryBudgetMixin lo reportan.
+# La API por lotes (*_api) tampoco depende de la cantidad de ítems: una
+# consulta por operación (más la pausa y el reindexado de la búsqueda en las
+# altas), hasta que bulk_create parte un lote por el límite de parámetros de
+# SQLite.
+# Las ciudades y razas de los formularios y validaciones salen de la caché de
+# app.reference; los presupuestos cuentan el peor caso, cuando se releen.
+query_budgets = {
+    "home": {"GET": 0},
+    "search": {"GET": 1},
+    "metrics": {"GET": 0},
+
+    "clients_repo": {"GET": 2},
+    "clients_form": {"GET": 2, "POST": 4},
+    "clients_edit": {"GET": 3, "POST": 4},
+    "clients_delete": {"POST": 3},
+    "clients_export": {"GET": 1},
+    "clients_api": {"POST": 15},
+
+    "products_repo": {"GET": 2},
+    "products_form": {"GET": 1, "POST": 3},
+    "products_edit": {"GET": 2, "POST": 3},
+    "products_delete": {"POST": 3},
+    "products_prices": {"GET": 1, "POST": 2},
+    "products_export": {"GET": 1},
+    "products_api": {"POST": 15},
+
+    "vets_repo": {"GET": 2},
+    "vets_form": {"GET": 1, "POST": 3},
+    "vets_edit": {"GET": 2, "POST": 3},
+    "vets_delete": {"POST": 3},
+    "vets_export": {"GET": 1},
+    "vets_api": {"POST": 11},
+
+    "medicines_repo": {"GET": 2},
+    "medicines_form": {"GET": 1, "POST": 3},
+    "medicines_edit": {"GET": 2, "POST": 3},
+    "medicines_delete": {"POST": 3},
+    "medicines_export": {"GET": 1},
+    "medicines_api": {"POST": 15},
+
+    "providers_repo": {"GET": 2},
+    "providers_form": {"GET": 1, "POST": 3},
+    "providers_edit": {"GET": 2, "POST": 3},
+    "providers_delete": {"POST": 3},
+    "providers_export": {"GET": 1},
+    "providers_api": {"POST": 15},
+
+    "pets_repo": {"GET": 2},
+    "pets_form": {"GET": 2, "POST": 4},
+    "pets_edit": {"GET": 3, "POST": 4},
+    "pets_delete": {"POST": 3},
+    "pets_export": {"GET": 1},
+    "pets_api": {"POST": 15},
+}
@@ -0,0 +1,358 @@
+import math
+import re
+from datetime import date
+
+# Reglas declarativas de validación de cada modelo. Cada campo tiene una lista
+# de reglas (tipo, argumento, mensaje) que se revisan en orden: la primera que
+# falla da el error del campo. Las tablas se compilan una sola vez al importar
+# el módulo (expresiones regulares precompiladas y conversiones a número o
+# fecha), y el mismo validador revisa un dict (un formulario) o una lista de
+# dicts de una pasada (escrituras por lote).
+#
+# Tipos de regla:
+#   required    el valor no puede ser vacío ("", None, 0)
+#   not_empty   el valor no puede ser "" ni None
+#   text        el valor tiene que ser un texto de hasta el argumento de caracteres
+#               (el max_length del campo del modelo)
+#   match       re.match del patrón sobre el valor
+#   fullmatch   re.fullmatch del patrón sobre el valor
+#   contains    el valor tiene que contener el argumento
+#   endswith    el valor tiene que terminar con el argumento
+#   float       convierte el valor a un float finito (las reglas siguientes reciben el número)
+#   date        convierte un texto AAAA-MM-DD a fecha
+#   greater     el número tiene que ser mayor que el argumento
+#   between     el número tiene que estar en el rango (mínimo, máximo)
+#   before_today  la fecha tiene que ser anterior a hoy
+#   choice      el id tiene que estar entre los válidos del campo (ver Validator.validate);
+#               si no se pasan, no se revisa
+
+
+class Invalid(Exception):
+    """
+    Error de validación de un campo, con el mensaje para el usuario.
+    """
+
+    def __init__(self, message):
+        """keeps the message of the error"""
+        super().__init__(message)
+        self.message = message
+
+
+_DATE = re.compile(r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})")
+
+
+def _match(argument, message):
+    match = re.compile(argument).match
+
+    def check(value, context):
+        if match(str(value)) is None:
+            raise Invalid(message)
+        return value
+    return check
+
+
+def _fullmatch(argument, message):
+    fullmatch = re.compile(argument).fullmatch
+
+    def check(value, context):
+        if fullmatch(str(value)) is None:
+            raise Invalid(message)
+        return value
+    return check
+
+
+def _text(argument, message):
+    def check(value, context):
+        if not isinstance(value, str) or len(value) > argument:
+            raise Invalid(message)
+        return value
+    return check
+
+
+def _contains(argument, message):
+    def check(value, context):
+        if not isinstance(value, str) or argument not in value:
+            raise Invalid(message)
+        return value
+    return check
+
+
+def _endswith(argument, message):
+    def check(value, context):
+        if not isinstance(value, str) or not value.endswith(argument):
+            raise Invalid(message)
+        return value
+    return check
+
+
+def _float(argument, message):
+    # sin booleanos de JSON, ni "nan" o "inf", que la base no guarda
+    def check(value, context):
+        if isinstance(value, bool):
+            raise Invalid(message)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise Invalid(message) from None
+        if not math.isfinite(number):
+            raise Invalid(message)
+        return number
+    return check
+
+
+def _date(argument, message):
+    # lo mismo que datetime.strptime(value, "%Y-%m-%d"), sin su costo
+    def check(value, context):
+        parts = _DATE.fullmatch(value) if isinstance(value, str) else None
+        if parts is None:
+            raise Invalid(message)
+        try:
+            return date(*map(int, parts.groups()))
+        except ValueError:
+            raise Invalid(message) from None
+    return check
+
+
+def _greater(argument, message):
+    def check(value, context):
+        if value <= argument:
+            raise Invalid(message)
+        return value
+    return check
+
+
+def _between(argument, message):
+    low, high = argument
+
+    def check(value, context):
+        if not low <= value <= high:
+            raise Invalid(message)
+        return value
+    return check
+
+
+def _before_today(argument, message):
+    def check(value, context):
+        if value >= context[1]:
+            raise Invalid(message)
+        return value
+    return check
+
+
+def _choice(argument, message):
+    def check(value, context):
+        valid = context[0].get(argument)
+        if valid is None:
+            return value
+        if callable(valid):
+            exists = valid(value)
+        else:
+            exists = str(value).isdigit() and int(value) in valid
+        if not exists:
+            raise Invalid(message)
+        return value
+    return check
+
+
+RULE_TYPES = {
+    "text": _text,
+    "match": _match,
+    "fullmatch": _fullmatch,
+    "contains": _contains,
+    "endswith": _endswith,
+    "float": _float,
+    "date": _date,
+    "greater": _greater,
+    "between": _between,
+    "before_today": _before_today,
+    "choice": _choice,
+}
+
+# reglas de presencia: se revisan sin llamar a una función, porque son las
+# que más se evalúan (todo campo arranca con una)
+PRESENCE = {"required": True, "not_empty": False}
+
+
+class Validator:
+    """
+    Validador compilado a partir de la tabla de reglas de un modelo.
+    """
+
+    def __init__(self, rules):
+        """compiles the rules of every field"""
+        self.rules = rules
+        self.fields = []
+        self.uses_today = False
+        for field, field_rules in rules.items():
+            falsy = message = None
+            if field_rules and field_rules[0][0] in PRESENCE:
+                kind, _, message = field_rules[0]
+                falsy = PRESENCE[kind]
+                field_rules = field_rules[1:]
+            checks = [RULE_TYPES[kind](argument, message) for kind, argument, message in field_rules]
+            self.fields.append((field, falsy, message, checks))
+            self.uses_today = self.uses_today or any(kind == "before_today" for kind, _, _ in field_rules)
+
+    def validate(self, data, choices=None):
+        """
+        returns the errors of ``data`` by field (empty if it is valid).
+
+        ``choices`` has, for the fields with a ``choice`` rule, the set of
+        valid ids or a function that tells whether an id exists (the fields
+        left out are not checked).
+        """
+        return self._check(data, self._context(choices))
+
+    def validate_many(self, rows, choices=None):
+        """returns the errors of every row, in the same order"""
+        context = self._context(choices)
+        return [self._check(row, context) for row in rows]
+
+    def _context(self, choices):
+        return choices or {}, date.today() if self.uses_today else None
+
+    def _check(self, data, context):
+        errors = {}
+        for field, falsy, message, checks in self.fields:
+            value = data.get(field)
+            if value is None:
+                # un null de JSON es un campo sin completar
+                value = ""
+            if falsy is not None and ((not value) if falsy else value == ""):
+                errors[field] = message
+                continue
+            try:
+                for check in checks:
+                    value = check(value, context)
+            except Invalid as error:
+                errors[field] = error.message
+        return errors
+
+
+############################################# CLIENT ###############################################
+CLIENT = Validator({
+    "name": [
+        ("required", None, "Por favor ingrese un nombre"),
+        ("text", 100, "El nombre debe ser un texto de hasta 100 caracteres"),
+        ("fullmatch", r"[A-Za-zÁÉÍÓÚáéíóúÜü_ ]*", "Por favor ingrese solo caracteres permitidos"),
+    ],
+    "phone": [
+        ("required", None, "Por favor ingrese un teléfono"),
+        ("match", r"^54\d+$", "El teléfono debe comenzar con '54' y ser un número"),
+        # BigIntegerField: 19 dígitos que empiezan con 54 entran en 64 bits
+        ("fullmatch", r"\d{1,19}", "El teléfono puede tener hasta 19 dígitos"),
+    ],
+    "email": [
+        ("not_empty", None, "Por favor ingrese un email"),
+        ("text", 254, "El email debe ser un texto de hasta 254 caracteres"),
+        ("contains", "@", "Por favor ingrese un email valido"),
+        ("endswith", "@vetsoft.com", 'El email debe finalizar con "@vetsoft.com"'),
+    ],
+    "city": [
+        ("required", None, "Por favor seleccione una ciudad"),
+        ("choice", "city", "Esa ciudad no existe"),
+    ],
+})
+####################################################################################################
+
+############################################# PRODUCT ##############################################
+PRODUCT = Validator({
+    "name": [
+        ("required", None, "Por favor ingrese un nombre"),
+        ("text", 75, "El nombre debe ser un texto de hasta 75 caracteres"),
+    ],
+    "type": [
+        ("required", None, "Por favor ingrese un tipo"),
+        ("text", 25, "El tipo debe ser un texto de hasta 25 caracteres"),
+    ],
+    "price": [
+        ("required", None, "Por favor ingrese un precio"),
+        ("float", None, "El precio debe ser un número válido"),
+        ("greater", 0, "Los precios deben ser mayores que 0"),
+    ],
+})
+
+# Cambio de precios de todos los productos de un tipo (Product.update_prices)
+PRICE_CHANGE = Validator({
+    "type": [("required", None, "Por favor seleccione un tipo")],
+    "percent": [
+        ("required", None, "Por favor ingrese un porcentaje"),
+        ("float", None, "El porcentaje debe ser un número válido"),
+        ("greater", -100, "El porcentaje debe ser mayor que -100"),
+    ],
+})
+####################################################################################################
+
+############################################# MEDICINE #############################################
+MEDICINE = Validator({
+    "name": [
+        ("required", None, "Por favor ingrese un nombre"),
+        ("text", 75, "El nombre debe ser un texto de hasta 75 caracteres"),
+        ("fullmatch", r"^[^\sñ]+$", "Los nombres de medicamento no pueden contener ni ñ ni espacios"),
+    ],
+    "description": [
+        ("required", None, "Por favor ingrese una descripción"),
+        ("text", 255, "La descripción debe ser un texto de hasta 255 caracteres"),
+    ],
+    "dose": [
+        ("required", None, "Por favor ingrese una dosis"),
+        ("float", None, "La dosis debe ser un número válido"),
+        ("between", (1, 10), "Las dosis deben estar entre 1 y 10"),
+    ],
+})
+####################################################################################################
+
+############################################### VET ################################################
+VET = Validator({
+    "name": [
+        ("not_empty", None, "Por favor ingrese un nombre"),
+        ("text", 100, "El nombre debe ser un texto de hasta 100 caracteres"),
+    ],
+    "phone": [
+        ("not_empty", None, "Por favor ingrese un teléfono"),
+        ("text", 15, "El teléfono debe ser un texto de hasta 15 caracteres"),
+    ],
+    "email": [
+        ("not_empty", None, "Por favor ingrese un email"),
+        ("text", 254, "El email debe ser un texto de hasta 254 caracteres"),
+        ("contains", "@", "Por favor ingrese un email valido"),
+    ],
+})
+####################################################################################################
+
+############################################# PROVIDER #############################################
+PROVIDER = Validator({
+    **VET.rules,
+    "address": [
+        ("not_empty", None, "Por favor ingrese una dirección"),
+        ("text", 100, "La dirección debe ser un texto de hasta 100 caracteres"),
+    ],
+    "floor_apartament": [
+        ("not_empty", None, "Por favor ingrese si es una casa o el numero de piso del departamento"),
+        ("text", 100, "El piso debe ser un texto de hasta 100 caracteres"),
+    ],
+})
+####################################################################################################
+
+############################################### PET ################################################
+PET = Validator({
+    "birthday": [
+        ("not_empty", None, "Por favor ingrese una fecha"),
+        ("date", None, "La fecha de nacimiento no es válida."),
+        ("before_today", None, "La fecha de nacimiento debe ser anterior a la fecha actual."),
+    ],
+    "name": [
+        ("not_empty", None, "Por favor ingrese un nombre"),
+        ("text", 100, "El nombre debe ser un texto de hasta 100 caracteres"),
+    ],
+    "breed": [
+        ("not_empty", None, "Por favor ingrese una raza"),
+        ("choice", "breed", "Esa raza no existe"),
+    ],
+    "weight": [
+        ("not_empty", None, "Por favor ingrese un peso"),
+        ("float", None, "El peso debe ser un número válido"),
+        ("greater", 0, "El peso debe ser mayor que 0"),
+    ],
+})
+####################################################################################################
@@ -0,0 +1,100 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TableVersion
+
+
+def key(model):
+    """returns the cache key of the version of the model"""
+    return f"version:{model._meta.label_lower}"
+
+
+def keys(*models):
+    """returns the cache keys of the versions of the models"""
+    return [key(model) for model in models]
+
+
+def touch(*models):
+    """
+    bumps the version of the models, invalidating everything cached for them.
+
+    The table versions (TableVersion) change in the same transaction as the
+    data. The cache tokens change right away, so this transaction does not
+    read what was cached before, and again after the commit: in between
+    another process may cache the old data under the new token.
+    """
+    _bump_tables(models)
+    _bump(models)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(models))
+
+
+def _bump(models):
+    # con vencimiento: una escritura que no pasa por touch (SQL a mano, una
+    # base restaurada) se ve a lo sumo después de este tiempo
+    cache.set_many({key(model): uuid.uuid4().hex for model in models}, settings.REPOSITORY_CACHE_TIMEOUT)
+
+
+def _bump_tables(models):
+    tables = {model._meta.label_lower for model in models}
+    now = timezone.now()
+    updated = TableVersion.objects.filter(table__in=tables).update(version=F("version") + 1, updated_at=now)
+    if updated < len(tables):
+        # tablas sin fila (por ejemplo después de vaciar la base)
+        existing = set(TableVersion.objects.filter(table__in=tables).values_list("table", flat=True))
+        TableVersion.objects.bulk_create(
+            [TableVersion(table=table, version=1, updated_at=now) for table in tables - existing],
+            ignore_conflicts=True,
+        )
+
+
+def resolve(version_keys, cached):
+    """
+    returns the current version token of the keys, taken from the values
+    already fetched from the cache (``cached``); the missing ones (never
+    set, or evicted) get a new token
+    """
+    tokens = []
+    for version_key in version_keys:
+        token = cached.get(version_key)
+        if token is None:
+            token = uuid.uuid4().hex
+            if not cache.add(version_key, token, settings.REPOSITORY_CACHE_TIMEOUT):
+                token = cache.get(version_key, token)
+        tokens.append(token)
+    return ".".join(tokens)
+
+
+def current(*models):
+    """returns the current version token of the models"""
+    version_keys = keys(*models)
+    return resolve(version_keys, cache.get_many(version_keys))
+
+
+def validators(*models, extra=""):
+    """
+    returns the ETag and the last modification date of the tables of the
+    models, read with a single query; ``extra`` is mixed into the ETag for
+    anything else the page depends on
+    """
+    tables = sorted(model._meta.label_lower for model in models)
+    rows = {
+        table: (version, updated_at)
+        for table, version, updated_at in TableVersion.objects.filter(table__in=tables)
+        .values_list("table", "version", "updated_at")
+    }
+    # la fecha distingue el mismo número de versión en otra base (restaurada,
+    # o vaciada con flush y vuelta a llenar)
+    state = ";".join(
+        f"{table}={rows[table][0]}@{rows[table][1].timestamp()}" if table in rows else f"{table}=0"
+        for table in tables
+    )
+    etag = hashlib.md5(f"{state};{extra}".encode()).hexdigest()
+    last_modified = max((updated_at for _, updated_at in rows.values()), default=None)
+    return f'"{etag}"', last_modified
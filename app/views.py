@@ -1,24 +1,111 @@
+import json
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render, reverse
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import TemplateView
 
+from . import (
+    api,
+    exports,
+    fragments,
+    listing,
+    metrics,
+    reference,
+    search,
+    shell,
+    templating,
+    versions,
+)
+from .conditional import conditional
 from .models import Breed, City, Client, Medicine, Pet, Product, Provider, Vet
 
 
 def home(request):
     """gets homes view"""
-    buttonsHome = [
-        {'url': reverse("clients_repo"), 'id': 'home-Clientes', 'icon': 'bi-people', 'text': 'Clientes'},
-        {'url': reverse("vets_repo"), 'id': 'home-Veterinarias', 'icon': 'bi-shop', 'text': 'Veterinarias'},
-        {'url': reverse("products_repo"), 'id': 'home-Productos', 'icon': 'bi-basket', 'text': 'Productos'},
-        {'url': reverse("medicines_repo"), 'id': 'home-Medicamentos', 'icon': 'bi-capsule', 'text': 'Medicamentos'},
-        {'url': reverse("providers_repo"), 'id': 'home-Proveedores', 'icon': 'bi-truck', 'text': 'Proveedores'},
-        {'url': reverse("pets_repo"), 'id': 'home-Mascotas', 'icon': 'bi-chat-heart', 'text': 'Mascotas'},
-    ]
+    return render(request, "home.html", context={'buttons': shell.home_buttons()})
+
+class SearchView(View):
+    """
+    Vista para buscar clientes, mascotas, productos, medicamentos y proveedores.
+    """
+
+    template_name = "search/results.html"
+
+    def get(self, request):
+        """gets the search results"""
+        query = request.GET.get("q", "").strip()
+        results = search.search(query) if query else []
+        return render(request, self.template_name, {"query": query, "results": results})
+
+class MetricsView(View):
+    """
+    Vista con las métricas de los requests en el formato de Prometheus.
+    """
+
+    def get(self, request):
+        """gets the metrics of every process"""
+        if not settings.METRICS:
+            raise Http404("Métricas desactivadas")
+        body, content_type = metrics.exposition()
+        return HttpResponse(body, content_type=content_type)
 
-    return render(request, "home.html",context={'buttons': buttonsHome})
+class ExportView(View):
+    """
+    Vista para descargar una entidad completa en CSV o JSONL.
+    """
+
+    def get(self, request, entity, fmt):
+        """streams the export of the entity"""
+        if entity not in exports.EXPORTS or fmt not in exports.CONTENT_TYPES:
+            raise Http404("Exportación inexistente")
+
+        response = StreamingHttpResponse(
+            exports.stream(entity, fmt),
+            content_type=exports.CONTENT_TYPES[fmt],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{exports.filename(entity, fmt)}"'
+        return response
+
+def delete_selected(request, model, field, success_url_name):
+    """
+    deletes the rows whose ids came in the ``field`` of the form (one, or the
+    ones checked in the repository) with a single DELETE, or returns a 404 if
+    none of them exists
+    """
+    ids = [int(id) for id in request.POST.getlist(field) if id.isdigit()]
+    if not api.delete_rows(model, ids):
+        raise Http404("No existe ninguno de los registros seleccionados")
+    versions.touch(model)
+    return redirect(reverse(success_url_name))
+
+@method_decorator(csrf_exempt, name="dispatch")
+class BatchView(View):
+    """
+    Vista de la API por lotes: altas, modificaciones y bajas de una entidad en
+    JSON, con el resultado de cada ítem (ver app.api.apply).
+    """
+
+    def post(self, request, entity):
+        """applies the batch of the body"""
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"error": "El cuerpo no es un JSON válido"}, status=400)
+
+        try:
+            results = api.apply(entity, payload)
+        except api.BatchError as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+        ok = all(result["ok"] for items in results.values() for result in items)
+        return JsonResponse({"ok": ok, **results})
 
 ############################################# CLIENTS ##############################################
+@method_decorator(conditional(Client, City), name="get")
 class ClientRepositoryView(View):
     """
     Vista para manejar el repositorio de clientes.
@@ -29,9 +116,12 @@ class ClientRepositoryView(View):
 
     def get(self, request):
         """gets a client/repo"""
-        clients = Client.objects.all()
-        return render(request, self.template_name, {"clients": clients})
+        table = fragments.repository_table(
+            request, "clients/table.html", "clients", listing.CLIENTS, [Client, City],
+        )
+        return render(request, self.template_name, {"table": table})
 
+@method_decorator(conditional(Client, City), name="get")
 class ClientFormView(View):
     """
     Vista para manejar el formulario de clientes.
@@ -43,10 +133,10 @@ class ClientFormView(View):
     def get(self, request, id=None):
         """gets a client/form"""
         client = None
-        cities = City.objects.all()
+        cities = reference.choices(City)
         if id is not None:
             client = get_object_or_404(Client, pk=id)
-        return render(request, self.template_name, {"client": client, "cities": cities})
+        return render(request, self.template_name, {"client": client, "cities": cities}, using=templating.engine("forms"))
 
     def post(self, request, id=None):
         """saves a client"""
@@ -59,7 +149,7 @@ class ClientFormView(View):
 
         if saved:
             return redirect(reverse("clients_repo"))
-        return render(request, self.template_name, {"errors": errors, "client": request.POST})
+        return render(request, self.template_name, {"errors": errors, "client": request.POST}, using=templating.engine("forms"))
 
 class ClientDeleteView(View):
     """
@@ -68,14 +158,12 @@ class ClientDeleteView(View):
     """
 
     def post(self, request):
-        """Deletes a client"""
-        client_id = request.POST.get("client_id")
-        client = get_object_or_404(Client, pk=int(client_id))
-        client.delete()
-        return redirect(reverse("clients_repo"))
+        """Deletes the selected clients"""
+        return delete_selected(request, Client, "client_id", "clients_repo")
 ####################################################################################################
 
 ############################################# PRODUCTS #############################################
+@method_decorator(conditional(Product), name="get")
 class ProductRepositoryView(TemplateView):
     """
     Vista para manejar el repositorio del producto.
@@ -86,9 +174,13 @@ class ProductRepositoryView(TemplateView):
     def get_context_data(self, **kwargs):
         """gets alls the products"""
         context = super().get_context_data(**kwargs)
-        context["products"] = Product.objects.all()
+        table = fragments.repository_table(
+            self.request, "products/table.html", "products", listing.PRODUCTS, [Product],
+        )
+        context["table"] = table
         return context
 
+@method_decorator(conditional(Product), name="get")
 class ProductFormView(View):
     """
     Vista para manejar el formulario del producto.
@@ -101,7 +193,7 @@ class ProductFormView(View):
         context = {}
         if id is not None:
             context["product"] = get_object_or_404(Product, pk=id) # pragma: no cover
-        return render(request, self.template_name, context)
+        return render(request, self.template_name, context, using=templating.engine("forms"))
 
     def post(self, request, id=None):
         """save a product"""
@@ -114,7 +206,7 @@ class ProductFormView(View):
 
         if saved:
             return redirect(reverse("products_repo")) # pragma: no cover
-        return render(request, self.template_name, {"errors": errors, "product": request.POST})
+        return render(request, self.template_name, {"errors": errors, "product": request.POST}, using=templating.engine("forms"))
 
 class ProductDeleteView(View):
     """
@@ -122,15 +214,37 @@ class ProductDeleteView(View):
     """
 
     def post(self, request):
-        """Deletes a product"""
-        product_id = request.POST.get("product_id")
-        product = get_object_or_404(Product, pk=int(product_id))
-        product.delete()
-        return redirect(reverse("products_repo"))
+        """Deletes the selected products"""
+        return delete_selected(request, Product, "product_id", "products_repo")
+
+class ProductPriceView(View):
+    """
+    Vista para cambiar en un porcentaje los precios de un tipo de producto.
+    """
+
+    template_name = "products/prices.html"
+
+    def get(self, request):
+        """gets the form with the types of product"""
+        return render(request, self.template_name, {"types": self.types()})
+
+    def post(self, request):
+        """changes the prices of the type"""
+        updated, errors = Product.update_prices(request.POST)
+
+        if updated:
+            versions.touch(Product)
+            return redirect(reverse("products_repo"))
+        return render(request, self.template_name, {"types": self.types(), "errors": errors, "change": request.POST})
+
+    def types(self):
+        """returns the types of the products (read from the (type, price) index)"""
+        return Product.objects.order_by("type").values_list("type", flat=True).distinct()
 ####################################################################################################
 
 ############################################ MEDICINAS #############################################
 
+@method_decorator(conditional(Medicine), name="get")
 class MedicineRepositoryView(TemplateView):
     """
     Vista para manejar el repositorio de medicinas.
@@ -141,9 +255,13 @@ class MedicineRepositoryView(TemplateView):
     def get_context_data(self, **kwargs):
         """gets all the medicines"""
         context = super().get_context_data(**kwargs)
-        context["medicines"] = Medicine.objects.all()
+        table = fragments.repository_table(
+            self.request, "medicines/table.html", "medicines", listing.MEDICINES, [Medicine],
+        )
+        context["table"] = table
         return context
 
+@method_decorator(conditional(Medicine), name="get")
 class MedicineFormView(View):
     """
     Vista para manejar el formulario de medicinas.
@@ -156,7 +274,7 @@ class MedicineFormView(View):
         context = {}
         if id is not None:
             context["medicine"] = get_object_or_404(Medicine, pk=id) # pragma: no cover
-        return render(request, self.template_name, context)
+        return render(request, self.template_name, context, using=templating.engine("forms"))
 
     def post(self, request, id=None):
         """saves a medicine"""
@@ -169,7 +287,7 @@ class MedicineFormView(View):
 
         if saved:
             return redirect(reverse("medicines_repo"))
-        return render(request, self.template_name, {"errors": errors, "medicine": request.POST})
+        return render(request, self.template_name, {"errors": errors, "medicine": request.POST}, using=templating.engine("forms"))
 
 class MedicineDeleteView(View):
     """
@@ -177,14 +295,12 @@ class MedicineDeleteView(View):
     """
 
     def post(self, request):
-        """Deletes a medicine"""
-        medicine_id = request.POST.get("medicine_id")
-        medicine = get_object_or_404(Medicine, pk=int(medicine_id))
-        medicine.delete()
-        return redirect(reverse("medicines_repo"))
+        """Deletes the selected medicines"""
+        return delete_selected(request, Medicine, "medicine_id", "medicines_repo")
 ####################################################################################################
 
 ############################################# VETS #################################################
+@method_decorator(conditional(Vet), name="get")
 class VetRepositoryView(View):
     """
     Vista para manejar el repositorio de veterinarias.
@@ -192,9 +308,12 @@ class VetRepositoryView(View):
 
     def get(self, request):
         """gets a vets/repo"""
-        vets = Vet.objects.all()
-        return render(request, "vets/repository.html", {"vets": vets})
+        table = fragments.repository_table(
+            request, "vets/table.html", "vets", listing.VETS, [Vet],
+        )
+        return render(request, "vets/repository.html", {"table": table})
 
+@method_decorator(conditional(Vet), name="get")
 class VetFormView(View):
     """
     Vista para manejar el formulario de veterinarias.
@@ -207,7 +326,7 @@ class VetFormView(View):
         vet = None
         if id is not None:
             vet = get_object_or_404(Vet, pk=id) # pragma: no cover
-        return render(request, self.template_name, {"vet": vet})
+        return render(request, self.template_name, {"vet": vet}, using=templating.engine("forms"))
 
     def post(self, request, id=None):
         """saves a vet"""
@@ -223,7 +342,7 @@ class VetFormView(View):
 
         if saved:
             return redirect(reverse("vets_repo")) 
-        return render(request, self.template_name, {"errors": errors, "vet": request.POST})
+        return render(request, self.template_name, {"errors": errors, "vet": request.POST}, using=templating.engine("forms"))
 
 class VetDeleteView(View):
     """
@@ -231,14 +350,12 @@ class VetDeleteView(View):
     """
 
     def post(self, request):
-        """Deletes a vet"""
-        vet_id = request.POST.get("vet_id")
-        vet = get_object_or_404(Vet, pk=int(vet_id))
-        vet.delete()
-        return redirect(reverse("vets_repo"))
+        """Deletes the selected vets"""
+        return delete_selected(request, Vet, "vet_id", "vets_repo")
 ####################################################################################################
 
 ########################################### PROVEEDORES ############################################
+@method_decorator(conditional(Provider), name="get")
 class ProviderRepositoryView(View):
     """
     Vista para manejar el repositorio de proveedores.
@@ -246,9 +363,12 @@ class ProviderRepositoryView(View):
 
     def get(self, request):
         """gets a providers/repo"""
-        providers = Provider.objects.all()
-        return render(request, "providers/repository.html", {"providers": providers})
+        table = fragments.repository_table(
+            request, "providers/table.html", "providers", listing.PROVIDERS, [Provider],
+        )
+        return render(request, "providers/repository.html", {"table": table})
 
+@method_decorator(conditional(Provider), name="get")
 class ProviderFormView(View):
     """
     Vista para manejar el formulario de proveedores.
@@ -263,7 +383,7 @@ class ProviderFormView(View):
 
         if id is not None:
             provider = get_object_or_404(Provider, pk=id) # pragma: no cover
-        return render(request, self.template_name, {"provider": provider})
+        return render(request, self.template_name, {"provider": provider}, using=templating.engine("forms"))
 
     def post(self, request, id=None):
         """saves a provider"""
@@ -279,7 +399,7 @@ class ProviderFormView(View):
 
         if saved:
             return redirect(reverse("providers_repo"))
-        return render(request, self.template_name, {"errors": errors, "provider": request.POST})
+        return render(request, self.template_name, {"errors": errors, "provider": request.POST}, using=templating.engine("forms"))
 
 class ProviderDeleteView(View):
     """
@@ -287,14 +407,12 @@ class ProviderDeleteView(View):
     """
 
     def post(self, request):
-        """Deletes a provider"""
-        provider_id = request.POST.get("provider_id")
-        provider = get_object_or_404(Provider, pk=int(provider_id))
-        provider.delete()
-        return redirect(reverse("providers_repo"))
+        """Deletes the selected providers"""
+        return delete_selected(request, Provider, "provider_id", "providers_repo")
 ####################################################################################################
 
 ############################################### PETS ###############################################
+@method_decorator(conditional(Pet, Breed), name="get")
 class PetRepositoryView(View):
     """
     Vista para manejar el repositorio de mascotas.
@@ -303,9 +421,12 @@ class PetRepositoryView(View):
     def get(self, request):
         """gets a pets/repo"""
 
-        pets = Pet.objects.all()
-        return render(request, "pets/repository.html", {"pets": pets})
+        table = fragments.repository_table(
+            request, "pets/table.html", "pets", listing.PETS, [Pet, Breed],
+        )
+        return render(request, "pets/repository.html", {"table": table})
 
+@method_decorator(conditional(Pet, Breed), name="get")
 class PetFormView(View):
     """
     Vista para manejar el formulario de mascotas.
@@ -317,10 +438,10 @@ class PetFormView(View):
         """gets a pets/form"""
 
         pet = None
-        breeds = Breed.objects.all()
+        breeds = reference.choices(Breed)
         if id is not None:
             pet = get_object_or_404(Pet, pk=id) # pragma: no cover
-        return render(request, self.template_name, {"pet": pet, "breeds": breeds})
+        return render(request, self.template_name, {"pet": pet, "breeds": breeds}, using=templating.engine("forms"))
 
     def post(self, request, id=None):
         """saves a pet"""
@@ -336,7 +457,7 @@ class PetFormView(View):
 
         if saved:
             return redirect(reverse("pets_repo"))
-        return render(request, self.template_name, {"errors": errors, "pet": request.POST})
+        return render(request, self.template_name, {"errors": errors, "pet": request.POST}, using=templating.engine("forms"))
 
 class PetDeleteView(View):
     """
@@ -344,9 +465,6 @@ class PetDeleteView(View):
     """
 
     def post(self, request):
-        """Deletes a pet"""
-        pet_id = request.POST.get("pet_id")
-        pet = get_object_or_404(Pet, pk=int(pet_id))
-        pet.delete()
-        return redirect(reverse("pets_repo"))
+        """Deletes the selected pets"""
+        return delete_selected(request, Pet, "pet_id", "pets_repo")
 ####################################################################################################
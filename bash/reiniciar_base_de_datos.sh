@@ -4,4 +4,4 @@ cd ..;
 source ".env";
 rm "$DB_NAME" && echo "Se borro la base de datos '$DB_NAME'";
 python3 manage.py migrate && echo "se corrieron las migraciones de la base de datos";
-python3 manage.py loaddata fixtures/data.json && echo "Se cargaron datos aleatorios";
+python3 manage.py generate_fixtures --insert && echo "Se cargaron datos aleatorios";
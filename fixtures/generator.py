@@ -1,80 +1,210 @@
-client_template="""
-{
-    "model": "app.client",
-    "pk": $id,
-    "fields": {
-        "name": "Cliente $id",
-        "phone": "1123456789",
-        "email": "cliente$id@example.com",
-        "address" : "calle $id"
-    }
-}"""
-product_template="""
-{
-    "model": "app.product",
-    "pk": $id,
-    "fields": {
-        "name": "Producto $id",
-        "type": "Tipo $id",
-        "price": $id.99
-    }
-}"""
-
-medicine_template="""
-{
-    "model": "app.medicine",
-    "pk": $id,
-    "fields": {
-        "name": "Medicina $id",
-        "description": "Descripción de la medicina $id",
-        "dose": $id
-    }
-}"""
-
-vet_template="""
-{
-    "model": "app.vet",
-    "pk": $id,
-    "fields": {
-        "name": "Veterinario $id",
-        "phone": "111222333",
-        "email": "vet$id@example.com"
-    }
-}"""
-
-provider_template="""
-{
-    "model": "app.provider",
-    "pk": $id,
-    "fields": {
-        "name": "Proveedor $id",
-        "phone": "777888999",
-        "email": "prov$id@example.com",
-        "address": "Dirección $id"
-    }
-}"""
-
-pet_template="""
-{
-    "model": "app.pet",
-    "pk": $id,
-    "fields": {
-        "name": "Mascota $id",
-        "breed": "Raza $id",
-        "birthday": "2000-01-01"
-    }
-}"""
-
-templates = [client_template, product_template, medicine_template, vet_template, provider_template, pet_template]
-data = []
-DATA_COUNT = 10
-# genero el data json para cargar datos.
-t = "["
-for template in templates:
-    # datos por plantilla
-    data.append(','.join([template.replace("$id", str(i)) for i in range(1,DATA_COUNT + 1)]))
-t += ','.join(data)
-t += "]"
-
-print(t, file=open("fixtures/data.json", 'w'))
+"""
+Generador de datos de prueba para la aplicación.
 
+Genera filas válidas para todos los modelos (pasan las validaciones de
+app.models) de forma determinística: la misma semilla y las mismas cantidades
+dan siempre los mismos datos. Las filas se generan de a una, así que la
+memoria no depende de la cantidad, y se pueden escribir como JSONL (formato
+que entiende ``loaddata``) o insertar directamente en la base con el comando
+``generate_fixtures``.
+"""
+
+import json
+import random
+from datetime import date, timedelta
+from itertools import accumulate
+
+# Ciudades (a lo sumo 10 caracteres, como City.name) y razas, de la más a la
+# menos frecuente: los clientes y las mascotas se reparten con una ley de Zipf
+CITIES = [
+    "La Plata", "Quilmes", "Berisso", "Ensenada", "Lanus", "Avellaneda", "Rosario", "Cordoba",
+    "Mendoza", "Tandil", "Salta", "Neuquen", "Junin", "Olavarria", "Pergamino", "Chascomus",
+    "Lobos", "Azul", "Brandsen", "Magdalena",
+]
+
+BREEDS = [
+    "Mestizo", "Caniche", "Labrador", "Ovejero Aleman", "Golden Retriever", "Bulldog Frances",
+    "Beagle", "Dogo Argentino", "Siames", "Persa", "Boxer", "Yorkshire Terrier", "Pitbull",
+    "Border Collie", "Schnauzer", "Cocker Spaniel", "Maine Coon", "Salchicha", "Chihuahua",
+    "Rottweiler",
+]
+
+FIRST_NAMES = [
+    "Juan", "Maria", "Jose", "Ana", "Carlos", "Lucia", "Martin", "Sofia", "Diego", "Valentina",
+    "Pablo", "Camila", "Sebastian", "Florencia", "Matias", "Julieta", "Nicolas", "Agustina",
+    "Federico", "Paula", "Guido", "Carolina", "Emiliano", "Rocio", "Santiago", "Milagros",
+]
+
+LAST_NAMES = [
+    "Gonzalez", "Rodriguez", "Gomez", "Fernandez", "Lopez", "Diaz", "Martinez", "Perez",
+    "Garcia", "Sanchez", "Romero", "Sosa", "Alvarez", "Torres", "Ruiz", "Ramirez", "Flores",
+    "Benitez", "Acosta", "Medina", "Herrera", "Suarez", "Aguirre", "Gimenez", "Veron", "Carrillo",
+]
+
+PET_NAMES = [
+    "Firulais", "Luna", "Rocky", "Toby", "Lola", "Simba", "Milo", "Kira", "Bruno", "Nala",
+    "Coco", "Manchas", "Negro", "Pelusa", "Tango", "Mora", "Oliver", "Frida", "Chispa", "Thor",
+]
+
+PRODUCT_TYPES = ["Alimento", "Accesorio", "Higiene", "Juguete", "Antiparasitario", "Cama", "Correa"]
+
+PRODUCT_NAMES = ["Premium", "Adulto", "Cachorro", "Senior", "Light", "Clasico", "Deluxe", "Basico"]
+
+MEDICINES = [
+    "Ibuprofeno", "Amoxicilina", "Meloxicam", "Ivermectina", "Prednisona", "Enrofloxacina",
+    "Metronidazol", "Tramadol", "Cefalexina", "Doxiciclina", "Furosemida", "Omeprazol",
+]
+
+STREETS = ["Calle", "Avenida", "Diagonal", "Boulevard"]
+
+# Las fechas de nacimiento se calculan hacia atrás desde esta fecha (y no
+# desde hoy) para que los datos no cambien de un día a otro
+REFERENCE_DATE = date(2024, 6, 1)
+
+# Cantidades por defecto (las del antiguo DATA_COUNT)
+COUNTS = {"client": 10, "pet": 10, "product": 10, "medicine": 10, "vet": 10, "provider": 10}
+
+
+def zipf_weights(n, exponent=1.0):
+    """returns the cumulative weights of a Zipf distribution over n ranks"""
+    return list(accumulate(1 / rank**exponent for rank in range(1, n + 1)))
+
+
+def phone(rng):
+    """returns an argentinian phone number: 54, area code and 7 or 8 digits"""
+    area = rng.choice(["11", "221", "223", "341", "351", "261"])
+    digits = 10 - len(area)
+    return f"54{area}{rng.randrange(10 ** (digits - 1), 10**digits)}"
+
+
+def person(rng):
+    """returns a random first and last name"""
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def cities(rng, count):
+    """yields the fields of the cities"""
+    for name in CITIES[:count]:
+        yield {"name": name}
+
+
+def breeds(rng, count):
+    """yields the fields of the breeds"""
+    for name in BREEDS[:count]:
+        yield {"name": name}
+
+
+def clients(rng, count, city_count):
+    """yields the fields of the clients, spread over the cities"""
+    weights = zipf_weights(city_count)
+    city_ids = range(1, city_count + 1)
+    for id in range(1, count + 1):
+        first, last = person(rng)
+        yield {
+            "name": f"{first} {last}",
+            "phone": int(phone(rng)),
+            "email": f"{first.lower()}.{last.lower()}{id}@vetsoft.com",
+            "city": rng.choices(city_ids, cum_weights=weights)[0],
+        }
+
+
+def pets(rng, count, breed_count):
+    """yields the fields of the pets, spread over the breeds"""
+    weights = zipf_weights(breed_count)
+    breed_ids = range(1, breed_count + 1)
+    for _ in range(count):
+        yield {
+            "name": rng.choice(PET_NAMES),
+            "breed": rng.choices(breed_ids, cum_weights=weights)[0],
+            "birthday": (REFERENCE_DATE - timedelta(days=rng.randint(30, 15 * 365))).isoformat(),
+            "weight": round(min(max(rng.lognormvariate(2.3, 0.6), 0.5), 90), 1),
+        }
+
+
+def products(rng, count):
+    """yields the fields of the products"""
+    for _ in range(count):
+        kind = rng.choice(PRODUCT_TYPES)
+        yield {
+            "name": f"{kind} {rng.choice(PRODUCT_NAMES)}",
+            "type": kind,
+            "price": round(rng.lognormvariate(8, 0.8), 2),
+        }
+
+
+def medicines(rng, count):
+    """yields the fields of the medicines (names without spaces, doses between 1 and 10)"""
+    for _ in range(count):
+        yield {
+            "name": rng.choice(MEDICINES),
+            "description": f"{rng.choice(MEDICINES)} en comprimidos de {rng.choice([5, 10, 20, 50])} mg",
+            "dose": round(rng.uniform(1, 10), 1),
+        }
+
+
+def vets(rng, count):
+    """yields the fields of the vets"""
+    for id in range(1, count + 1):
+        _, last = person(rng)
+        yield {
+            "name": f"Veterinaria {last}",
+            "phone": phone(rng),
+            "email": f"{last.lower()}{id}@vetsoft.com",
+        }
+
+
+def providers(rng, count):
+    """yields the fields of the providers"""
+    for id in range(1, count + 1):
+        _, last = person(rng)
+        yield {
+            "name": f"Distribuidora {last}",
+            "phone": phone(rng),
+            "email": f"ventas{id}@vetsoft.com",
+            "address": f"{rng.choice(STREETS)} {rng.randint(1, 200)} nro {rng.randint(1, 3000)}",
+            "floor_apartament": rng.choice(["Casa", str(rng.randint(1, 12))]),
+        }
+
+
+def generate(counts=None, seed=0):
+    """
+    yields (model, fields) for every row, cities and breeds first so the
+    foreign keys (their position, starting at 1) already exist.
+
+    Every model has its own random generator, so changing the count of one
+    does not change the rows of the others.
+    """
+    counts = {**COUNTS, **(counts or {})}
+    city_count = min(counts.get("city", len(CITIES)), len(CITIES))
+    breed_count = min(counts.get("breed", len(BREEDS)), len(BREEDS))
+
+    def rng(model):
+        return random.Random(f"{seed}-{model}")
+
+    sources = [
+        ("city", cities(rng("city"), city_count)),
+        ("breed", breeds(rng("breed"), breed_count)),
+        ("client", clients(rng("client"), counts["client"], city_count)),
+        ("pet", pets(rng("pet"), counts["pet"], breed_count)),
+        ("product", products(rng("product"), counts["product"])),
+        ("medicine", medicines(rng("medicine"), counts["medicine"])),
+        ("vet", vets(rng("vet"), counts["vet"])),
+        ("provider", providers(rng("provider"), counts["provider"])),
+    ]
+    for model, rows in sources:
+        for fields in rows:
+            yield model, fields
+
+
+def write_jsonl(output, counts=None, seed=0):
+    """
+    writes the rows as Django fixtures in JSONL (one object per line, with
+    pk) and returns how many were written
+    """
+    written = 0
+    pks = {}
+    for model, fields in generate(counts, seed):
+        pks[model] = pks.get(model, 0) + 1
+        output.write(json.dumps({"model": f"app.{model}", "pk": pks[model], "fields": fields}) + "\n")
+        written += 1
+    return written
@@ -44,19 +44,27 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "app.middleware.StaticFilesMiddleware",
+    "app.middleware.MetricsMiddleware",
+    "app.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     #"django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "app.middleware.QueryBudgetMiddleware",
+    "app.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "vetsoft.urls"
 
 TEMPLATES = [
+    # Los motores de app.templating son los de Django con el tiempo de render
+    # en las métricas (app.metrics)
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "app.templating.DjangoTemplates",
+        "NAME": "django",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -69,6 +77,20 @@ TEMPLATES = [
             ],
         },
     },
+    # Plantillas de app/jinja2/ (ver TEMPLATE_ENGINE): las mismas páginas que
+    # las de app/templates/, con la misma salida
+    {
+        "BACKEND": "app.templating.Jinja2",
+        "NAME": "jinja2",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "environment": "app.templating.environment",
+            "context_processors": [
+                "app.context_processors.navbar",
+            ],
+        },
+    },
 ]
 
 WSGI_APPLICATION = "vetsoft.wsgi.application"
@@ -84,6 +106,23 @@ DATABASES = {
     },
 }
 
+# Perfil de la base: "default" (SQLite sin ajustes) o "production": WAL,
+# los pragmas de SQLITE_PRAGMAS en cada conexión (ver app.db) y conexiones
+# persistentes, verificadas antes de reusarlas
+DB_PROFILE = os.getenv("DB_PROFILE", "default")
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 2**20)),
+    # negativo: en KiB
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 2**10)),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),
+    "temp_store": "MEMORY",
+}
+if DB_PROFILE == "production":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", 600))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -107,4 +146,63 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = "static/"
+# collectstatic copia ahí los archivos estáticos, con el hash del contenido en
+# el nombre y sus versiones gzip y brotli (app.static), y la app los sirve
+# desde ahí con app.middleware.StaticFilesMiddleware
+STATIC_ROOT = os.getenv("STATIC_ROOT", BASE_DIR / "staticfiles")
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "app.static.CompressedManifestStaticFilesStorage"},
+}
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Motor de las tablas de los listados: "django" o "jinja2" (más rápido para
+# muchas filas por página). Con JINJA2_FORMS=True los formularios también usan
+# Jinja2
+TEMPLATE_ENGINE = os.getenv("TEMPLATE_ENGINE", "django")
+JINJA2_FORMS = os.getenv("JINJA2_FORMS", "False") == "True"
+
+# Perfiles con cProfile de requests (app.profiling): los que mandan el header
+# "X-Profile: <PROFILING_TOKEN>" y un porcentaje de todos. Se guardan los
+# últimos PROFILING_MAX_FILES en PROFILING_DIR
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_SAMPLE_PERCENT = float(os.getenv("PROFILING_SAMPLE_PERCENT", 0))
+PROFILING_DIR = os.getenv("PROFILING_DIR", BASE_DIR / "profiles")
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", 500))
+
+# Métricas de los requests en /metrics, en el formato de Prometheus (con
+# varios procesos, ver PROMETHEUS_MULTIPROC_DIR en app.metrics). /metrics no
+# pide credenciales (muestra las rutas y el tráfico de cada una): se activa
+# sólo donde la red o el proxy lo dejan fuera del alcance del público
+METRICS = os.getenv("METRICS", "False") == "True"
+
+# Directorio del log de acceso en JSONL (app.accesslog), un archivo por
+# proceso; vacío, sin log
+ACCESS_LOG_DIR = os.getenv("ACCESS_LOG_DIR", "")
+# Registros que esperan en memoria a ser escritos; si el disco no da abasto y
+# la cola se llena, los de más se descartan (y se cuentan) en vez de crecer
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", 10_000))
+
+# Tamaño mínimo (bytes) de una respuesta para comprimirla con brotli o gzip
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+
+# Cantidad de filas por página en los listados (paginación por cursor)
+REPOSITORY_PAGE_SIZE = int(os.getenv("REPOSITORY_PAGE_SIZE", 50))
+
+# Presupuesto de consultas por vista: "off", "warn" (loguea) o "raise" (falla)
+QUERY_BUDGET = os.getenv("QUERY_BUDGET", "off")
+# Cantidad de consultas con la misma forma a partir de la cual se reporta un N+1
+QUERY_BUDGET_N_PLUS_ONE = int(os.getenv("QUERY_BUDGET_N_PLUS_ONE", 3))
+
+# Caché de los listados. Con más de un proceso (varios workers) tiene que ser
+# compartida: FileBasedCache con un directorio, o DatabaseCache con una tabla
+# (creada con "python manage.py createcachetable")
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "vetsoft"),
+    },
+}
+# Segundos que se guarda la tabla renderizada de un listado (se invalida antes
+# si cambian los datos)
+REPOSITORY_CACHE_TIMEOUT = int(os.getenv("REPOSITORY_CACHE_TIMEOUT", 3600))